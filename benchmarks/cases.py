@@ -0,0 +1,164 @@
+# benchmarks/cases.py
+
+import os
+import sys
+import time
+from itertools import permutations
+
+# Ensure project root is on path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.fixtures_wc2026 import load_group_stage_fixtures
+from src.jit_kernel import HAVE_NUMBA
+from src.match_prediction import (
+    clear_scoreline_cache,
+    expected_goals,
+    get_compiled_team_params,
+    match_outcome_probabilities,
+    match_outcome_probabilities_batch,
+)
+from src.poisson_model import fit_poisson_model, load_processed_matches
+from src.simulation import simulate_full_tournament, simulate_group_stage
+
+# n_sim sizes of the simulator benchmarks
+SIM_SIZES = (10_000, 100_000)
+
+# Engines of the simulator benchmarks, named in the case names: an "auto"
+# case would silently compare Numba against NumPy across machines. Without
+# numba its cases are left out rather than failing the whole run.
+SIM_ENGINES = ("numba", "numpy") if HAVE_NUMBA else ("numpy",)
+
+
+def _rate(fn, repeat: int, ops: int, unit: str, number: int = 1) -> dict:
+    """
+    Best-of-repeat throughput of fn, which performs `ops` operations per
+    call: each sample times `number` calls, after one warm-up call.
+    """
+    fn()
+    rates = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rates.append(number * ops / (time.perf_counter() - start))
+    return {"value": max(rates), "unit": unit, "higher_is_better": True, "samples": rates}
+
+
+def _fixture_pairs() -> list[tuple[str, str]]:
+    """
+    Every ordered pair of WC 2026 teams (2,256 matches).
+    """
+    fixtures = load_group_stage_fixtures()
+    teams = sorted(set(fixtures["home_team"]).union(fixtures["away_team"]))
+    return list(permutations(teams, 2))
+
+
+def bench_expected_goals(repeat: int) -> dict:
+    """
+    Single expected_goals calls by team name.
+    """
+    pairs = _fixture_pairs()
+
+    def run():
+        for home, away in pairs:
+            expected_goals(home, away)
+
+    return _rate(run, repeat, len(pairs), "calls/s", number=20)
+
+
+def bench_expected_goals_batch(repeat: int) -> dict:
+    """
+    CompiledTeamParams.expected_goals over all pairs in one call.
+    """
+    params = get_compiled_team_params()
+    pairs = _fixture_pairs()
+    home_ids = params.team_ids([h for h, _ in pairs])
+    away_ids = params.team_ids([a for _, a in pairs])
+
+    def run():
+        params.expected_goals(home_ids, away_ids, neutral=True)
+
+    return _rate(run, repeat, len(pairs), "matches/s", number=2_000)
+
+
+def bench_match_outcome_probabilities(repeat: int) -> dict:
+    """
+    Single match_outcome_probabilities calls with a cold scoreline cache.
+    """
+    pairs = _fixture_pairs()[:200]
+
+    def run():
+        clear_scoreline_cache()
+        for home, away in pairs:
+            match_outcome_probabilities(home, away)
+
+    return _rate(run, repeat, len(pairs), "calls/s", number=2)
+
+
+def bench_match_outcome_probabilities_batch(repeat: int) -> dict:
+    """
+    match_outcome_probabilities_batch over all pairs in one call.
+    """
+    pairs = _fixture_pairs()
+    home_teams = [h for h, _ in pairs]
+    away_teams = [a for _, a in pairs]
+
+    def run():
+        match_outcome_probabilities_batch(home_teams, away_teams)
+
+    return _rate(run, repeat, len(pairs), "matches/s", number=10)
+
+
+def bench_group_stage(n_sim: int, engine: str):
+    def bench(repeat: int) -> dict:
+        def run():
+            simulate_group_stage(n_sim=n_sim, random_seed=1, engine=engine)
+
+        return {**_rate(run, repeat, n_sim, "sims/s"), "engine": engine}
+
+    bench.__doc__ = f'simulate_group_stage, n_sim={n_sim:,}, engine="{engine}".'
+    return bench
+
+
+def bench_full_tournament(n_sim: int, engine: str, knockout: str = "sample"):
+    def bench(repeat: int) -> dict:
+        def run():
+            simulate_full_tournament(n_sim=n_sim, random_seed=1, knockout=knockout, engine=engine)
+
+        return {**_rate(run, repeat, n_sim, "sims/s"), "engine": engine}
+
+    bench.__doc__ = f'simulate_full_tournament, n_sim={n_sim:,}, knockout="{knockout}", engine="{engine}".'
+    return bench
+
+
+def bench_fit_poisson_model(repeat: int) -> dict:
+    """
+    fit_poisson_model on data/processed/matches_2018_2025.csv (wall time).
+    """
+    matches = load_processed_matches()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fit_poisson_model(matches)
+        times.append(time.perf_counter() - start)
+    return {"value": min(times), "unit": "s", "higher_is_better": False, "samples": times}
+
+
+# name -> benchmark(repeat) returning {"value", "unit", "higher_is_better",
+# "samples"}, plus the "engine" of the simulator benchmarks
+CASES = {
+    "expected_goals": bench_expected_goals,
+    "expected_goals_batch": bench_expected_goals_batch,
+    "match_outcome_probabilities": bench_match_outcome_probabilities,
+    "match_outcome_probabilities_batch": bench_match_outcome_probabilities_batch,
+    **{f"group_stage_{e}_{n}": bench_group_stage(n, e) for e in SIM_ENGINES for n in SIM_SIZES},
+    **{f"full_tournament_{e}_{n}": bench_full_tournament(n, e) for e in SIM_ENGINES for n in SIM_SIZES},
+    **{
+        f"full_tournament_exact_{e}_{n}": bench_full_tournament(n, e, "exact")
+        for e in SIM_ENGINES
+        for n in SIM_SIZES
+    },
+    "fit_poisson_model": bench_fit_poisson_model,
+}
@@ -0,0 +1,250 @@
+# benchmarks/run_benchmarks.py
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Ensure project root is on path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+BENCHMARKS_DIR = os.path.join(PROJECT_ROOT, "benchmarks")
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, "baselines", "baseline.json")
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, "results", "latest.json")
+
+# Relative change beyond which compare reports a regression (the samples
+# of the two runs must not overlap either, see compare_results)
+DEFAULT_THRESHOLD = 0.10
+
+
+def run_case(name: str, repeat: int) -> dict:
+    """
+    Run one benchmark in this process and add its peak RSS.
+    """
+    from benchmarks.cases import CASES
+    from src.shared_tables import _peak_rss_mb
+
+    result = CASES[name](repeat)
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def _run_case_in_subprocess(name: str, repeat: int) -> dict:
+    """
+    Each case runs in a fresh interpreter, so its caches start cold and its
+    peak RSS is its own.
+    """
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "case", name, "--repeat", str(repeat)],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Benchmark {name} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _environment() -> dict:
+    import numpy as np
+    import pandas as pd
+
+    from src.jit_kernel import numba
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "numba": numba.__version__ if numba is not None else None,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(patterns: list[str] | None = None, repeat: int = 3) -> dict:
+    """
+    Run the benchmarks whose names match any of patterns (fnmatch; all by
+    default) and return {"environment": ..., "results": {name: result}}.
+    """
+    from benchmarks.cases import CASES
+
+    names = [n for n in CASES if not patterns or any(fnmatch.fnmatch(n, p) for p in patterns)]
+    if not names:
+        raise SystemExit(f"No benchmark matches {patterns}; available: {', '.join(CASES)}")
+
+    results = {}
+    for name in names:
+        result = _run_case_in_subprocess(name, repeat)
+        results[name] = result
+        rss = result["peak_rss_mb"]
+        print(f"{name:<36} {result['value']:>14,.1f} {result['unit']:<10} peak RSS {rss:,.0f} MB", flush=True)
+    return {"environment": _environment(), "results": results}
+
+
+def save_results(report: dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_baseline(path: str) -> dict:
+    """
+    load_results for the baseline side of a comparison, exiting with a
+    hint instead of a traceback when it has not been saved yet.
+    """
+    if not os.path.exists(path):
+        raise SystemExit(f"no baseline at {path}; run `save` first")
+    return load_results(path)
+
+
+def _separated(base: dict, cur: dict, higher_is_better: bool) -> bool:
+    """
+    True if every sample of cur is worse than every sample of base (single
+    values count as one sample).
+    """
+    base_samples = base.get("samples") or [base["value"]]
+    cur_samples = cur.get("samples") or [cur["value"]]
+    if higher_is_better:
+        return max(cur_samples) < min(base_samples)
+    return min(cur_samples) > max(base_samples)
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """
+    Compare two reports case by case, for the benchmark value and the peak
+    RSS. Returns one row per (case, metric) present in both, with the
+    relative change in the "better" direction (negative = worse).
+
+    A timing counts as a regression when it is worse by more than
+    threshold and its samples do not overlap the baseline's, so a single
+    noisy sample is not enough; peak RSS only needs the threshold.
+
+    Raises SystemExit if a case ran on another engine than in the baseline
+    (a Numba / NumPy difference is not a regression).
+    """
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        if base.get("engine") != cur.get("engine"):
+            raise SystemExit(
+                f"{name} ran on engine {cur.get('engine')!r} but the baseline on {base.get('engine')!r}; "
+                "save a new baseline"
+            )
+        higher_is_better = cur["higher_is_better"]
+        separated = _separated(base, cur, higher_is_better)
+        metrics = [(cur["unit"], base["value"], cur["value"], higher_is_better, separated)]
+        if base.get("peak_rss_mb") and cur.get("peak_rss_mb"):
+            metrics.append(("peak RSS MB", base["peak_rss_mb"], cur["peak_rss_mb"], False, True))
+
+        for unit, old, new, higher_is_better, separated in metrics:
+            change = (new - old) / old
+            if not higher_is_better:
+                change = -change
+            rows.append(
+                {
+                    "case": name,
+                    "metric": unit,
+                    "baseline": old,
+                    "current": new,
+                    "change": change,
+                    "regression": change < -threshold and separated,
+                }
+            )
+    return rows
+
+
+def print_comparison(rows: list[dict], threshold: float) -> int:
+    """
+    Print the comparison table; returns the number of regressions.
+    """
+    print(f"{'case':<36} {'metric':<12} {'baseline':>14} {'current':>14} {'change':>8}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['case']:<36} {row['metric']:<12} {row['baseline']:>14,.2f} "
+            f"{row['current']:>14,.2f} {row['change']:>+8.1%}{flag}"
+        )
+    n_regressions = sum(row["regression"] for row in rows)
+    print(f"\n{n_regressions} regression(s) beyond {threshold:.0%}")
+    return n_regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmarks of the prediction and simulation hot paths.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run benchmarks and save the results as JSON")
+    run.add_argument("cases", nargs="*", help="benchmark name patterns (default: all)")
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--output", default=RESULTS_PATH)
+    run.add_argument("--save-baseline", action="store_true", help=f"write the results to {BASELINE_PATH}")
+    run.add_argument("--compare", metavar="BASELINE", help="compare the results with a baseline file")
+    run.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    save = sub.add_parser("save", help=f"run benchmarks and write the results to {BASELINE_PATH}")
+    save.add_argument("cases", nargs="*", help="benchmark name patterns (default: all)")
+    save.add_argument("--repeat", type=int, default=3)
+
+    compare = sub.add_parser("compare", help="compare two result files; exit status 1 on regressions")
+    compare.add_argument("current", nargs="?", default=RESULTS_PATH)
+    compare.add_argument("--baseline", default=BASELINE_PATH)
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    sub.add_parser("list", help="list the benchmarks")
+
+    case = sub.add_parser("case", help=argparse.SUPPRESS)
+    case.add_argument("name")
+    case.add_argument("--repeat", type=int, default=3)
+
+    args = parser.parse_args()
+
+    if args.command == "case":
+        print(json.dumps(run_case(args.name, args.repeat)))
+    elif args.command == "list":
+        from benchmarks.cases import CASES
+
+        for name, bench in CASES.items():
+            print(f"{name:<36} {bench.__doc__.strip().splitlines()[0]}")
+    elif args.command == "run":
+        # before the benchmarks, not after minutes of them
+        baseline = load_baseline(args.compare) if args.compare else None
+        report = run_benchmarks(args.cases, args.repeat)
+        output = BASELINE_PATH if args.save_baseline else args.output
+        save_results(report, output)
+        print(f"\nSaved benchmark results to {output}")
+        if baseline is not None:
+            rows = compare_results(baseline, report, args.threshold)
+            if print_comparison(rows, args.threshold):
+                sys.exit(1)
+    elif args.command == "save":
+        save_results(run_benchmarks(args.cases, args.repeat), BASELINE_PATH)
+        print(f"\nSaved the baseline to {BASELINE_PATH}")
+    else:
+        rows = compare_results(load_baseline(args.baseline), load_results(args.current), args.threshold)
+        if print_comparison(rows, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+# scripts/build_pair_table.py
+
+import os
+import sys
+
+# Ensure project root is on path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.pair_table import build_pair_table, load_pair_table
+
+
+def main():
+    out_path = build_pair_table()
+    print(f"Saved all-pairs probability table to {out_path}")
+
+    table = load_pair_table()
+    print(f"{len(table.teams)} teams, shape {table.table.shape}")
+    print("Argentina vs France (neutral):", table.lookup("Argentina", "France", neutral=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# scripts/check_group_engine.py
+
+import os
+import sys
+import numpy as np
+
+# Ensure project root is on path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src import simulation
+from src.reference_simulation import simulate_group_stage as simulate_group_stage_reference
+
+PROB_COLUMNS = ["prob_1st", "prob_2nd", "prob_3rd", "prob_4th", "prob_advance"]
+
+
+def main(n_reference: int = 2_000, n_vectorized: int = 200_000, max_z: float = 5.0):
+    """
+    Statistical equivalence check: the vectorized (NumPy) group-stage engine
+    and the reference loop should agree on every probability up to Monte
+    Carlo noise. The Numba kernel is checked by scripts/check_jit_engine.py.
+    """
+    ref = simulate_group_stage_reference(n_sim=n_reference, random_seed=1)
+    # The reference ranks level teams by overall GD, GF, then name
+    vec = simulation.simulate_group_stage(
+        n_sim=n_vectorized, random_seed=2, tiebreakers="basic", engine="numpy"
+    )
+
+    ref = ref.set_index("team").sort_index()
+    vec = vec.set_index("team").sort_index()
+
+    worst = 0.0
+    for col in PROB_COLUMNS:
+        p_ref = ref[col].to_numpy()
+        p_vec = vec[col].to_numpy()
+        p = (p_ref * n_reference + p_vec * n_vectorized) / (n_reference + n_vectorized)
+        se = np.sqrt(p * (1 - p) * (1 / n_reference + 1 / n_vectorized))
+        z = np.abs(p_ref - p_vec) / np.where(se > 0, se, np.inf)
+        worst = max(worst, float(z.max()))
+        print(f"{col:<14} max |diff| = {np.abs(p_ref - p_vec).max():.4f}   max z = {z.max():.2f}")
+
+    if worst > max_z:
+        raise SystemExit(f"Engines disagree: max z-score {worst:.2f} > {max_z}")
+    print(f"\nOK: engines agree (max z-score {worst:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# scripts/check_jit_engine.py
+
+import os
+import sys
+import numpy as np
+
+# Ensure project root is on path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.fixtures_wc2026 import load_group_stage_fixtures
+from src.jit_kernel import HAVE_NUMBA
+from src.live_results import empty_results, record_result
+from src.simulation import simulate_full_tournament
+from src.tournament_kernel import TOURNAMENT_PROB_COLUMNS
+
+
+def _tied_group_results(group: str = "A"):
+    """
+    Every match of `group` recorded as 0-0: a finished group whose teams
+    are only separated by the drawing of lots.
+    """
+    fixtures = load_group_stage_fixtures()
+    results = empty_results()
+    for _, match in fixtures[fixtures["group"] == group].iterrows():
+        results = record_result(results, match["home_team"], match["away_team"], 0, 0)
+    return results
+
+
+def _compare_engines(n_sim: int, results=None) -> float:
+    """
+    Run both engines and print the per-column agreement; returns the worst
+    z-score.
+    """
+    dfs = {
+        engine: simulate_full_tournament(n_sim=n_sim, random_seed=7, results=results, engine=engine)
+        .set_index("team")
+        .sort_index()
+        for engine in ("numpy", "numba")
+    }
+    ref, jit = dfs["numpy"], dfs["numba"]
+
+    worst = 0.0
+    for col in ("exp_points", "exp_gd", "exp_gf", *TOURNAMENT_PROB_COLUMNS):
+        # standard errors from the 95% intervals of both runs
+        se = np.hypot(ref[f"{col}_hi"] - ref[f"{col}_lo"], jit[f"{col}_hi"] - jit[f"{col}_lo"]) / (2 * 1.96)
+        diff = np.abs(ref[col] - jit[col]).to_numpy()
+        z = diff / np.where(se > 0, se, np.inf)
+        worst = max(worst, float(z.max()))
+        print(f"{col:<14} max |diff| = {diff.max():.4f}   max z = {z.max():.2f}")
+    return worst
+
+
+def main(n_sim: int = 200_000, max_z: float = 5.0):
+    """
+    Statistical equivalence check: the Numba tournament kernel and the
+    NumPy engine should agree on every summary column up to Monte Carlo
+    noise (they draw different random streams), before the tournament
+    and with a finished group whose order comes down to the drawing of
+    lots (drawn per simulation, so each of its teams finishes in each
+    position a quarter of the time).
+    """
+    if not HAVE_NUMBA:
+        raise SystemExit("numba is not installed; nothing to check")
+
+    print("Before the tournament")
+    worst = _compare_engines(n_sim)
+
+    print("\nGroup A finished, every match 0-0")
+    results = _tied_group_results()
+    worst = max(worst, _compare_engines(n_sim, results))
+    tied_teams = set(results["home_team"]) | set(results["away_team"])
+    n_tied = n_sim // 10
+    for engine in ("numpy", "numba"):
+        df = simulate_full_tournament(n_sim=n_tied, random_seed=7, results=results, engine=engine)
+        positions = df[df["team"].isin(tied_teams)][["prob_1st", "prob_2nd", "prob_3rd", "prob_4th"]].to_numpy()
+        # binomial standard error of a 1/4 probability
+        z = np.abs(positions - 0.25) / np.sqrt(0.25 * 0.75 / n_tied)
+        worst = max(worst, float(z.max()))
+        print(f"{engine:<6} tied group positions: max |p - 0.25| = {np.abs(positions - 0.25).max():.4f}")
+
+    if worst > max_z:
+        raise SystemExit(f"Engines disagree: max z-score {worst:.2f} > {max_z}")
+    print(f"\nOK: engines agree (max z-score {worst:.2f})")
+
+
+if __name__ == "__main__":
+    main()
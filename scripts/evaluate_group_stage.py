@@ -10,7 +10,7 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
 from src.fixtures_wc2026 import load_group_stage_fixtures
-from src.match_prediction import match_outcome_probabilities
+from src.match_prediction import match_outcome_probabilities_batch
 from src.poisson_model import load_processed_matches, extract_team_parameters, fit_poisson_model
 
 
@@ -30,28 +30,20 @@ def main():
     if missing:
         raise ValueError(f"The following teams are not in the model parameters: {missing}")
 
-    rows = []
-    for _, row in fixtures.iterrows():
-        home = row["home_team"]
-        away = row["away_team"]
-        neutral = bool(row.get("neutral", True))
-
-        probs = match_outcome_probabilities(home, away, neutral=neutral)
-        rows.append(
-            {
-                "date": row["date"],
-                "group": row["group"],
-                "home_team": home,
-                "away_team": away,
-                "lambda_home": probs["lambda_home"],
-                "lambda_away": probs["lambda_away"],
-                "p_home_win": probs["p_home_win"],
-                "p_draw": probs["p_draw"],
-                "p_away_win": probs["p_away_win"],
-            }
-        )
-
-    df_probs = pd.DataFrame(rows)
+    neutral = fixtures["neutral"].astype(bool) if "neutral" in fixtures else True
+    probs = match_outcome_probabilities_batch(
+        fixtures["home_team"],
+        fixtures["away_team"],
+        neutral=neutral,
+    )
+
+    df_probs = pd.concat(
+        [
+            fixtures[["date", "group", "home_team", "away_team"]].reset_index(drop=True),
+            probs[["lambda_home", "lambda_away", "p_home_win", "p_draw", "p_away_win"]],
+        ],
+        axis=1,
+    )
     print(df_probs.head())
 
     # Save for analysis / plotting
@@ -0,0 +1,49 @@
+# scripts/query_outcomes.py
+
+import os
+import sys
+import time
+
+# Ensure project root is on path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.outcome_query import OutcomeQuery
+from src.outcome_store import OUTCOME_STORE_DIR, load_outcome_store
+from src.simulation import simulate_full_tournament
+
+
+def main():
+    if not os.path.exists(os.path.join(OUTCOME_STORE_DIR, "meta.json")):
+        print(f"No stored run in {OUTCOME_STORE_DIR}, simulating 1,000,000 tournaments...")
+        simulate_full_tournament(n_sim=1_000_000, random_seed=123, store=OUTCOME_STORE_DIR)
+
+    q = OutcomeQuery(load_outcome_store())
+    print(f"Stored run: {q.n_sim:,} tournaments\n")
+
+    start = time.perf_counter()
+    queries = {
+        "P(Brazil and Argentina both reach the SF)": q.prob(
+            q.reaches("Brazil", "SF") & q.reaches("Argentina", "SF")
+        ),
+        "P(Spain reaches the QF | Spain 2nd in group)": q.prob(
+            q.reaches("Spain", "QF"), given=q.position("Spain", 2)
+        ),
+        "P(Spain reaches the QF | Spain wins group)": q.prob(
+            q.reaches("Spain", "QF"), given=q.group_winner("Spain")
+        ),
+        "P(final is Brazil vs Spain)": q.prob(q.final("Brazil", "Spain")),
+    }
+    elapsed = time.perf_counter() - start
+
+    for name, result in queries.items():
+        print(f"{name:<48} {result.prob:.4f} ± {result.se:.4f}  (n = {result.n:,})")
+    print(f"\n{len(queries)} queries in {elapsed * 1e3:.1f} ms\n")
+
+    print("Most likely finals:")
+    print(q.final_distribution(top=10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
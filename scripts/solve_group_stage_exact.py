@@ -0,0 +1,37 @@
+# scripts/solve_group_stage_exact.py
+
+import os
+import sys
+import time
+
+# Ensure project root is on path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.exact_group import exact_group_stage
+
+
+def main():
+    start = time.perf_counter()
+    df_summary, df_third = exact_group_stage(tail_tol=1e-5, prune_tol=1e-5)
+    elapsed = time.perf_counter() - start
+
+    df_sorted = df_summary.sort_values(
+        ["group", "prob_advance", "exp_points"],
+        ascending=[True, False, False],
+    )
+    print(df_sorted.head(24))
+    print(f"\nSolved 12 groups in {elapsed:.1f}s, max error bound {df_summary['error_bound'].max():.1e}")
+
+    out_dir = os.path.join(PROJECT_ROOT, "data", "processed")
+    summary_path = os.path.join(out_dir, "wc2026_group_stage_exact_summary.csv")
+    third_path = os.path.join(out_dir, "wc2026_group_stage_third_place_distribution.csv")
+    df_sorted.to_csv(summary_path, index=False)
+    df_third.to_csv(third_path, index=False)
+    print(f"Saved exact summary to {summary_path}")
+    print(f"Saved third-place distribution to {third_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# scripts/update_live_forecast.py
+
+import argparse
+import os
+import sys
+import time
+
+# Ensure project root is on path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.jit_kernel import ENGINES, resolve_engine
+from src.live_results import RESULTS_PATH, load_results, record_result, save_results
+from src.simulation import simulate_full_tournament
+
+# Simulations per refresh: about a second on either engine (the NumPy
+# kernels take about twice as long per simulation)
+DEFAULT_N_SIM = {"numba": 20_000, "numpy": 10_000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the tournament forecast after a match.")
+    parser.add_argument("--record", nargs=4, metavar=("HOME", "AWAY", "HOME_GOALS", "AWAY_GOALS"))
+    parser.add_argument("--stage", default="group", help='"group" or the knockout round (e.g. R32)')
+    parser.add_argument("--winner", help="penalty winner of a drawn knockout tie")
+    parser.add_argument("--n-sim", type=int, default=None, help="default: 20,000 with numba, 10,000 with numpy")
+    parser.add_argument("--engine", choices=ENGINES, default="auto", help="default: numba if installed")
+    args = parser.parse_args()
+    n_sim = args.n_sim or DEFAULT_N_SIM[resolve_engine(args.engine)]
+
+    results = load_results()
+    if args.record:
+        home, away, home_goals, away_goals = args.record
+        results = record_result(results, home, away, int(home_goals), int(away_goals), args.stage, args.winner)
+        save_results(results)
+        print(f"Recorded {home} {home_goals}-{away_goals} {away} in {RESULTS_PATH}")
+
+    start = time.perf_counter()
+    df = simulate_full_tournament(
+        n_sim=n_sim,
+        random_seed=123,
+        chunk_size=n_sim,
+        knockout="exact",
+        results=results,
+        engine=args.engine,
+    )
+    elapsed = time.perf_counter() - start
+
+    print(df.sort_values("prob_W", ascending=False)[["team", "group", "prob_qual", "prob_W"]].head(20))
+    print(f"\n{len(results)} results played, forecast refreshed in {elapsed:.2f}s")
+
+    out_path = os.path.join(PROJECT_ROOT, "data", "processed", "wc2026_live_forecast_summary.csv")
+    df.to_csv(out_path, index=False)
+    print(f"Saved live forecast to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+# src/bracket_wc2026.py
+
+import csv
+import hashlib
+import os
+import warnings
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import combinations
+
+import numpy as np
+
+from .ranking import teams_in_position
+
+# Round-of-32 matches of the 2026 schedule: (match number, slot, slot).
+# "1E" = winner of group E, "2A" = runner-up of group A, "3ABCDF" = a
+# third-placed team from one of groups A, B, C, D, F (see compile_bracket).
+R32_MATCHES = (
+    (73, "2A", "2B"),
+    (74, "1E", "3ABCDF"),
+    (75, "1F", "2C"),
+    (76, "1C", "2F"),
+    (77, "1I", "3CDFGH"),
+    (78, "2E", "2I"),
+    (79, "1A", "3CEFHI"),
+    (80, "1L", "3EHIJK"),
+    (81, "1D", "3BEFIJ"),
+    (82, "1G", "3AEHIJ"),
+    (83, "2K", "2L"),
+    (84, "1H", "2J"),
+    (85, "1B", "3EFGIJ"),
+    (86, "1J", "2H"),
+    (87, "1K", "3DEIJL"),
+    (88, "2D", "2G"),
+)
+
+# Round-of-32 matches in bracket order: the winners of consecutive pairs
+# meet in the Round of 16 (89 = W74 v W77, 90 = W73 v W75, ...), and so on
+# up to the semi-finals 101 (74 .. 82) and 102 (76 .. 87).
+BRACKET_ORDER = (74, 77, 73, 75, 83, 84, 81, 82, 76, 78, 79, 80, 86, 88, 85, 87)
+
+N_BEST_THIRDS = 8
+
+# FIFA's allocation of the qualified thirds (the 495-row table of the
+# regulations): a "groups" column with the eight groups whose thirds
+# qualified ("ABCDEFGH"), then one column per host slot ("1E", "1I", ...)
+# with the group of the third it meets. Not bundled yet: without the file
+# the thirds are allocated by the _allocate_thirds fallback, and the
+# simulators warn (ThirdPlaceFallbackWarning).
+THIRD_PLACE_TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "fixtures", "wc2026_third_place_table.csv"
+)
+
+
+class ThirdPlaceFallbackWarning(UserWarning):
+    """
+    The bracket uses the _allocate_thirds fallback instead of FIFA's
+    third-place table, so its Round-of-32 pairings are not the official
+    ones. Turn it into an error with
+    warnings.simplefilter("error", ThirdPlaceFallbackWarning).
+    """
+
+
+@dataclass
+class BracketPlan:
+    """
+    The 2026 bracket compiled against a list of group labels.
+
+    slot_source: (32,) column of each bracket slot in the (n_sim, 32)
+        candidates array [group winners | runners-up | allocated thirds],
+        built by place_in_bracket.
+    third_table: (2^n_groups, 8) group index of the third-placed team that
+        meets each third-place host (THIRD_PLACE_HOSTS order), indexed by
+        the bitmask of groups whose thirds qualified; -1 on the rows of
+        masks that do not have exactly eight bits set.
+    fifa_table: whether third_table is FIFA's (THIRD_PLACE_TABLE_PATH) or
+        the _allocate_thirds fallback.
+    table_sha256: SHA-256 of the THIRD_PLACE_TABLE_PATH file it was read
+        from, None for the stand-in.
+    """
+
+    slot_source: np.ndarray
+    third_table: np.ndarray
+    fifa_table: bool
+    table_sha256: str | None = None
+
+    @property
+    def allocation(self) -> dict:
+        """
+        Which third-place allocation the plan uses, as recorded next to
+        outputs that depend on it (src.outcome_store).
+        """
+        return {"fifa_table": self.fifa_table, "third_place_table_sha256": self.table_sha256}
+
+
+def _third_place_hosts() -> list[tuple[str, str]]:
+    """
+    (host group winner slot, allowed third-place groups) in bracket order.
+    """
+    hosts = []
+    for match in BRACKET_ORDER:
+        _, slot_a, slot_b = next(m for m in R32_MATCHES if m[0] == match)
+        if slot_b.startswith("3"):
+            hosts.append((slot_a, slot_b[1:]))
+    return hosts
+
+
+THIRD_PLACE_HOSTS = tuple(_third_place_hosts())
+
+
+def _allocate_thirds(qualified: tuple[str, ...]) -> tuple[str, ...] | None:
+    """
+    Assign the eight qualified third-place groups to the hosts: the first
+    valid matching in host order, each host taking the alphabetically
+    first group that still leaves a complete matching for the rest. Only a
+    fallback while FIFA's table is missing: it often allocates differently.
+    """
+    assignment = []
+
+    def search(h: int, remaining: frozenset) -> bool:
+        if h == len(THIRD_PLACE_HOSTS):
+            return True
+        for group in sorted(remaining):
+            if group in THIRD_PLACE_HOSTS[h][1]:
+                assignment.append(group)
+                if search(h + 1, remaining - {group}):
+                    return True
+                assignment.pop()
+        return False
+
+    return tuple(assignment) if search(0, frozenset(qualified)) else None
+
+
+def load_third_place_table(path: str = THIRD_PLACE_TABLE_PATH) -> dict | None:
+    """
+    FIFA's third-place allocation from path (see THIRD_PLACE_TABLE_PATH):
+    {qualified groups: group per host in THIRD_PLACE_HOSTS order}, or None
+    if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["groups"]: tuple(row[host] for host, _ in THIRD_PLACE_HOSTS) for row in csv.DictReader(f)}
+
+
+@lru_cache(maxsize=None)
+def compile_bracket(groups: tuple[str, ...]) -> BracketPlan:
+    """
+    Precompute the slot layout and the C(12, 8) = 495-row third-place
+    allocation table for the given group labels (CompiledFixtures.groups):
+    FIFA's if THIRD_PLACE_TABLE_PATH exists, _allocate_thirds otherwise.
+    """
+    group_index = {g: i for i, g in enumerate(groups)}
+    n_groups = len(groups)
+    fifa_table = load_third_place_table()
+    table_sha256 = None
+    if fifa_table is not None:
+        with open(THIRD_PLACE_TABLE_PATH, "rb") as f:
+            table_sha256 = hashlib.sha256(f.read()).hexdigest()
+
+    third_table = np.full((1 << n_groups, N_BEST_THIRDS), -1, dtype=np.int8)
+    for qualified in combinations(groups, N_BEST_THIRDS):
+        if fifa_table is None:
+            allocation = _allocate_thirds(qualified)
+        else:
+            allocation = fifa_table.get("".join(qualified))
+            if allocation is not None and (
+                sorted(allocation) != list(qualified)
+                or any(g not in allowed for g, (_, allowed) in zip(allocation, THIRD_PLACE_HOSTS))
+            ):
+                raise ValueError(f"Invalid third-place allocation {allocation} in {THIRD_PLACE_TABLE_PATH}")
+        if allocation is None:
+            raise ValueError(f"No valid third-place allocation for groups {''.join(qualified)}")
+        mask = sum(1 << group_index[g] for g in qualified)
+        third_table[mask] = [group_index[g] for g in allocation]
+
+    # Candidate columns: winners 0..n_groups-1, runners-up n_groups.., thirds by host
+    host_column = {host: 2 * n_groups + h for h, (host, _) in enumerate(THIRD_PLACE_HOSTS)}
+
+    def source(slot: str, opponent: str) -> int:
+        if slot.startswith("3"):
+            return host_column[opponent]
+        return (int(slot[0]) - 1) * n_groups + group_index[slot[1]]
+
+    slot_source = []
+    for match in BRACKET_ORDER:
+        _, slot_a, slot_b = next(m for m in R32_MATCHES if m[0] == match)
+        slot_source += [source(slot_a, slot_b), source(slot_b, slot_a)]
+
+    return BracketPlan(
+        slot_source=np.array(slot_source, dtype=np.intp),
+        third_table=third_table,
+        fifa_table=fifa_table is not None,
+        table_sha256=table_sha256,
+    )
+
+
+def check_third_place_table(groups) -> bool:
+    """
+    Whether the bracket for these group labels uses FIFA's third-place
+    table; warns with ThirdPlaceFallbackWarning if it uses the fallback.
+    """
+    if compile_bracket(tuple(groups)).fifa_table:
+        return True
+    warnings.warn(
+        f"{THIRD_PLACE_TABLE_PATH} not found: the qualified thirds are placed by a fallback allocation, "
+        "not FIFA's table, so Round-of-32 pairings and knockout probabilities are not the official ones",
+        ThirdPlaceFallbackWarning,
+        stacklevel=3,
+    )
+    return False
+
+
+def _place_qualifiers(groups, group_members, positions, third_teams, mask) -> np.ndarray:
+    """
+    (n_sim, 32) team indices in bracket order, given the (n_sim,) bitmask
+    of the groups whose third-placed team qualified.
+    """
+    plan = compile_bracket(tuple(groups))
+    rows = np.arange(len(positions))[:, None]
+    allocated = third_teams[rows, plan.third_table[mask]]      # (n_sim, 8) by host
+    candidates = np.hstack(
+        [
+            teams_in_position(positions, group_members, 1),
+            teams_in_position(positions, group_members, 2),
+            allocated,
+        ]
+    )
+    return candidates[:, plan.slot_source]
+
+
+def place_in_bracket(
+    compiled,
+    positions: np.ndarray,
+    third_teams: np.ndarray,
+    best_thirds: np.ndarray,
+) -> np.ndarray:
+    """
+    Place the qualifiers of a batch of simulations in the 2026 bracket
+    (see compile_bracket for the allocation of the thirds).
+
+    positions: (n_sim, n_teams) finishing positions (rank_groups).
+    third_teams, best_thirds: as returned by rank_third_placed.
+
+    The groups of the qualifying thirds form a bitmask that selects one row
+    of the allocation table, so the placement is a few gathers per batch.
+    Returns (n_sim, 32) team indices in bracket order (as expected by
+    simulate_knockout_batch).
+    """
+    mask = np.bitwise_or.reduce(1 << compiled.team_group[best_thirds], axis=1)
+    return _place_qualifiers(compiled.groups, compiled.group_members, positions, third_teams, mask)
+
+
+def bracket_from_thirds_mask(
+    groups: list[str],
+    group_members: np.ndarray,
+    positions: np.ndarray,
+    mask: np.ndarray,
+) -> np.ndarray:
+    """
+    place_in_bracket from the finishing positions and the (n_sim,) bitmask
+    of the groups whose third-placed team qualified (as stored by
+    src.outcome_store instead of the bracket itself).
+    """
+    third_teams = teams_in_position(positions, group_members, 3)
+    return _place_qualifiers(groups, group_members, positions, third_teams, mask)
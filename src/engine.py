@@ -0,0 +1,132 @@
+# src/engine.py
+
+import json
+import os
+from contextlib import nullcontext
+
+import pandas as pd
+
+from .bracket_wc2026 import THIRD_PLACE_TABLE_PATH
+from .config import DATA_PROCESSED_DIR
+from .fixtures_wc2026 import FIXTURES_DIR
+from .instrumentation import instrument, instrumentation_from_env
+from .jit_kernel import resolve_engine
+from .match_prediction import TEAM_PARAMS_PATH
+from .pair_table import file_sha256
+from .simulation import CHUNK_SIZE, simulate_tournament_summaries
+
+GROUP_SUMMARY_PATH = os.path.join(DATA_PROCESSED_DIR, "wc2026_group_stage_simulation_summary.csv")
+TOURNAMENT_SUMMARY_PATH = os.path.join(DATA_PROCESSED_DIR, "wc2026_full_tournament_simulation_summary.csv")
+# Settings and input hashes of the run behind the two summary CSVs
+RUN_MANIFEST_PATH = os.path.join(DATA_PROCESSED_DIR, "wc2026_simulation_run.json")
+# Written by instrumented runs (see run_simulation)
+TIMING_REPORT_PATH = os.path.join(DATA_PROCESSED_DIR, "wc2026_simulation_timings.json")
+PROFILE_PATH = os.path.join(DATA_PROCESSED_DIR, "wc2026_simulation.pstats")
+
+FIXTURES_PATH = os.path.join(FIXTURES_DIR, "wc2026_group_stage.csv")
+
+DEFAULT_N_SIM = 10_000
+DEFAULT_SEED = 123
+
+
+def _run_manifest(n_sim: int, random_seed: int, chunk_size: int, tiebreakers: str, engine: str) -> dict:
+    return {
+        "n_sim": n_sim,
+        "random_seed": random_seed,
+        "chunk_size": chunk_size,
+        "tiebreakers": tiebreakers,
+        "engine": engine,
+        "params_sha256": file_sha256(TEAM_PARAMS_PATH),
+        "fixtures_sha256": file_sha256(FIXTURES_PATH),
+        # None: the thirds were placed by the fallback allocation, not FIFA's table
+        "third_place_table_sha256": (
+            file_sha256(THIRD_PLACE_TABLE_PATH) if os.path.exists(THIRD_PLACE_TABLE_PATH) else None
+        ),
+    }
+
+
+def _is_current(manifest: dict) -> bool:
+    """
+    True if both summary CSVs exist and were written by a run with the same
+    settings on the same params and fixtures files.
+    """
+    paths = (GROUP_SUMMARY_PATH, TOURNAMENT_SUMMARY_PATH, RUN_MANIFEST_PATH)
+    if not all(os.path.exists(path) for path in paths):
+        return False
+    with open(RUN_MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f) == manifest
+
+
+def sort_group_summary(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(["group", "prob_advance", "exp_points"], ascending=[True, False, False])
+
+
+def sort_tournament_summary(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(["prob_W", "prob_F", "prob_SF", "prob_QF"], ascending=False)
+
+
+def run_simulation(
+    n_sim: int = DEFAULT_N_SIM,
+    random_seed: int = DEFAULT_SEED,
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    force: bool = False,
+    tiebreakers: str = "fifa",
+    engine: str = "auto",
+    instrumented: bool | None = None,
+    profile: bool | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Simulate the tournament once and write both
+    wc2026_group_stage_simulation_summary.csv and
+    wc2026_full_tournament_simulation_summary.csv from the same draws.
+
+    The run's settings and the hashes of the params and fixtures files are
+    kept in wc2026_simulation_run.json; if they match and both CSVs exist,
+    the CSVs are read back instead of simulating again (unless force).
+    So running the group-stage and full-tournament front-ends one after
+    the other costs one simulation.
+
+    engine: see simulate_full_tournament; the manifest records the engine
+    that ran, so "auto" reruns when Numba is installed or removed.
+
+    instrumented: record per-stage wall times and call counts
+    (src.instrumentation) and write them to wc2026_simulation_timings.json;
+    profile: also write a cProfile dump to wc2026_simulation.pstats. Both
+    default to the WC2026_INSTRUMENT environment variable ("1", or
+    "profile" for both). Instrumented runs always simulate.
+
+    Returns (group_summary, tournament_summary), sorted as in the CSVs.
+    """
+    env_instrumented, env_profile = instrumentation_from_env()
+    if instrumented is None:
+        instrumented = env_instrumented
+    if profile is None:
+        profile = env_profile
+    instrumented = instrumented or profile
+
+    engine = resolve_engine(engine)
+    manifest = _run_manifest(n_sim, random_seed, chunk_size, tiebreakers, engine)
+    if not force and not instrumented and _is_current(manifest):
+        return pd.read_csv(GROUP_SUMMARY_PATH), pd.read_csv(TOURNAMENT_SUMMARY_PATH)
+
+    recording = (
+        instrument(TIMING_REPORT_PATH, PROFILE_PATH if profile else None) if instrumented else nullcontext()
+    )
+    with recording:
+        group_df, tournament_df = simulate_tournament_summaries(
+            n_sim=n_sim,
+            random_seed=random_seed,
+            workers=workers,
+            chunk_size=chunk_size,
+            tiebreakers=tiebreakers,
+            engine=engine,
+        )
+    group_df = sort_group_summary(group_df)
+    tournament_df = sort_tournament_summary(tournament_df)
+
+    group_df.to_csv(GROUP_SUMMARY_PATH, index=False)
+    tournament_df.to_csv(TOURNAMENT_SUMMARY_PATH, index=False)
+    with open(RUN_MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return group_df, tournament_df
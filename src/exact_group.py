@@ -0,0 +1,761 @@
+# src/exact_group.py
+
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy.stats import skellam
+
+from .fixtures_wc2026 import load_group_stage_fixtures
+from .group_simulation import CompiledFixtures, compile_fixtures
+from .match_prediction import _scoreline_matrices, get_compiled_team_params, goals_for_tail_tolerance
+from .ranking import _beaten_by, _break_ties, composite_key
+
+# Match results from the home side's point of view
+HOME_WIN, DRAW, AWAY_WIN = 0, 1, 2
+
+# Where a rival finishes relative to a team
+BELOW, LEVEL, ABOVE = 0, 1, 2
+
+
+@dataclass
+class GroupSolution:
+    """
+    Exact finishing-position distribution of one group.
+
+    Probabilities are computed over truncated scorelines and may undershoot
+    the true values by at most error_bound (never overshoot).
+    """
+
+    group: str
+    teams: list[str]
+    position_probs: np.ndarray   # (4, 4): [team, position - 1]
+    exp_points: np.ndarray       # (4,) exact, untruncated
+    exp_gd: np.ndarray           # (4,)
+    exp_gf: np.ndarray           # (4,)
+    third_place: pd.DataFrame    # points, gd, gf, prob of the third-placed team
+    error_bound: float
+
+
+def _prune(probs: np.ndarray, budget: float) -> np.ndarray:
+    """
+    Mask keeping all but the least likely entries whose total mass is at
+    most budget.
+    """
+    if budget <= 0:
+        return np.ones(len(probs), dtype=bool)
+    order = np.argsort(probs)
+    dropped = np.cumsum(probs[order]) <= budget
+    keep = np.ones(len(probs), dtype=bool)
+    keep[order[dropped]] = False
+    return keep
+
+
+def _outer_sum(index_a, probs_a, index_b, probs_b, length: int) -> np.ndarray:
+    """
+    Dense distribution of the sum of two independent integer variables,
+    each given by its (index, probability) pairs.
+    """
+    return np.bincount(
+        (index_a[:, None] + index_b[None, :]).ravel(),
+        (probs_a[:, None] * probs_b[None, :]).ravel(),
+        minlength=length,
+    )
+
+
+def _convolve(pmf_a: np.ndarray, pmf_b: np.ndarray) -> np.ndarray:
+    """
+    Dense distribution of the sum of two independent variables given as
+    (mostly zero) dense arrays.
+    """
+    a, b = np.flatnonzero(pmf_a), np.flatnonzero(pmf_b)
+    return _outer_sum(a, pmf_a[a], b, pmf_b[b], len(pmf_a) + len(pmf_b) - 1)
+
+
+def _prune_product(probs_a: np.ndarray, probs_b: np.ndarray, budget: float):
+    """
+    Cells (i, j) of the outer product of two probability vectors kept when
+    the least likely are dropped, up to budget of mass: those at or above a
+    threshold found by bisection (all when budget <= 0).
+    """
+    if budget <= 0:
+        return np.repeat(np.arange(len(probs_a)), len(probs_b)), np.tile(np.arange(len(probs_b)), len(probs_a))
+    order = np.argsort(-probs_a)
+    ordered = probs_a[order]
+    tail = np.append(np.cumsum(ordered[::-1])[::-1], 0.0)            # mass from the i-th on
+
+    def counts(threshold):
+        return np.searchsorted(-ordered, -threshold / probs_b, side="right")
+
+    # geometric bisection between the smallest and the largest product
+    low, high = ordered[-1] * probs_b.min() / 2, ordered[0] * probs_b.max()
+    for _ in range(14):
+        middle = np.sqrt(low * high)
+        if probs_b @ tail[counts(middle)] <= budget:
+            low = middle
+        else:
+            high = middle
+    count = counts(low)
+    i = order[np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)]
+    return i, np.repeat(np.arange(len(probs_b)), count)
+
+
+class _GroupModel:
+    """
+    Truncated scoreline distributions of one group's six matches, split by result.
+
+    A team's (GD, GF) is folded into one integer key GD * width + GF with
+    width > max GF, so comparing keys compares (GD, GF) lexicographically,
+    and a team's key is the sum of its per-match keys. The distribution of
+    a key summed over n matches is a dense array of length key_length(n),
+    indexed by key + n * shift.
+    """
+
+    def __init__(self, compiled: CompiledFixtures, g: int, tail_tol: float, scoreline_tol: float):
+        self.members = compiled.group_members[g]
+        local = {t: i for i, t in enumerate(self.members)}
+        self.matches = np.flatnonzero(compiled.match_group == g)
+        self.home = np.array([local[t] for t in compiled.home[self.matches]])
+        self.away = np.array([local[t] for t in compiled.away[self.matches]])
+        n_matches = len(self.matches)
+        self.team_matches = np.array(
+            [[m for m in range(n_matches) if t in (self.home[m], self.away[m])] for t in range(4)]
+        )
+        self.match_between = np.full((4, 4), -1)
+        self.match_between[self.home, self.away] = np.arange(n_matches)
+        self.match_between[self.away, self.home] = np.arange(n_matches)
+
+        lambda_home = compiled.lambda_home[self.matches]
+        lambda_away = compiled.lambda_away[self.matches]
+        self.max_goals = int(goals_for_tail_tolerance(lambda_home, lambda_away, tail_tol / 6).max())
+        self.width = 3 * self.max_goals + 1
+        self.shift = self.max_goals * self.width
+        matrices = _scoreline_matrices(lambda_home, lambda_away, self.max_goals)
+
+        goals = np.arange(self.max_goals + 1)
+        h, a = np.meshgrid(goals, goals, indexing="ij")
+        h, a = h.ravel(), a.ravel()
+        results = np.where(h > a, HOME_WIN, np.where(h == a, DRAW, AWAY_WIN))
+
+        # Per (match, result): unnormalised mass, and the conditional
+        # scorelines without the least likely ones (up to scoreline_tol of
+        # the result's mass; kept_mass is what remains)
+        self.result_mass = np.zeros((n_matches, 3))
+        self.kept_mass = np.zeros((n_matches, 3))
+        self.scorelines = {}
+        for m, matrix in enumerate(matrices):
+            probs = matrix.ravel()
+            for r in (HOME_WIN, DRAW, AWAY_WIN):
+                mask = results == r
+                mass = probs[mask].sum()
+                conditional = probs[mask] / mass
+                keep = _prune(conditional, scoreline_tol)
+                self.result_mass[m, r] = mass
+                self.kept_mass[m, r] = conditional[keep].sum()
+                self.scorelines[m, r] = (h[mask][keep], a[mask][keep], conditional[keep])
+
+        self.expected = self._expected_values(lambda_home, lambda_away)
+        self._pmf_cache = {}
+
+    def _expected_values(self, lambda_home, lambda_away):
+        """
+        Exact expected points, GD and GF (no truncation needed).
+        """
+        p_home = skellam.sf(0, lambda_home, lambda_away)
+        p_draw = skellam.pmf(0, lambda_home, lambda_away)
+        p_away = 1.0 - p_home - p_draw
+
+        points, gd, gf = np.zeros(4), np.zeros(4), np.zeros(4)
+        np.add.at(points, self.home, 3 * p_home + p_draw)
+        np.add.at(points, self.away, 3 * p_away + p_draw)
+        np.add.at(gf, self.home, lambda_home)
+        np.add.at(gf, self.away, lambda_away)
+        np.add.at(gd, self.home, lambda_home - lambda_away)
+        np.add.at(gd, self.away, lambda_away - lambda_home)
+        return points, gd, gf
+
+    def key_length(self, n_matches: int) -> int:
+        return 2 * n_matches * self.shift + n_matches * self.max_goals + 1
+
+    def match_keys(self, m: int, result: int, team: int):
+        """
+        Key contributions of match m to `team` and their conditional
+        probabilities given the result.
+        """
+        h, a, probs = self.scorelines[m, result]
+        goals_for, goals_against = (h, a) if self.home[m] == team else (a, h)
+        return (goals_for - goals_against) * self.width + goals_for, probs
+
+    def key_pmf(self, team: int, matches: tuple, results: tuple) -> np.ndarray:
+        """
+        Dense distribution of a team's key summed over the given matches
+        with fixed results.
+        """
+        cache_key = (team, matches, results)
+        if cache_key not in self._pmf_cache:
+            if not matches:
+                pmf = np.ones(1)
+            else:
+                previous = self.key_pmf(team, matches[:-1], results[:-1])
+                keys, probs = self.match_keys(matches[-1], results[-1], team)
+                index = np.flatnonzero(previous)
+                pmf = _outer_sum(index, previous[index], keys + self.shift, probs, self.key_length(len(matches)))
+            self._pmf_cache[cache_key] = pmf
+        return self._pmf_cache[cache_key]
+
+    def points(self, pattern, team: int, opponent: int) -> int:
+        """
+        Points `team` takes from its match against `opponent`.
+        """
+        m = self.match_between[team, opponent]
+        if pattern[m] == DRAW:
+            return 1
+        return 3 * (pattern[m] == (HOME_WIN if self.home[m] == team else AWAY_WIN))
+
+    def decode(self, keys: np.ndarray):
+        """
+        Split keys back into (GD, GF).
+        """
+        gd = np.floor_divide(keys, self.width)
+        return gd, keys - gd * self.width
+
+
+def _enumerate(model: _GroupModel, matches: list, results: list, budget: float):
+    """
+    Every likely combination of the scorelines of some matches with fixed
+    results: (n, len(matches)) home and away goals and their conditional
+    probabilities, and the pruned mass. A quarter of the budget drops each
+    match's least likely scorelines, the rest the least likely combinations
+    (as cells of the outer product of the first and second half's).
+    """
+    lists, full = [], 1.0
+    for m, r in zip(matches, results):
+        h, a, probs = model.scorelines[m, r]
+        keep = _prune(probs, budget / 4 / len(matches))
+        lists.append((h[keep], a[keep], probs[keep]))
+        full *= probs.sum()
+
+    halves = []
+    for part in (lists[: len(lists) // 2], lists[len(lists) // 2 :]):
+        grid = [i.ravel() for i in np.meshgrid(*[np.arange(len(p)) for _, _, p in part], indexing="ij")]
+        halves.append(
+            (
+                [h[i] for (h, _, _), i in zip(part, grid)],
+                [a[i] for (_, a, _), i in zip(part, grid)],
+                np.prod([p[i] for (_, _, p), i in zip(part, grid)], axis=0),
+            )
+        )
+    (home_a, away_a, probs_a), (home_b, away_b, probs_b) = halves
+    i, j = _prune_product(probs_a, probs_b, budget - (full - probs_a.sum() * probs_b.sum()))
+    goals_home = np.stack([g[i] for g in home_a] + [g[j] for g in home_b], axis=1)
+    goals_away = np.stack([g[i] for g in away_a] + [g[j] for g in away_b], axis=1)
+    probs = probs_a[i] * probs_b[j]
+    return goals_home, goals_away, probs, full - probs.sum()
+
+
+def _lots_ranks(above: list, level: list) -> np.ndarray:
+    """
+    Rank distribution (0 = first) of a team among itself and independent
+    rivals, given each rival's probabilities (arrays of any one shape) of
+    finishing above it and level with it; teams still level are ordered by
+    drawing lots. Returns (len(above) + 1, *shape).
+    """
+    n = len(above)
+    # joint distribution of (rivals above, rivals level)
+    dist = np.zeros((n + 1, n + 1) + np.shape(above[0]))
+    dist[0, 0] = 1.0
+    for p_above, p_level in zip(above, level):
+        new = dist * (1.0 - p_above - p_level)
+        new[1:] += dist[:-1] * p_above
+        new[:, 1:] += dist[:, :-1] * p_level
+        dist = new
+
+    spread = np.zeros((n + 1, n + 1, n + 1))
+    for n_above, n_level in itertools.product(range(n + 1), repeat=2):
+        spread[n_above : n_above + n_level + 1, n_above, n_level] = 1.0 / (n_level + 1)
+    return np.tensordot(spread, dist, 2)
+
+
+def _head_to_head_classes(model: _GroupModel, tied: tuple, pattern, budget: float):
+    """
+    Head-to-head order of teams level on points, from the enumerated
+    scorelines of the matches among them.
+
+    Returns, per tied team, (place, level_with, offsets) per class and the
+    pruned mass: place counts the tied teams ahead of it on head-to-head,
+    level_with is a bitmask (over indices into tied) of those still level
+    with it, and offsets are the dense distributions of its key over these
+    matches. Teams left level have the same head-to-head goal difference
+    and goals, i.e. the same offset, so only their other matches can still
+    separate them.
+    """
+    internal = [m for m in range(len(model.matches)) if model.home[m] in tied and model.away[m] in tied]
+    goals_home, goals_away, probs, pruned = _enumerate(model, internal, [pattern[m] for m in internal], budget)
+
+    column = {t: k for k, t in enumerate(tied)}
+    local_home = np.array([column[model.home[m]] for m in internal])
+    local_away = np.array([column[model.away[m]] for m in internal])
+    # index of each team's summed key (len(tied) - 1 matches each)
+    offsets = np.full((len(probs), len(tied)), (len(tied) - 1) * model.shift, dtype=np.int64)
+    for j in range(len(internal)):
+        offsets[:, local_home[j]] += (goals_home[:, j] - goals_away[:, j]) * model.width + goals_home[:, j]
+        offsets[:, local_away[j]] += (goals_away[:, j] - goals_home[:, j]) * model.width + goals_away[:, j]
+
+    if len(tied) == 3:
+        # Three teams level on points took the same points off each other
+        # (a cycle of wins or three draws; otherwise the fourth team could
+        # not even their totals), so the mini-table orders them by key, and
+        # re-applied to two of them it comes down to their match
+        wins = np.zeros_like(offsets)
+        for j, m in enumerate(internal):
+            if pattern[m] != DRAW:
+                winner, loser = (local_home[j], local_away[j])[:: 1 if pattern[m] == HOME_WIN else -1]
+                wins[:, winner] += offsets[:, winner] == offsets[:, loser]
+        levels = _beaten_by(composite_key([offsets, wins]))
+    else:
+        levels = _break_ties(
+            np.zeros(offsets.shape, dtype=np.int64), goals_home, goals_away, local_home, local_away
+        )
+
+    length = model.key_length(len(tied) - 1)
+    n_mates = 1 << len(tied)
+    classes = []
+    for k in range(len(tied)):
+        mates = sum((levels[:, j] == levels[:, k]) << j for j in range(len(tied)) if j != k)
+        code = levels[:, k] * n_mates + mates
+        table = np.bincount(code * length + offsets[:, k], probs, minlength=len(tied) * n_mates * length)
+        table = table.reshape(-1, length)
+        present = np.flatnonzero(table.any(axis=1))
+        classes.append((present // n_mates, present % n_mates, table[present]))
+    return classes, pruned
+
+
+def _rank_level_teams(
+    tied: tuple,
+    classes: list,
+    other_pmfs: list,
+    higher: np.ndarray,
+    weights: np.ndarray,
+    level_points: np.ndarray,
+    position_probs: np.ndarray,
+    third_mass: np.ndarray,
+):
+    """
+    Add the finishing positions of teams level on points (and the
+    third-placed team's key) given their head-to-head classes and the
+    distributions of their keys over their remaining matches, which are
+    independent.
+
+    Several patterns with the same results among the tied teams are done
+    at once: other_pmfs are (n_patterns, length) per team, and higher (the
+    number of teams above them on points), weights and level_points are
+    (n_patterns,).
+    """
+    # only the keys some team can have (sorted, so cumulative sums still work)
+    support = np.flatnonzero(np.any([pmf.any(axis=0) for pmf in other_pmfs], axis=0))
+    h2h_support = np.flatnonzero(np.any([offsets.any(axis=0) for _, _, offsets in classes], axis=0))
+    other_pmfs = [pmf[:, support] for pmf in other_pmfs]
+    survival = [pmf.sum(axis=1, keepdims=True) - np.cumsum(pmf, axis=1) for pmf in other_pmfs]   # P(key > x)
+    n_variants = len(weights)
+    # third-placed team's head-to-head offsets and key over its other
+    # matches, per points: (offsets, keys) row pairs whose convolutions add up
+    thirds = {points: ([], []) for points in np.unique(level_points)}
+    for k, t in enumerate(tied):
+        places, level_with, offsets = classes[k]
+        offsets = offsets[:, h2h_support]
+        mass = offsets.sum(axis=1)
+        for mask in np.unique(level_with):
+            rivals = [j for j in range(len(tied)) if mask >> j & 1]
+            rows = level_with == mask
+            if rivals:
+                ranks = _lots_ranks([survival[j] for j in rivals], [other_pmfs[j] for j in rivals])
+            else:
+                ranks = np.ones((1, 1, 1))
+            pmfs = weights[:, None] * other_pmfs[k] * ranks                   # (rank, variant, key)
+            position = higher[:, None] + places[rows] + np.arange(len(pmfs))[:, None, None]
+            position_probs[t] += np.bincount(
+                position.ravel(), (pmfs.sum(axis=2)[:, :, None] * mass[rows]).ravel(), minlength=7
+            )[:4]
+
+            # third: the rank 2 - higher - place of each class
+            rank = 2 - higher - np.arange(4)[:, None]                          # (place, variant)
+            valid = (rank >= 0) & (rank < len(pmfs))
+            keys = pmfs[rank.clip(0, len(pmfs) - 1), np.arange(n_variants)] * valid[:, :, None]
+            h2h = (places[rows] == np.arange(4)[:, None]) @ offsets[rows]
+            for points, (h2h_rows, key_rows) in thirds.items():
+                h2h_rows.append(h2h)
+                key_rows.append((keys * (level_points == points)[:, None]).sum(axis=1))
+
+    for points, (h2h_rows, key_rows) in thirds.items():
+        h2h, keys = np.concatenate(h2h_rows), np.concatenate(key_rows)
+        a, b = np.flatnonzero(h2h.any(axis=0)), np.flatnonzero(keys.any(axis=0))
+        third_mass[points] += np.bincount(
+            (h2h_support[a, None] + support[b]).ravel(),
+            (h2h[:, a].T @ keys[:, b]).ravel(),
+            minlength=third_mass.shape[1],
+        )
+
+
+def _four_level_ranks(model: _GroupModel, pattern, t: int, rivals: tuple) -> np.ndarray:
+    """
+    (3, 3, 3, 4) rank distribution of team t, when all four teams are level
+    on points with one win, one draw and one loss each, given where each
+    rival finishes on key (BELOW, LEVEL, ABOVE).
+
+    Teams level on key are still level on the head-to-head table of all
+    four, so the criteria are re-applied among them: two teams are split by
+    their match (lots after a draw); three by their points against each
+    other, which always differ here since the fourth team took 0, 1 and 3
+    points off them; four are left to lots.
+    """
+    team_points = [[model.points(pattern, x, y) if x != y else 0 for y in range(4)] for x in range(4)]
+    ranks = np.zeros((3, 3, 3, 4))
+    for relations in itertools.product((BELOW, LEVEL, ABOVE), repeat=3):
+        above = relations.count(ABOVE)
+        level = [t] + [x for x, r in zip(rivals, relations) if r == LEVEL]
+        if len(level) == 1:
+            ranks[relations][above] = 1.0
+        elif len(level) == 2:
+            own = team_points[t][level[1]]
+            if own == 1:
+                ranks[relations][above : above + 2] = 0.5
+            else:
+                ranks[relations][above + (own == 0)] = 1.0
+        elif len(level) == 3:
+            mini = {x: sum(team_points[x][y] for y in level) for x in level}
+            ranks[relations][above + sum(mini[x] > mini[t] for x in level)] = 1.0
+        else:
+            ranks[relations][:] = 0.25
+    return ranks
+
+
+def _threshold_classes(
+    values: np.ndarray, state_part: np.ndarray, own_part: np.ndarray, i: np.ndarray, j: np.ndarray
+) -> np.ndarray:
+    """
+    Class of each threshold state_part[i] + own_part[j] among sorted
+    values: 2n strictly between values n - 1 and n, 2n + 1 equal to value n.
+    """
+    low = state_part.min() + own_part.min()
+    grid = np.arange(low, state_part.max() + own_part.max() + 1)
+    table = np.searchsorted(values, grid, side="left") + np.searchsorted(values, grid, side="right")
+    return table[(state_part - low)[i] + own_part[j]]
+
+
+def _rank_four_level(model: _GroupModel, pattern, budget: float):
+    """
+    Position and third-place key distributions when all four teams finish
+    level on points with one win, one draw and one loss each. The
+    head-to-head table is then the group table, so teams are ordered by key
+    (see _four_level_ranks for ties).
+
+    The scorelines of four matches are enumerated; the remaining two are
+    disjoint (e.g. A-B and C-D). A team's key is then its state offset plus
+    its own match of that pair; the other pair's two teams finish above,
+    level with or below it depending on where the threshold (the team's
+    key less their offsets) falls among their possible keys from their
+    match, so their joint relation is read from a table over those classes.
+
+    Returns (position_probs (4, 4), third-place key distribution, pruned
+    mass), all conditional on the pattern.
+    """
+    n_matches = len(model.matches)
+    disjoint = [
+        (a, b)
+        for a, b in itertools.combinations(range(n_matches), 2)
+        if not {model.home[a], model.away[a]} & {model.home[b], model.away[b]}
+    ]
+    # leave the two matches with the most scorelines out of the enumeration
+    sizes = [len(model.scorelines[m, pattern[m]][2]) for m in range(n_matches)]
+    pair = max(disjoint, key=lambda ab: sizes[ab[0]] * sizes[ab[1]])
+    enumerated = [m for m in range(n_matches) if m not in pair]
+
+    # a quarter of the budget for the states, an eighth for each of the
+    # pair's scorelines and half for the (state, own scoreline) cells
+    goals_home, goals_away, state_probs, pruned = _enumerate(
+        model, enumerated, [pattern[m] for m in enumerated], budget / 4
+    )
+    offsets = np.zeros((len(state_probs), 4), dtype=np.int64)
+    for j, m in enumerate(enumerated):
+        offsets[:, model.home[m]] += (goals_home[:, j] - goals_away[:, j]) * model.width + goals_home[:, j]
+        offsets[:, model.away[m]] += (goals_away[:, j] - goals_home[:, j]) * model.width + goals_away[:, j]
+    columns = offsets.T.copy()
+    scorelines = {}
+    for m in pair:
+        h, a, probs = model.scorelines[m, pattern[m]]
+        keep = _prune(probs, budget / 8)
+        scorelines[m] = (h[keep], a[keep], probs[keep])
+        pruned += probs[~keep].sum()
+
+    position_probs = np.zeros((4, 4))
+    third = np.zeros(model.key_length(3))
+    cells_pruned = 0.0
+    for own, other in (pair, pair[::-1]):
+        # joint relation of the other match's teams u, v to thresholds: a
+        # threshold falls in class 2i (between their i-th and (i+1)-th
+        # possible keys) or 2i + 1 (equal to the i-th)
+        u, v = model.home[other], model.away[other]
+        h, a, probs_other = scorelines[other]
+        values_u, index_u = np.unique((h - a) * model.width + h, return_inverse=True)
+        values_v, index_v = np.unique((a - h) * model.width + a, return_inverse=True)
+        n_u, n_v = 2 * len(values_u) + 1, 2 * len(values_v) + 1
+        relation_u = np.eye(3)[1 + np.sign(2 * index_u[:, None] + 1 - np.arange(n_u))]       # (s, n_u, 3)
+        relation_v = np.eye(3)[1 + np.sign(2 * index_v[:, None] + 1 - np.arange(n_v))]
+        relations = (relation_u.reshape(len(h), -1).T * probs_other) @ relation_v.reshape(len(h), -1)
+        relations = relations.reshape(n_u, 3, n_v, 3).transpose(0, 2, 1, 3).reshape(n_u * n_v, 9)
+
+        h, a, probs = scorelines[own]
+        i, j = _prune_product(state_probs, probs, budget / 2)
+        mass = state_probs[i] * probs[j]
+        cells_pruned = max(cells_pruned, state_probs.sum() * probs.sum() - mass.sum())
+        home, away = model.home[own], model.away[own]
+        own_keys = {home: (h - a) * model.width + h, away: (a - h) * model.width + a}
+        keys = {t: columns[t][i] + own_keys[t][j] for t in (home, away)}
+        home_below = np.sign(keys[away] - keys[home])
+        for t, partner, partner_relation in ((home, away, 1 + home_below), (away, home, 1 - home_below)):
+            rank_map = _four_level_ranks(model, pattern, t, (partner, u, v))
+            ranks = (relations @ rank_map.reshape(3, 9, 4)).reshape(-1, 4)
+            code = partner_relation * n_u + _threshold_classes(values_u, columns[t] - columns[u], own_keys[t], i, j)
+            code = code * n_v + _threshold_classes(values_v, columns[t] - columns[v], own_keys[t], i, j)
+            position_probs[t] += np.bincount(code, mass, minlength=len(ranks)) @ ranks
+            third += np.bincount(keys[t] + 3 * model.shift, mass * ranks[:, 2].copy()[code], minlength=len(third))
+
+    return position_probs, third, pruned + cells_pruned
+
+
+def solve_group(
+    compiled: CompiledFixtures,
+    g: int,
+    tail_tol: float = 1e-5,
+    prune_tol: float = 1e-5,
+) -> GroupSolution:
+    """
+    Exact finishing-position probabilities of group g with the FIFA
+    tie-breakers (as rank_groups_fifa: head-to-head results among teams
+    level on points, re-applied to teams still level, then goal
+    difference, goals scored and lots).
+
+    Enumerates the 3^6 result patterns of the group's matches. A pattern
+    fixes every team's points, and the order of a team level with only one
+    other whenever their match had a winner. For two teams who drew, only
+    their other matches (independent) can separate them. For three or four
+    teams level, the scorelines of the matches among them are enumerated
+    and ranked head-to-head, after which teams still level differ only in
+    their independent remaining matches; four teams level with a win, draw
+    and loss each go through _rank_four_level.
+
+    Each team's goals are truncated so that the scoreline mass dropped over
+    the group is at most tail_tol. The least likely patterns, scorelines and
+    enumerated states are skipped up to a total mass of prune_tol. Every
+    probability p then satisfies p <= exact <= p + error_bound, with
+    error_bound <= tail_tol + prune_tol.
+    """
+    if compiled.tiebreakers != "fifa":
+        raise ValueError(f"the exact solver uses the FIFA tie-breakers, got tiebreakers={compiled.tiebreakers!r}")
+
+    # An eighth of the pruning budget goes to the least likely patterns and
+    # an eighth to the least likely scorelines of every (match, result)
+    # (each pattern loses at most six times that share of its mass). The
+    # states enumerated for three teams level on points get a quarter and
+    # those for four teams level half, shared in proportion to the weights
+    # of the patterns using them.
+    model = _GroupModel(compiled, g, tail_tol, prune_tol / 48)
+    n_matches = len(model.matches)
+
+    patterns = np.array(list(itertools.product((HOME_WIN, DRAW, AWAY_WIN), repeat=n_matches)))
+    weights = model.result_mass[np.arange(n_matches), patterns].prod(axis=1)
+    keep = _prune(weights, prune_tol / 8)
+    error = 1.0 - model.result_mass.sum(axis=1).prod() + weights[~keep].sum()
+    patterns, weights = patterns[keep], weights[keep]
+    error += (weights * (1.0 - model.kept_mass[np.arange(n_matches), patterns].prod(axis=1))).sum()
+
+    points = np.zeros((len(patterns), 4), dtype=np.int64)
+    np.add.at(points.T, model.home, (3 * (patterns == HOME_WIN) + (patterns == DRAW)).T)
+    np.add.at(points.T, model.away, (3 * (patterns == AWAY_WIN) + (patterns == DRAW)).T)
+    level = points[:, :, None] == points[:, None, :]
+    n_level = level.sum(axis=2)
+    higher = (points[:, None, :] > points[:, :, None]).sum(axis=2)
+
+    position_probs = np.zeros((4, 4))
+    # third-placed team's mass per (points, key index)
+    third_mass = np.zeros((10, model.key_length(3)))
+    teams = np.arange(4)
+
+    # Teams alone on their points, or level with one other team they beat
+    # or lost to: the position follows from the pattern
+    mate = np.argmax(level & ~np.eye(4, dtype=bool), axis=2)
+    mutual = model.match_between[teams, mate]
+    mutual_result = np.take_along_axis(patterns, mutual, axis=1)
+    won = mutual_result == np.where(model.home[mutual] == teams, HOME_WIN, AWAY_WIN)
+    decided = (n_level == 2) & (mutual_result != DRAW)
+    position = higher + (decided & ~won)
+    rows, cols = np.nonzero((n_level == 1) | decided)
+    np.add.at(position_probs, (cols, position[rows, cols]), weights[rows])
+
+    third = position[rows, cols] == 2
+    rows, cols = rows[third], cols[third]
+    own_results = patterns[rows[:, None], model.team_matches[cols]]
+    cells, inverse = np.unique(
+        np.column_stack([cols, own_results, points[rows, cols]]), axis=0, return_inverse=True
+    )
+    for (t, *results, level_points), weight in zip(cells, np.bincount(inverse.ravel(), weights[rows])):
+        third_mass[level_points] += weight * model.key_pmf(t, tuple(model.team_matches[t]), tuple(results))
+
+    # Two teams level after drawing with each other: ordered by their keys
+    # over their other two matches (independent), then lots. Those depend on
+    # the results of the matches involving the pair, the match between the
+    # other two only on how many teams are above them.
+    rows, cols = np.nonzero((n_level == 2) & (mutual_result == DRAW) & (teams < mate))
+    pair = np.column_stack([cols, mate[rows, cols]])
+    involved = (model.home[None, :, None] == pair[:, None, :]).any(axis=2) | (
+        model.away[None, :, None] == pair[:, None, :]
+    ).any(axis=2)
+    cells, inverse = np.unique(
+        np.column_stack([pair, np.where(involved, patterns[rows], -1)]), axis=0, return_inverse=True
+    )
+    if len(cells):
+        first, second = cells[:, 0], cells[:, 1]
+        draw = model.match_between[first, second]
+        level_points = np.zeros(len(cells), dtype=np.int64)
+        level_points[inverse.ravel()] = points[rows, cols]
+        # weight of each cell per number of teams above the pair
+        weight = np.bincount(inverse.ravel() * 4 + higher[rows, cols], weights[rows], minlength=4 * len(cells))
+        weight = weight.reshape(-1, 4) * model.kept_mass[draw, DRAW][:, None]
+        pmfs = []
+        for t, column in ((first, 0), (second, 1)):
+            other = model.team_matches[t][model.team_matches[t] != draw[:, None]].reshape(-1, 2)
+            pmfs.append(
+                np.array(
+                    [
+                        model.key_pmf(cell[column], tuple(m), tuple(cell[2 + m]))
+                        for cell, m in zip(cells, other)
+                    ]
+                )
+            )
+        # each team's key over those matches (only the keys either can
+        # have), split by whether it finishes above or below the other
+        support = np.flatnonzero(pmfs[0].any(axis=0) | pmfs[1].any(axis=0))
+        pmfs = [pmf[:, support] for pmf in pmfs]
+        split = []
+        for own, rival in ((pmfs[0], pmfs[1]), (pmfs[1], pmfs[0])):
+            below_rival = np.cumsum(rival, axis=1) - rival / 2
+            split.append((own * below_rival, own * (rival.sum(axis=1, keepdims=True) - below_rival)))
+        for t, (ahead, behind) in zip((first, second), split):
+            for above in range(3):
+                position_probs[:, above] += np.bincount(t, weight[:, above] * ahead.sum(axis=1), minlength=4)
+                position_probs[:, above + 1] += np.bincount(t, weight[:, above] * behind.sum(axis=1), minlength=4)
+
+        # third-placed team's key over its other matches, per (drawn match,
+        # points), then plus the draw's goals
+        thirds = weight[:, 2, None] * (split[0][0] + split[1][0]) + weight[:, 1, None] * (split[0][1] + split[1][1])
+        groups, group = np.unique(draw * 10 + level_points, return_inverse=True)
+        summed = (group.ravel()[None, :] == np.arange(len(groups))[:, None]) @ thirds
+        for m, level, row in zip(*np.divmod(groups, 10), summed):
+            draw_keys, draw_probs = model.match_keys(m, DRAW, model.home[m])
+            index = np.flatnonzero(row)
+            third_mass[level] += _outer_sum(
+                support[index], row[index], draw_keys + model.shift, draw_probs, third_mass.shape[1]
+            )
+
+    # Three or four teams level, grouped by the tied teams and the results
+    # among them; the pruning budgets are relative to the patterns' weights
+    size = n_level.max(axis=1)
+    budgets = {3: prune_tol / 4 / weights[size == 3].sum(), 4: prune_tol / 2 / weights[size == 4].sum()}
+    tied = n_level == size[:, None]
+    internal = np.where(tied[:, model.home] & tied[:, model.away], patterns, -1)
+    rows = np.flatnonzero(size >= 3)
+    cells, inverse = np.unique(np.column_stack([tied, internal])[rows], axis=0, return_inverse=True)
+    level_sets = {
+        (tuple(np.flatnonzero(cell[:4])), tuple(cell[4:])): rows[inverse.ravel() == c] for c, cell in enumerate(cells)
+    }
+    for (tied, internal), rows in level_sets.items():
+        budget = budgets[len(tied)]
+        if len(tied) == 4 and (patterns[rows[0]] != DRAW).any():
+            probs, third, pruned = _rank_four_level(model, patterns[rows[0]], budget)
+            position_probs += weights[rows[0]] * probs
+            third_mass[points[rows[0], 0]] += weights[rows[0]] * third
+            error += weights[rows[0]] * pruned
+            continue
+
+        classes, pruned = _head_to_head_classes(model, tied, patterns[rows[0]], budget)
+        error += weights[rows].sum() * pruned
+        pmfs = []
+        for t in tied:
+            other = tuple(m for m in model.team_matches[t] if internal[m] < 0)
+            pmfs.append(np.array([model.key_pmf(t, other, tuple(patterns[row, list(other)])) for row in rows]))
+        _rank_level_teams(
+            tied,
+            classes,
+            pmfs,
+            higher[rows, tied[0]],
+            weights[rows],
+            points[rows, tied[0]],
+            position_probs,
+            third_mass,
+        )
+
+    cells = np.flatnonzero(third_mass)
+    gd, gf = model.decode(cells % third_mass.shape[1] - 3 * model.shift)
+    third_place = pd.DataFrame(
+        {
+            "points": cells // third_mass.shape[1],
+            "gd": gd,
+            "gf": gf,
+            "prob": third_mass.ravel()[cells],
+        }
+    )
+
+    exp_points, exp_gd, exp_gf = model.expected
+    return GroupSolution(
+        group=compiled.groups[g],
+        teams=[compiled.teams[t] for t in model.members],
+        position_probs=position_probs,
+        exp_points=exp_points,
+        exp_gd=exp_gd,
+        exp_gf=exp_gf,
+        third_place=third_place,
+        error_bound=float(error),
+    )
+
+
+def exact_group_stage(tail_tol: float = 1e-5, prune_tol: float = 1e-5) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Exact (enumerated, not simulated) version of simulate_group_stage for
+    every group of the WC 2026 fixtures, with the FIFA tie-breakers.
+
+    Returns:
+      - summary: the simulate_group_stage columns per team, plus the
+        group's error_bound
+      - third_place: joint distribution of the third-placed team's
+        (points, gd, gf) per group
+    """
+    compiled = compile_fixtures(load_group_stage_fixtures(), get_compiled_team_params())
+
+    summaries, thirds = [], []
+    for g in range(compiled.n_groups):
+        solution = solve_group(compiled, g, tail_tol=tail_tol, prune_tol=prune_tol)
+        pos = solution.position_probs
+        summaries.append(
+            pd.DataFrame(
+                {
+                    "team": solution.teams,
+                    "group": solution.group,
+                    "exp_points": solution.exp_points,
+                    "exp_gd": solution.exp_gd,
+                    "exp_gf": solution.exp_gf,
+                    "prob_1st": pos[:, 0],
+                    "prob_2nd": pos[:, 1],
+                    "prob_3rd": pos[:, 2],
+                    "prob_4th": pos[:, 3],
+                    "prob_advance": pos[:, 0] + pos[:, 1],
+                    "error_bound": solution.error_bound,
+                }
+            )
+        )
+        thirds.append(solution.third_place.assign(group=solution.group))
+
+    summary = pd.concat(summaries, ignore_index=True)
+    summary = summary.sort_values(["group", "exp_points"], ascending=[True, False], ignore_index=True)
+    third_place = pd.concat(thirds, ignore_index=True)[["group", "points", "gd", "gf", "prob"]]
+    return summary, third_place
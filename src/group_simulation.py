@@ -0,0 +1,277 @@
+# src/group_simulation.py
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import instrumentation
+from .knockout import poisson_cdf_table
+from .ranking import TIEBREAKERS
+
+# Simulations processed together when drawing goals and summing standings
+# (keeps the temporaries small enough to stay in cache)
+SUB_BLOCK_SIZE = 1024
+
+# Equal slices of [0, 1) in the guide table of the inverse-CDF goal sampler
+GUIDE_BUCKETS = 1024
+
+
+@dataclass
+class CompiledFixtures:
+    """
+    Group-stage fixtures compiled into integer index arrays, together with
+    the results known so far.
+
+    Teams are numbered 0..n_teams-1 in alphabetical order, groups
+    0..n_groups-1 in label order. Only NumPy arrays are needed to simulate.
+
+    Played matches carry their real score in home_goals / away_goals (-1
+    while unplayed). Once the knockout stage is under way, bracket holds the
+    actual Round-of-32 slots (empty while it is not known) and
+    knockout_outcomes[i, j] is +1 if team i beat team j in a played tie,
+    -1 if it lost to j and 0 otherwise (see src.live_results).
+
+    tiebreakers names the rules used to rank the groups (one of
+    src.ranking.TIEBREAKERS).
+    """
+
+    teams: list[str]
+    groups: list[str]
+    team_group: np.ndarray      # (n_teams,) group index of each team
+    group_members: np.ndarray   # (n_groups, 4) team indices, alphabetical within group
+    param_ids: np.ndarray       # (n_teams,) ids into CompiledTeamParams
+    home: np.ndarray            # (n_matches,) home team index
+    away: np.ndarray            # (n_matches,) away team index
+    match_group: np.ndarray     # (n_matches,) group index of each match
+    neutral: np.ndarray         # (n_matches,) bool
+    lambda_home: np.ndarray     # (n_matches,) expected home goals
+    lambda_away: np.ndarray     # (n_matches,) expected away goals
+    home_goals: np.ndarray      # (n_matches,) real home goals, -1 if not played
+    away_goals: np.ndarray      # (n_matches,) real away goals, -1 if not played
+    bracket: np.ndarray         # (32,) team index per Round-of-32 slot, or (0,) if not known
+    knockout_outcomes: np.ndarray  # (n_teams, n_teams) int8 results of played knockout ties
+    tiebreakers: str = "fifa"
+
+    @property
+    def n_teams(self) -> int:
+        return len(self.teams)
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.groups)
+
+    @property
+    def n_matches(self) -> int:
+        return len(self.home)
+
+    @property
+    def played(self) -> np.ndarray:
+        return self.home_goals >= 0
+
+    @property
+    def settled_groups(self) -> np.ndarray:
+        """
+        (n_groups,) True for groups whose matches have all been played.
+        """
+        unplayed = np.bincount(self.match_group[~self.played], minlength=self.n_groups)
+        return unplayed == 0
+
+
+def compile_fixtures(fixtures, params, tiebreakers: str = "fifa") -> CompiledFixtures:
+    """
+    Compile a group-stage fixtures DataFrame (as returned by
+    load_group_stage_fixtures) against compiled team parameters.
+
+    Optional home_goals / away_goals columns (NaN while unplayed, see
+    src.live_results.apply_group_results) mark matches as played.
+    """
+    if tiebreakers not in TIEBREAKERS:
+        raise ValueError(f"tiebreakers must be one of {TIEBREAKERS}, got {tiebreakers!r}")
+    teams = sorted(set(fixtures["home_team"]).union(fixtures["away_team"]))
+    team_index = {t: i for i, t in enumerate(teams)}
+    groups = sorted(set(fixtures["group"]))
+    group_index = {g: i for i, g in enumerate(groups)}
+
+    home = np.array([team_index[t] for t in fixtures["home_team"]], dtype=np.intp)
+    away = np.array([team_index[t] for t in fixtures["away_team"]], dtype=np.intp)
+    match_group = np.array([group_index[g] for g in fixtures["group"]], dtype=np.intp)
+    neutral = np.asarray(fixtures["neutral"], dtype=bool)
+
+    team_group = np.empty(len(teams), dtype=np.intp)
+    team_group[home] = match_group
+    team_group[away] = match_group
+
+    group_members = np.array(
+        [np.flatnonzero(team_group == g) for g in range(len(groups))],
+        dtype=np.intp,
+    )
+
+    if "home_goals" in fixtures:
+        home_goals = fixtures["home_goals"].fillna(-1).to_numpy(dtype=np.int64)
+        away_goals = fixtures["away_goals"].fillna(-1).to_numpy(dtype=np.int64)
+    else:
+        home_goals = np.full(len(home), -1, dtype=np.int64)
+        away_goals = np.full(len(home), -1, dtype=np.int64)
+
+    param_ids = params.team_ids(teams)
+    lambda_home, lambda_away = params.expected_goals(
+        param_ids[home],
+        param_ids[away],
+        neutral=neutral,
+    )
+
+    return CompiledFixtures(
+        teams=teams,
+        groups=groups,
+        team_group=team_group,
+        group_members=group_members,
+        param_ids=param_ids,
+        home=home,
+        away=away,
+        match_group=match_group,
+        neutral=neutral,
+        lambda_home=lambda_home,
+        lambda_away=lambda_away,
+        home_goals=home_goals,
+        away_goals=away_goals,
+        bracket=np.empty(0, dtype=np.intp),
+        knockout_outcomes=np.zeros((len(teams), len(teams)), dtype=np.int8),
+        tiebreakers=tiebreakers,
+    )
+
+
+def _goal_cap(lambdas: np.ndarray) -> int:
+    """
+    Goal count past which the Poisson tail of every λ is far below the
+    2**-53 resolution of rng.random(), so capping there loses nothing.
+    """
+    lam = float(np.max(lambdas, initial=0.0))
+    return int(lam + 12 * np.sqrt(lam) + 15)
+
+
+def _guide_table(cdf: np.ndarray) -> np.ndarray:
+    """
+    (n * GUIDE_BUCKETS,) int16 entries for the CDF rows of n λs: twice the
+    goal count at the start of each slice of [0, 1), plus 1 if the CDF
+    steps inside the slice (the count then depends on where in it u falls).
+    """
+    edges = np.arange(GUIDE_BUCKETS + 1) / GUIDE_BUCKETS
+    guide = np.empty((len(cdf), GUIDE_BUCKETS), dtype=np.int16)
+    for m, row in enumerate(cdf):
+        first = np.searchsorted(row, edges[:-1], side="right")
+        last = np.searchsorted(row, edges[1:], side="left")
+        guide[m] = 2 * first + (first != last)
+    return guide.ravel()
+
+
+def sample_poisson_goals(lambdas: np.ndarray, n_sim: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    (n_sim, len(lambdas)) int8 Poisson goals, column m with mean lambdas[m].
+
+    Inverse-CDF sampling from one rng.random() per goal. A guide table
+    reads the goal count straight off the slice of [0, 1) the uniform falls
+    in; only the few uniforms in a slice where the CDF steps need a short
+    search. Rows are drawn SUB_BLOCK_SIZE at a time.
+    """
+    lambdas = np.asarray(lambdas, dtype=np.float64)
+    n = len(lambdas)
+    cdf = poisson_cdf_table(lambdas, _goal_cap(lambdas))
+    n_levels = cdf.shape[1]
+    cdf = cdf.ravel()
+    guide = _guide_table(cdf.reshape(n, n_levels))
+    bucket_offsets = np.arange(n) * GUIDE_BUCKETS
+    cdf_offsets = np.arange(n) * n_levels
+
+    goals = np.empty((n_sim, n), dtype=np.int8)
+    for start in range(0, n_sim, SUB_BLOCK_SIZE):
+        u = rng.random((min(SUB_BLOCK_SIZE, n_sim - start), n))
+        bucket = (u * GUIDE_BUCKETS).astype(np.intp)
+        bucket += bucket_offsets
+        entry = guide[bucket]
+        block = (entry >> 1).astype(np.int8)
+
+        stepped = np.flatnonzero(entry & 1)
+        if len(stepped):
+            column = cdf_offsets[stepped % n]
+            u_stepped = u.ravel()[stepped]
+            g = block.ravel()[stepped].astype(np.intp)
+            while True:
+                up = u_stepped >= cdf[column + g]
+                if not up.any():
+                    break
+                g += up
+            block.ravel()[stepped] = g
+        goals[start : start + len(u)] = block
+    return goals
+
+
+def sample_group_goals(
+    compiled: CompiledFixtures,
+    n_sim: int,
+    rng: np.random.Generator,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Draw scorelines for every group match in n_sim simulations at once.
+
+    Only unplayed matches are sampled; played ones keep their real score in
+    every simulation.
+
+    Returns (goals_home, goals_away), each of shape (n_sim, n_matches), int8.
+    """
+    played = compiled.played
+    remaining = ~played
+    lambdas = np.concatenate([compiled.lambda_home[remaining], compiled.lambda_away[remaining]])
+    drawn = sample_poisson_goals(lambdas, n_sim, rng).reshape(n_sim, 2, -1)
+    instrumentation.count("poisson_draws", n_sim * lambdas.size)
+
+    if played.any():
+        goals = np.empty((n_sim, 2, compiled.n_matches), dtype=np.int8)
+        goals[:, 0, played] = compiled.home_goals[played]
+        goals[:, 1, played] = compiled.away_goals[played]
+        goals[:, :, remaining] = drawn
+    else:
+        goals = drawn
+    return goals[:, 0, :], goals[:, 1, :]
+
+
+def _incidence(columns: np.ndarray, n_columns: int) -> np.ndarray:
+    """
+    One-hot (len(columns), n_columns) matrix, so that values @ incidence
+    scatter-adds values[:, m] into column columns[m] for every row at once.
+    """
+    incidence = np.zeros((len(columns), n_columns), dtype=np.float32)
+    incidence[np.arange(len(columns)), columns] = 1.0
+    return incidence
+
+
+def group_stage_totals(
+    compiled: CompiledFixtures,
+    goals_home: np.ndarray,
+    goals_away: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Points, goals for and goals against per team, each (n_sim, n_teams).
+
+    Each match contributes a home and an away side; one float32 product
+    per SUB_BLOCK_SIZE rows scatters the points, goals scored and goals
+    conceded of all sides into their teams.
+    """
+    n_sim, n_teams = len(goals_home), compiled.n_teams
+    incidence = np.vstack([_incidence(compiled.home, n_teams), _incidence(compiled.away, n_teams)])
+
+    points = np.empty((n_sim, n_teams), dtype=np.int64)
+    gf = np.empty_like(points)
+    ga = np.empty_like(points)
+    for start in range(0, n_sim, SUB_BLOCK_SIZE):
+        rows = slice(start, start + SUB_BLOCK_SIZE)
+        scored = np.hstack([goals_home[rows], goals_away[rows]])      # (m, 2 * n_matches) per side
+        conceded = np.hstack([goals_away[rows], goals_home[rows]])
+        match_points = np.where(scored > conceded, 3, (scored == conceded).view(np.int8))
+        m = len(scored)
+
+        # Small integer sums, so the float32 matrix product is exact
+        sums = np.vstack([match_points, scored, conceded]).astype(np.float32) @ incidence
+        points[rows] = sums[:m]
+        gf[rows] = sums[m : 2 * m]
+        ga[rows] = sums[2 * m :]
+    return points, gf, ga
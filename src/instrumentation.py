@@ -0,0 +1,159 @@
+# src/instrumentation.py
+
+import cProfile
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+# Set to 1 to instrument runs of src.engine.run_simulation, or to "profile"
+# to also write a cProfile dump
+INSTRUMENT_ENV = "WC2026_INSTRUMENT"
+
+# What stage() returns while nothing is being recorded
+_NULL_STAGE = nullcontext()
+
+
+class _Stage:
+    """
+    Times one pass through a stage (see Instrumentation.stage).
+    """
+
+    __slots__ = ("record", "start")
+
+    def __init__(self, record: list):
+        self.record = record
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.record[0] += 1
+        self.record[1] += time.perf_counter() - self.start
+
+
+class Instrumentation:
+    """
+    Wall time and call counts per named stage, plus named event counters.
+
+    Stages nest freely (a stage's time includes that of the stages inside
+    it). Records from other processes, e.g. pool workers, are folded in
+    with merge().
+    """
+
+    def __init__(self):
+        self.stages = {}     # name -> [calls, seconds]
+        self.counters = {}   # name -> count
+
+    def stage(self, name: str) -> _Stage:
+        record = self.stages.get(name)
+        if record is None:
+            record = self.stages[name] = [0, 0.0]
+        return _Stage(record)
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, report: dict) -> None:
+        """
+        Add the stages and counters of an as_dict() report.
+        """
+        for name, stage in report["stages"].items():
+            record = self.stages.setdefault(name, [0, 0.0])
+            record[0] += stage["calls"]
+            record[1] += stage["seconds"]
+        for name, n in report["counters"].items():
+            self.count(name, n)
+
+    def as_dict(self) -> dict:
+        return {
+            "stages": {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+    def format_report(self) -> str:
+        """
+        The stages (slowest first) and counters as a text table.
+        """
+        lines = [f"{'stage':<28} {'calls':>8} {'seconds':>10}"]
+        for name, (calls, seconds) in sorted(self.stages.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<28} {calls:>8,} {seconds:>10.3f}")
+        if self.counters:
+            lines.append("")
+            lines.append(f"{'counter':<28} {'count':>8}")
+            for name, n in sorted(self.counters.items()):
+                lines.append(f"{name:<28} {n:>8,}")
+        return "\n".join(lines)
+
+
+# The Instrumentation being recorded into, or None (the default)
+_ACTIVE = None
+
+
+def active() -> Instrumentation | None:
+    return _ACTIVE
+
+
+def stage(name: str):
+    """
+    Context manager timing one pass through stage `name` of the active
+    instrumentation; a shared no-op when instrumentation is off.
+    """
+    if _ACTIVE is None:
+        return _NULL_STAGE
+    return _ACTIVE.stage(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    """
+    Add n to counter `name` of the active instrumentation, if any.
+    """
+    if _ACTIVE is not None:
+        _ACTIVE.count(name, n)
+
+
+def instrumentation_from_env() -> tuple[bool, bool]:
+    """
+    (instrument, profile) requested by the WC2026_INSTRUMENT variable.
+    """
+    value = os.environ.get(INSTRUMENT_ENV, "").strip().lower()
+    if value in ("", "0", "false", "no", "off"):
+        return False, False
+    return True, value == "profile"
+
+
+@contextmanager
+def instrument(report_path: str | None = None, profile_path: str | None = None):
+    """
+    Record stages and counters for the duration of the with-block:
+
+        with instrument() as inst:
+            simulate_full_tournament(n_sim=100_000)
+        print(inst.format_report())
+
+    report_path: also write the as_dict() report there as JSON.
+    profile_path: also run the block under cProfile and dump its stats
+    there (pstats format, e.g. python -m pstats <path>).
+    """
+    global _ACTIVE
+    previous = _ACTIVE
+    inst = Instrumentation()
+    profiler = cProfile.Profile() if profile_path else None
+
+    _ACTIVE = inst
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield inst
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        _ACTIVE = previous
+        wall_s = time.perf_counter() - start
+
+        if profiler is not None:
+            profiler.dump_stats(profile_path)
+        if report_path:
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump({"wall_s": wall_s, **inst.as_dict()}, f, indent=2)
@@ -0,0 +1,524 @@
+# src/jit_kernel.py
+
+import numpy as np
+
+from .bracket_wc2026 import compile_bracket
+from .group_simulation import group_stage_totals, sample_group_goals
+from .knockout import KNOCKOUT_MAX_GOALS, ROUND_GROUP, ROUND_R32, ROUND_W, poisson_cdf_table
+from .ranking import _group_match_layout, rank_fixture_groups
+
+try:
+    import numba
+except ImportError:  # optional: simulate_chunk falls back to the NumPy kernels
+    numba = None
+
+HAVE_NUMBA = numba is not None
+
+# Tournament engines of simulate_chunk: "numpy" (vectorized block kernels),
+# "numba" (this module's compiled per-simulation loop) or "auto" (numba
+# when it can be imported, numpy otherwise)
+ENGINES = ("auto", "numpy", "numba")
+
+# How far _simulate_batch plays each tournament
+STAGE_GROUPS, STAGE_BRACKET, STAGE_KNOCKOUT = range(3)
+
+# Simulations per call of the compiled loop (bounds the pre-drawn uniforms
+# to a few MB)
+JIT_BATCH_SIZE = 8_192
+
+
+def resolve_engine(engine: str) -> str:
+    """
+    The engine ("numpy" or "numba") that `engine` (one of ENGINES) runs on.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
+    if engine == "auto":
+        return "numba" if HAVE_NUMBA else "numpy"
+    if engine == "numba" and not HAVE_NUMBA:
+        raise ImportError('engine="numba" needs the numba package')
+    return engine
+
+
+def _jit(fn):
+    """
+    numba.njit with the compiled code cached on disk (in __pycache__), so
+    only the first run on a machine pays for compilation. Without numba the
+    functions stay plain Python (correct, but far too slow to simulate with).
+    """
+    if numba is None:
+        return fn
+    return numba.njit(cache=True, inline="always")(fn)
+
+
+@_jit
+def _count_better(keys, n_keys, out):
+    """
+    out[i] = number of rows of keys[:, :n_keys] that are lexicographically
+    bigger than row i (0 = best; equal rows share a value).
+    """
+    k = keys.shape[0]
+    for i in range(k):
+        better = 0
+        for j in range(k):
+            for c in range(n_keys):
+                if keys[j, c] != keys[i, c]:
+                    if keys[j, c] > keys[i, c]:
+                        better += 1
+                    break
+        out[i] = better
+
+
+@_jit
+def _has_level(level):
+    k = level.shape[0]
+    for i in range(k):
+        for j in range(i + 1, k):
+            if level[i] == level[j]:
+                return True
+    return False
+
+
+@_jit
+def _inverse_poisson(u, lam, cdf):
+    """
+    Goals = min{g : u < CDF(g)} for Poisson(lam): a scan of the CDF row
+    precomputed at 0..K-1, continued with the pmf recurrence past it, so
+    goals are not capped.
+    """
+    n = cdf.shape[0]
+    for g in range(n):
+        if u < cdf[g]:
+            return g
+    g = n - 1
+    pmf = cdf[n - 1] - cdf[n - 2]
+    total = cdf[n - 1]
+    while u >= total and pmf > 0.0:
+        g += 1
+        pmf *= lam / g
+        total += pmf
+    return g
+
+
+@_jit
+def _rank_group(
+    members, matches, local_home, local_away, goals_home, goals_away, points, gd, gf, draw, fifa, positions, level, keys
+):
+    """
+    Finishing positions of one group in one simulation, with the rules of
+    src.ranking.rank_groups_fifa (fifa; draw holds the teams' drawing-of-lots
+    keys) or rank_groups. level: (2, k) and keys: (k, 4) work arrays.
+    """
+    k = members.shape[0]
+    current = level[0]
+    refined = level[1]
+    if not fifa:
+        for i in range(k):
+            t = members[i]
+            keys[i, 0] = points[t]
+            keys[i, 1] = gd[t]
+            keys[i, 2] = gf[t]
+            keys[i, 3] = t
+        _count_better(keys, 4, current)
+        for i in range(k):
+            positions[members[i]] = current[i] + 1
+        return
+
+    for i in range(k):
+        keys[i, 0] = points[members[i]]
+    _count_better(keys, 1, current)
+
+    if _has_level(current):
+        # Head-to-head mini-tables among the teams still level, re-applied
+        # while a pass splits some of them
+        for _ in range(k - 1):
+            for i in range(k):
+                keys[i, 0] = -current[i]
+                keys[i, 1] = 0.0
+                keys[i, 2] = 0.0
+                keys[i, 3] = 0.0
+            for m in matches:
+                a = local_home[m]
+                b = local_away[m]
+                if current[a] != current[b]:
+                    continue
+                goals_a = goals_home[m]
+                goals_b = goals_away[m]
+                if goals_a > goals_b:
+                    keys[a, 1] += 3.0
+                elif goals_b > goals_a:
+                    keys[b, 1] += 3.0
+                else:
+                    keys[a, 1] += 1.0
+                    keys[b, 1] += 1.0
+                keys[a, 2] += goals_a - goals_b
+                keys[b, 2] += goals_b - goals_a
+                keys[a, 3] += goals_a
+                keys[b, 3] += goals_b
+            _count_better(keys, 4, refined)
+            split = False
+            for i in range(k):
+                if refined[i] != current[i]:
+                    split = True
+                current[i] = refined[i]
+            if not split or not _has_level(current):
+                break
+
+        for i in range(k):
+            t = members[i]
+            keys[i, 0] = -current[i]
+            keys[i, 1] = gd[t]
+            keys[i, 2] = gf[t]
+            keys[i, 3] = draw[t]
+        _count_better(keys, 4, current)
+
+    for i in range(k):
+        positions[members[i]] = current[i] + 1
+
+
+@_jit
+def _place_qualifiers(group_members, positions, points, gd, gf, draw, third_table, slot_source, qualifiers, teams, keys):
+    """
+    Rank the third-placed teams (points, goal difference, goals scored,
+    then the draw keys of their groups) and fill one simulation's
+    bracket, as rank_third_placed and place_in_bracket do. teams:
+    (4, n_groups) and keys: (n_groups, 4) work arrays.
+    """
+    n_groups, k = group_members.shape
+    winners = teams[0]
+    runners = teams[1]
+    thirds = teams[2]
+    rank = teams[3]
+    for g in range(n_groups):
+        for i in range(k):
+            t = group_members[g, i]
+            if positions[t] == 1:
+                winners[g] = t
+            elif positions[t] == 2:
+                runners[g] = t
+            elif positions[t] == 3:
+                thirds[g] = t
+
+    for g in range(n_groups):
+        t = thirds[g]
+        keys[g, 0] = points[t]
+        keys[g, 1] = gd[t]
+        keys[g, 2] = gf[t]
+        keys[g, 3] = draw[g]
+    _count_better(keys, 4, rank)
+
+    mask = 0
+    for g in range(n_groups):
+        if rank[g] < third_table.shape[1]:
+            mask |= 1 << g
+    allocated = third_table[mask]
+
+    for slot in range(slot_source.shape[0]):
+        source = slot_source[slot]
+        if source < n_groups:
+            qualifiers[slot] = winners[source]
+        elif source < 2 * n_groups:
+            qualifiers[slot] = runners[source - n_groups]
+        else:
+            qualifiers[slot] = thirds[allocated[source - 2 * n_groups]]
+
+
+@_jit
+def _play_knockout(qualifiers, lambda_matrix, goal_cdf, outcomes, u_goals, u_penalties, rounds, alive):
+    """
+    Play one simulation's bracket: inverse-CDF Poisson goals from the pair
+    λs, a 50/50 penalty coin on draws, real winners of ties already played.
+    u_goals: (2, 31) and u_penalties: (31,) uniforms; alive: (32,) work array.
+    """
+    for i in range(qualifiers.shape[0]):
+        alive[i] = qualifiers[i]
+        rounds[qualifiers[i]] = ROUND_R32
+    n_alive = alive.shape[0]
+    match = 0
+    round_code = ROUND_R32
+    while n_alive > 1:
+        for i in range(n_alive // 2):
+            t1 = alive[2 * i]
+            t2 = alive[2 * i + 1]
+            goals1 = _inverse_poisson(u_goals[0, match], lambda_matrix[t1, t2], goal_cdf[t1, t2])
+            goals2 = _inverse_poisson(u_goals[1, match], lambda_matrix[t2, t1], goal_cdf[t2, t1])
+            team1_wins = goals1 > goals2 or (goals1 == goals2 and u_penalties[match] < 0.5)
+            if outcomes[t1, t2] != 0:
+                team1_wins = outcomes[t1, t2] > 0
+            if team1_wins:
+                alive[i] = t1
+                rounds[t2] = round_code
+            else:
+                alive[i] = t2
+                rounds[t1] = round_code
+            match += 1
+        n_alive //= 2
+        round_code += 1
+    rounds[alive[0]] = ROUND_W
+
+
+@_jit
+def _simulate_batch(
+    stage,
+    fifa,
+    lambda_home,
+    lambda_away,
+    cdf_home,
+    cdf_away,
+    home,
+    away,
+    home_goals,
+    away_goals,
+    group_members,
+    group_matches,
+    local_home,
+    local_away,
+    fixed_positions,
+    bracket,
+    third_table,
+    slot_source,
+    lambda_matrix,
+    goal_cdf,
+    outcomes,
+    u_group,
+    u_draw,
+    u_thirds,
+    u_knockout,
+    u_penalties,
+    goals_home,
+    goals_away,
+    points,
+    gd,
+    gf,
+    positions,
+    qualifiers,
+    rounds,
+):
+    """
+    Simulate goals_home.shape[0] tournaments one at a time from pre-drawn
+    uniforms (u_group .. u_penalties, see _draw_uniforms), filling the
+    output arrays (goals_home .. rounds) in place. fixed_positions holds
+    the positions of teams in settled groups that need no drawing of lots
+    (0 elsewhere, see _settled_positions); a non-empty
+    bracket replaces the group qualification.
+    """
+    n_sim, n_matches = goals_home.shape
+    n_groups, k = group_members.shape
+    conceded = np.empty(points.shape[1], dtype=np.int64)
+    level = np.empty((2, k), dtype=np.int64)
+    group_keys = np.empty((k, 4))
+    teams = np.empty((4, n_groups), dtype=np.int64)
+    third_keys = np.empty((n_groups, 4))
+    alive = np.empty(slot_source.shape[0], dtype=np.intp)
+
+    for s in range(n_sim):
+        conceded[:] = 0
+        for m in range(n_matches):
+            if home_goals[m] >= 0:
+                g1 = home_goals[m]
+                g2 = away_goals[m]
+            else:
+                g1 = _inverse_poisson(u_group[s, 0, m], lambda_home[m], cdf_home[m])
+                g2 = _inverse_poisson(u_group[s, 1, m], lambda_away[m], cdf_away[m])
+            goals_home[s, m] = g1
+            goals_away[s, m] = g2
+            h = home[m]
+            a = away[m]
+            if g1 > g2:
+                points[s, h] += 3
+            elif g2 > g1:
+                points[s, a] += 3
+            else:
+                points[s, h] += 1
+                points[s, a] += 1
+            gf[s, h] += g1
+            gf[s, a] += g2
+            conceded[h] += g2
+            conceded[a] += g1
+        for t in range(points.shape[1]):
+            gd[s, t] = gf[s, t] - conceded[t]
+
+        for g in range(n_groups):
+            members = group_members[g]
+            if fixed_positions[members[0]] > 0:
+                for t in members:
+                    positions[s, t] = fixed_positions[t]
+                continue
+            _rank_group(
+                members,
+                group_matches[g],
+                local_home,
+                local_away,
+                goals_home[s],
+                goals_away[s],
+                points[s],
+                gd[s],
+                gf[s],
+                u_draw[s],
+                fifa,
+                positions[s],
+                level,
+                group_keys,
+            )
+
+        if stage == STAGE_GROUPS:
+            continue
+        if bracket.shape[0]:
+            qualifiers[s] = bracket
+        else:
+            _place_qualifiers(
+                group_members,
+                positions[s],
+                points[s],
+                gd[s],
+                gf[s],
+                u_thirds[s],
+                third_table,
+                slot_source,
+                qualifiers[s],
+                teams,
+                third_keys,
+            )
+        if stage == STAGE_KNOCKOUT:
+            _play_knockout(
+                qualifiers[s], lambda_matrix, goal_cdf, outcomes, u_knockout[s], u_penalties[s], rounds[s], alive
+            )
+
+
+def _goal_cdf(lambdas: np.ndarray) -> np.ndarray:
+    """
+    Poisson CDF at 0..KNOCKOUT_MAX_GOALS for every λ, without the cap of
+    poisson_cdf_table (_inverse_poisson continues the tail itself).
+    """
+    return np.ascontiguousarray(poisson_cdf_table(lambdas, KNOCKOUT_MAX_GOALS + 1)[..., :-1])
+
+
+def _draw_uniforms(compiled, n_sim: int, n_knockout_matches: int, stage: int, rng: np.random.Generator) -> dict:
+    """
+    Every random input of n_sim tournaments: goal and penalty uniforms
+    (inverted by the kernel) and drawing-of-lots keys, per team within
+    groups and per group among the thirds. Inputs of stages not played are
+    empty.
+    """
+    n_bracket = n_sim if stage != STAGE_GROUPS else 0
+    n_knockout = n_sim if stage == STAGE_KNOCKOUT else 0
+    return {
+        "u_group": rng.random((n_sim, 2, compiled.n_matches)),
+        "u_draw": rng.random((n_sim, compiled.n_teams)),
+        "u_thirds": rng.random((n_bracket, compiled.n_groups)),
+        "u_knockout": rng.random((n_knockout, 2, n_knockout_matches)),
+        "u_penalties": rng.random((n_knockout, n_knockout_matches)),
+    }
+
+
+def _settled_positions(compiled, rng: np.random.Generator) -> np.ndarray:
+    """
+    (n_teams,) positions of the teams in settled groups that are separated
+    before the drawing of lots (0 for the others), ranked once as in the
+    NumPy kernel. Settled groups with teams exactly level are left to
+    _simulate_batch, which draws their lots per simulation.
+    """
+    fixed = np.zeros(compiled.n_teams, dtype=np.int64)
+    settled = compiled.settled_groups
+    if settled.any():
+        goals_home, goals_away = sample_group_goals(compiled, 1, rng)
+        points, gf, ga = group_stage_totals(compiled, goals_home, goals_away)
+        # a constant draw key leaves teams that need the lots level
+        no_lots = np.zeros((1, compiled.n_teams), dtype=np.int64)
+        positions = rank_fixture_groups(
+            compiled, points, gf - ga, gf, goals_home, goals_away, rng, compiled.group_members[settled], no_lots
+        )
+        for members in compiled.group_members[settled]:
+            if len(np.unique(positions[0, members])) == len(members):
+                fixed[members] = positions[0, members]
+    return fixed
+
+
+def simulate_block_jit(
+    compiled,
+    lambda_matrix: np.ndarray | None,
+    n_sim: int,
+    rng: np.random.Generator,
+    stage: int = STAGE_KNOCKOUT,
+) -> dict:
+    """
+    Compiled counterpart of simulate_group_block (stage=STAGE_GROUPS) and
+    simulate_tournament_block (STAGE_KNOCKOUT; STAGE_BRACKET stops once the
+    qualifiers are placed, for the exact knockout): same model, rules and
+    output dict, but each tournament is played by a scalar loop, so the
+    tie-breaks and the bracket only do the work that simulation needs.
+
+    The random inputs are uniforms drawn from rng batch by batch and turned
+    into goals by inverse CDF; results are reproducible, but not the same
+    sample for sample as the NumPy engine's.
+    """
+    group_matches, local_home, local_away = _group_match_layout(
+        compiled.group_members, compiled.home, compiled.away, compiled.n_teams
+    )
+    plan = compile_bracket(tuple(compiled.groups))
+    n_knockout_matches = len(plan.slot_source) - 1
+    if lambda_matrix is None:
+        lambda_matrix = np.ones((compiled.n_teams, compiled.n_teams))
+    lambda_matrix = np.ascontiguousarray(lambda_matrix, dtype=np.float64)
+
+    model = (
+        compiled.tiebreakers == "fifa",
+        np.ascontiguousarray(compiled.lambda_home, dtype=np.float64),
+        np.ascontiguousarray(compiled.lambda_away, dtype=np.float64),
+        _goal_cdf(compiled.lambda_home),
+        _goal_cdf(compiled.lambda_away),
+        np.ascontiguousarray(compiled.home, dtype=np.intp),
+        np.ascontiguousarray(compiled.away, dtype=np.intp),
+        np.ascontiguousarray(compiled.home_goals, dtype=np.int64),
+        np.ascontiguousarray(compiled.away_goals, dtype=np.int64),
+        np.ascontiguousarray(compiled.group_members, dtype=np.intp),
+        np.ascontiguousarray(group_matches, dtype=np.intp),
+        np.ascontiguousarray(local_home, dtype=np.intp),
+        np.ascontiguousarray(local_away, dtype=np.intp),
+        _settled_positions(compiled, rng),
+        np.ascontiguousarray(compiled.bracket, dtype=np.intp),
+        plan.third_table,
+        plan.slot_source,
+        lambda_matrix,
+        _goal_cdf(lambda_matrix),
+        np.ascontiguousarray(compiled.knockout_outcomes, dtype=np.int8),
+    )
+
+    n_teams = compiled.n_teams
+    out = {
+        "points": np.zeros((n_sim, n_teams), dtype=np.int64),
+        "gd": np.zeros((n_sim, n_teams), dtype=np.int64),
+        "gf": np.zeros((n_sim, n_teams), dtype=np.int64),
+        "positions": np.zeros((n_sim, n_teams), dtype=np.int64),
+        "goals_home": np.empty((n_sim, compiled.n_matches), dtype=np.int64),
+        "goals_away": np.empty((n_sim, compiled.n_matches), dtype=np.int64),
+    }
+    qualifiers = np.zeros((n_sim if stage != STAGE_GROUPS else 0, len(plan.slot_source)), dtype=np.intp)
+    rounds = np.full((n_sim if stage == STAGE_KNOCKOUT else 0, n_teams), ROUND_GROUP, dtype=np.int8)
+
+    for start in range(0, n_sim, JIT_BATCH_SIZE):
+        rows = slice(start, min(start + JIT_BATCH_SIZE, n_sim))
+        u = _draw_uniforms(compiled, rows.stop - start, n_knockout_matches, stage, rng)
+        _simulate_batch(
+            stage,
+            *model,
+            u["u_group"],
+            u["u_draw"],
+            u["u_thirds"],
+            u["u_knockout"],
+            u["u_penalties"],
+            out["goals_home"][rows],
+            out["goals_away"][rows],
+            out["points"][rows],
+            out["gd"][rows],
+            out["gf"][rows],
+            out["positions"][rows],
+            qualifiers[rows],
+            rounds[rows],
+        )
+
+    if stage != STAGE_GROUPS:
+        out["qualifiers"] = qualifiers
+    if stage == STAGE_KNOCKOUT:
+        out["rounds"] = rounds
+    return out
@@ -0,0 +1,226 @@
+# src/knockout.py
+
+import numpy as np
+
+from . import instrumentation
+
+# Furthest round reached, as stored in the (n_sim, n_teams) round codes.
+# A team "reaching" R16 here means it was knocked out in the Round of 16.
+ROUND_LABELS = ("Group", "R32", "R16", "QF", "SF", "F", "W")
+ROUND_GROUP, ROUND_R32, ROUND_R16, ROUND_QF, ROUND_SF, ROUND_F, ROUND_W = range(len(ROUND_LABELS))
+
+# Goals are capped here when building knockout win probabilities
+KNOCKOUT_MAX_GOALS = 15
+
+# Simulations per batch in knockout_round_probabilities (bounds the size of
+# the gathered win-probability blocks, 31 * 32 floats per simulation)
+DP_BATCH_SIZE = 4_096
+
+
+def neutral_lambda_matrix(params, param_ids: np.ndarray) -> np.ndarray:
+    """
+    (n, n) matrix of expected goals on neutral ground between the given
+    teams: entry [i, j] = λ of team i against team j.
+
+    params is a CompiledTeamParams, param_ids the teams' ids in it.
+    """
+    lambda_ij, _ = params.expected_goals(param_ids[:, None], param_ids[None, :], neutral=True)
+    return np.ascontiguousarray(lambda_ij)
+
+
+def _play_bracket(qualifiers: np.ndarray, n_teams: int, resolve) -> np.ndarray:
+    """
+    Shared round loop of the knockout simulators.
+
+    resolve(match_offset, team1, team2) returns a bool array that is True
+    where team1 wins; match_offset is the index of the round's first match
+    among all 31 bracket matches (0 for the first R32 match).
+    """
+    n_sim = qualifiers.shape[0]
+    rows = np.arange(n_sim)[:, None]
+
+    rounds = np.full((n_sim, n_teams), ROUND_GROUP, dtype=np.int8)
+    rounds[rows, qualifiers] = ROUND_R32
+
+    alive = qualifiers
+    match_offset = 0
+    for round_code in (ROUND_R32, ROUND_R16, ROUND_QF, ROUND_SF, ROUND_F):
+        team1 = alive[:, 0::2]
+        team2 = alive[:, 1::2]
+
+        team1_wins = resolve(match_offset, team1, team2)
+        winners = np.where(team1_wins, team1, team2)
+        losers = np.where(team1_wins, team2, team1)
+
+        rounds[rows, losers] = round_code
+        alive = winners
+        match_offset += team1.shape[1]
+
+    rounds[rows, alive] = ROUND_W
+    return rounds
+
+
+def simulate_knockout_batch(
+    qualifiers: np.ndarray,
+    lambda_matrix: np.ndarray,
+    rng: np.random.Generator,
+    outcomes: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Play a 32-team single-elimination bracket for a batch of tournaments.
+
+    qualifiers: (n_sim, 32) team indices in bracket order; slots 2k and
+        2k + 1 meet in the first round, and winners keep pairing up the same
+        way in later rounds.
+    lambda_matrix: (n_teams, n_teams) neutral-ground λs (neutral_lambda_matrix).
+
+    Every round is resolved for all simulations at once: λs are gathered
+    from the pair matrix, both teams' goals come from one Poisson draw, and
+    draws are settled by a 50/50 penalty coin.
+
+    outcomes: optional (n_teams, n_teams) results of ties already played
+        (+1 where i beat j, -1 where i lost to j, 0 otherwise); such ties
+        keep their real winner. The same random numbers are drawn either way.
+
+    Returns an (n_sim, n_teams) int8 array of round codes (ROUND_LABELS);
+    teams that did not qualify keep ROUND_GROUP.
+    """
+
+    def resolve(match_offset, team1, team2):
+        lambdas = np.stack([lambda_matrix[team1, team2], lambda_matrix[team2, team1]])
+        goals = rng.poisson(lambdas)
+        instrumentation.count("knockout_lambda_lookups", lambdas.size)
+        instrumentation.count("poisson_draws", lambdas.size)
+        penalties = rng.random(team1.shape) < 0.5
+        team1_wins = (goals[0] > goals[1]) | ((goals[0] == goals[1]) & penalties)
+        if outcomes is not None:
+            played = outcomes[team1, team2]
+            team1_wins = np.where(played != 0, played > 0, team1_wins)
+        return team1_wins
+
+    return _play_bracket(qualifiers, lambda_matrix.shape[0], resolve)
+
+
+def simulate_knockout_inverse_cdf(
+    qualifiers: np.ndarray,
+    goal_cdf: np.ndarray,
+    u_goals: np.ndarray,
+    u_penalties: np.ndarray,
+) -> np.ndarray:
+    """
+    Knockout bracket driven by pre-drawn uniforms (common random numbers).
+
+    goal_cdf: (n_teams, n_teams, K) Poisson CDF of team i's goals against j.
+    u_goals: (n_sim, 2, 31) uniforms for both teams' goals in each match.
+    u_penalties: (n_sim, 31) uniforms for the penalty coin.
+
+    Goals are the inverse-CDF transform of the uniforms, so two runs with
+    different models but the same uniforms are positively correlated.
+    Returns round codes as in simulate_knockout_batch.
+    """
+
+    def resolve(match_offset, team1, team2):
+        matches = slice(match_offset, match_offset + team1.shape[1])
+        goals1 = inverse_poisson_cdf(u_goals[:, 0, matches], goal_cdf[team1, team2])
+        goals2 = inverse_poisson_cdf(u_goals[:, 1, matches], goal_cdf[team2, team1])
+        penalties = u_penalties[:, matches] < 0.5
+        return (goals1 > goals2) | ((goals1 == goals2) & penalties)
+
+    return _play_bracket(qualifiers, goal_cdf.shape[0], resolve)
+
+
+def poisson_cdf_table(lambdas: np.ndarray, max_goals: int) -> np.ndarray:
+    """
+    Poisson CDF at 0..max_goals for every λ, shape lambdas.shape + (max_goals + 1,).
+    The last entry is set to 1, i.e. goals are capped at max_goals.
+    """
+    lambdas = np.asarray(lambdas, dtype=np.float64)[..., None]
+    k = np.arange(max_goals + 1)
+    # pmf via the recurrence p_k = p_{k-1} * λ / k
+    ratios = np.where(k > 0, lambdas / np.maximum(k, 1), 1.0)
+    pmf = np.exp(-lambdas) * np.cumprod(ratios, axis=-1)
+    cdf = np.cumsum(pmf, axis=-1)
+    cdf[..., -1] = 1.0
+    return cdf
+
+
+def inverse_poisson_cdf(u: np.ndarray, cdf: np.ndarray) -> np.ndarray:
+    """
+    Goals = min{k : u < CDF(k)} for uniforms u and matching CDF rows.
+    """
+    return (u[..., None] >= cdf).sum(axis=-1)
+
+
+def knockout_win_matrix(lambda_matrix: np.ndarray, max_goals: int = KNOCKOUT_MAX_GOALS) -> np.ndarray:
+    """
+    (n, n) probability that team i beats team j in a knockout match.
+
+    Same rule as the simulators: independent Poisson goals with the
+    neutral-ground λs of lambda_matrix, and a 50/50 penalty shoot-out after
+    a draw, so entry [i, j] = P(i wins) + P(draw) / 2 and W + W.T = 1.
+    """
+    cdf = poisson_cdf_table(lambda_matrix, max_goals)     # (n, n, K): goals of i against j
+    pmf = np.diff(cdf, axis=-1, prepend=0.0)
+    pmf_opp = pmf.transpose(1, 0, 2)                      # goals of j against i
+    cdf_opp = cdf.transpose(1, 0, 2)
+
+    # P(i scores k and j scores fewer) summed over k
+    p_win = (pmf[..., 1:] * cdf_opp[..., :-1]).sum(axis=-1)
+    p_draw = (pmf * pmf_opp).sum(axis=-1)
+    return p_win + 0.5 * p_draw
+
+
+def condition_win_matrix(win_matrix: np.ndarray, outcomes: np.ndarray) -> np.ndarray:
+    """
+    Win probabilities given the knockout ties already played: 1 / 0 for
+    pairs with a known winner (outcomes +1 / -1), unchanged otherwise. Two
+    teams meet at most once, so this conditions the whole bracket.
+    """
+    return np.where(outcomes > 0, 1.0, np.where(outcomes < 0, 0.0, win_matrix))
+
+
+def knockout_round_probabilities(qualifiers: np.ndarray, win_matrix: np.ndarray) -> np.ndarray:
+    """
+    Exact round-exit probabilities of every bracket slot, for a batch of
+    fixed brackets.
+
+    qualifiers: (n_sim, 32) team indices in bracket order, as for
+        simulate_knockout_batch.
+    win_matrix: (n_teams, n_teams) knockout win probabilities (knockout_win_matrix).
+
+    Propagates reach probabilities round by round instead of sampling: in
+    the round where slots meet in blocks of 2 * size, a slot's opponent is
+    one of the `size` slots in the other half of its block, so
+
+        reach'[s] = reach[s] * sum_o reach[o] * W[team_s, team_o]
+
+    at O(32^2) work per round and simulation.
+
+    Returns an (n_sim, 32, len(ROUND_LABELS)) float array: the probability
+    that the team in each slot goes out in each round (ROUND_W = champion;
+    the ROUND_GROUP column is zero). Each slot's row sums to 1.
+    """
+    n_sim, n_slots = qualifiers.shape
+    exits = np.zeros((n_sim, n_slots, len(ROUND_LABELS)))
+
+    for start in range(0, n_sim, DP_BATCH_SIZE):
+        teams = qualifiers[start : start + DP_BATCH_SIZE]
+        batch = teams.shape[0]
+        reach = np.ones((batch, n_slots))
+
+        size = 1
+        for round_code in (ROUND_R32, ROUND_R16, ROUND_QF, ROUND_SF, ROUND_F):
+            # (batch, n_blocks, 2 halves, size); reversing the half axis
+            # lines every slot up with the half it can meet
+            block_teams = teams.reshape(batch, -1, 2, size)
+            block_reach = reach.reshape(batch, -1, 2, size)
+            win = win_matrix[block_teams[..., :, None], block_teams[:, :, ::-1, None, :]]
+            beat = np.einsum("nbhso,nbho->nbhs", win, block_reach[:, :, ::-1])
+
+            next_reach = (block_reach * beat).reshape(batch, n_slots)
+            exits[start : start + batch, :, round_code] = reach - next_reach
+            reach = next_reach
+            size *= 2
+
+        exits[start : start + batch, :, ROUND_W] = reach
+    return exits
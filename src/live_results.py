@@ -0,0 +1,161 @@
+# src/live_results.py
+
+import os
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+from .fixtures_wc2026 import FIXTURES_DIR, load_group_stage_fixtures
+from .group_simulation import CompiledFixtures, compile_fixtures
+from .preprocessing import NAME_NORMALIZATION, normalize_team_names
+
+# Real results entered during the tournament (not shipped; created on demand)
+RESULTS_PATH = os.path.join(FIXTURES_DIR, "wc2026_results.csv")
+
+# stage is "group" or a knockout round label (e.g. "R32"); winner is only
+# needed for knockout ties decided on penalties
+RESULT_COLUMNS = ["stage", "home_team", "away_team", "home_goals", "away_goals", "winner"]
+
+
+def empty_results() -> pd.DataFrame:
+    return pd.DataFrame({col: pd.Series(dtype=object) for col in RESULT_COLUMNS})
+
+
+def load_results(path: str = RESULTS_PATH) -> pd.DataFrame:
+    """
+    Load the results played so far (an empty frame if there are none yet),
+    with team names normalized like the fixtures.
+    """
+    if not os.path.exists(path):
+        return empty_results()
+    results = pd.read_csv(path)
+    for col in RESULT_COLUMNS:
+        if col not in results:
+            results[col] = None
+    results = normalize_team_names(results[RESULT_COLUMNS])
+    results["winner"] = results["winner"].replace(NAME_NORMALIZATION)
+    return results
+
+
+def save_results(results: pd.DataFrame, path: str = RESULTS_PATH) -> None:
+    results[RESULT_COLUMNS].to_csv(path, index=False)
+
+
+def record_result(
+    results: pd.DataFrame,
+    home_team: str,
+    away_team: str,
+    home_goals: int,
+    away_goals: int,
+    stage: str = "group",
+    winner: str | None = None,
+) -> pd.DataFrame:
+    """
+    Return results with one more played match. For a knockout tie that
+    ended level, winner names the team that went through on penalties.
+    """
+    row = pd.DataFrame(
+        [
+            {
+                "stage": stage,
+                "home_team": NAME_NORMALIZATION.get(home_team, home_team),
+                "away_team": NAME_NORMALIZATION.get(away_team, away_team),
+                "home_goals": int(home_goals),
+                "away_goals": int(away_goals),
+                "winner": NAME_NORMALIZATION.get(winner, winner),
+            }
+        ]
+    )
+    if results.empty:
+        return row
+    return pd.concat([results, row], ignore_index=True)
+
+
+def apply_group_results(fixtures: pd.DataFrame, results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy of the fixtures with home_goals / away_goals columns filled in for
+    the group matches in results (NaN for matches not played yet).
+
+    A result may list the teams either way round; its score is matched to
+    the fixture's home / away order.
+    """
+    index = {(h, a): i for i, (h, a) in enumerate(zip(fixtures["home_team"], fixtures["away_team"]))}
+    home_goals = np.full(len(fixtures), np.nan)
+    away_goals = np.full(len(fixtures), np.nan)
+
+    group_results = results.loc[results["stage"] == "group", RESULT_COLUMNS[1:5]]
+    for home, away, hg, ag in group_results.itertuples(index=False):
+        if (home, away) in index:
+            i = index[(home, away)]
+        elif (away, home) in index:
+            i = index[(away, home)]
+            hg, ag = ag, hg
+        else:
+            raise ValueError(f"No group-stage fixture {home} vs {away}")
+        home_goals[i] = hg
+        away_goals[i] = ag
+
+    return fixtures.assign(home_goals=home_goals, away_goals=away_goals)
+
+
+def knockout_outcome_matrix(teams: list[str], results: pd.DataFrame) -> np.ndarray:
+    """
+    (n_teams, n_teams) int8 matrix of played knockout ties: +1 at [i, j]
+    where team i beat team j, -1 at [j, i], 0 for pairs that have not met.
+    """
+    team_index = {t: i for i, t in enumerate(teams)}
+    outcomes = np.zeros((len(teams), len(teams)), dtype=np.int8)
+
+    ties = results[results["stage"] != "group"]
+    for home, away, hg, ag, winner in ties[RESULT_COLUMNS[1:]].itertuples(index=False):
+        if home not in team_index or away not in team_index:
+            raise ValueError(f"Unknown team in knockout result {home} vs {away}")
+        if hg != ag:
+            winner = home if hg > ag else away
+        elif winner not in (home, away):
+            raise ValueError(f"Drawn knockout tie {home} vs {away} needs the penalty winner")
+        loser = away if winner == home else home
+        outcomes[team_index[winner], team_index[loser]] = 1
+        outcomes[team_index[loser], team_index[winner]] = -1
+    return outcomes
+
+
+def compile_live_fixtures(
+    params,
+    results: pd.DataFrame | None = None,
+    bracket=None,
+    tiebreakers: str = "fifa",
+) -> CompiledFixtures:
+    """
+    Compile the WC 2026 fixtures conditioned on the results so far.
+
+    results: played matches (load_results / record_result); group matches
+        are no longer sampled, knockout ties keep their real winner.
+    bracket: once the group stage is over, the 32 qualified teams in
+        bracket order (slots 2k and 2k + 1 meet in the Round of 32).
+    tiebreakers: group-ranking rules (src.ranking.TIEBREAKERS).
+    """
+    fixtures = load_group_stage_fixtures()
+    if results is None or results.empty:
+        compiled = compile_fixtures(fixtures, params, tiebreakers)
+        results = empty_results()
+    else:
+        compiled = compile_fixtures(apply_group_results(fixtures, results), params, tiebreakers)
+
+    team_index = {t: i for i, t in enumerate(compiled.teams)}
+    bracket_ids = np.empty(0, dtype=np.intp)
+    if bracket is not None:
+        if not compiled.played.all():
+            raise ValueError("The bracket can only be fixed once every group match has been played")
+        n_slots = 2 * compiled.n_groups + 8
+        unknown = [t for t in bracket if t not in team_index]
+        if unknown or len(bracket) != n_slots or len(set(bracket)) != n_slots:
+            raise ValueError(f"bracket must list the 32 qualified teams once each (unknown: {unknown})")
+        bracket_ids = np.array([team_index[t] for t in bracket], dtype=np.intp)
+
+    return replace(
+        compiled,
+        bracket=bracket_ids,
+        knockout_outcomes=knockout_outcome_matrix(compiled.teams, results),
+    )
@@ -1,14 +1,21 @@
 # src/match_prediction.py
 
 import os
+from collections import OrderedDict, namedtuple
 from functools import lru_cache
 
 import numpy as np
 import pandas as pd
 from scipy.stats import poisson
 
+from . import instrumentation
 from .config import DATA_PROCESSED_DIR
 
+TEAM_PARAMS_PATH = os.path.join(DATA_PROCESSED_DIR, "team_params_poisson.csv")
+
+# Maximum number of scoreline matrices kept by scoreline_matrix()
+SCORELINE_CACHE_SIZE = 4096
+
 
 @lru_cache(maxsize=1)
 def load_team_params() -> pd.DataFrame:
@@ -16,8 +23,7 @@ def load_team_params() -> pd.DataFrame:
     Load team-level attack/defence parameters from the Poisson model.
     Cached so it's only read from disk once.
     """
-    path = os.path.join(DATA_PROCESSED_DIR, "team_params_poisson.csv")
-    df = pd.read_csv(path)
+    df = pd.read_csv(TEAM_PARAMS_PATH)
     return df
 
 
@@ -30,14 +36,156 @@ def _get_global_params(df: pd.DataFrame) -> tuple[float, float]:
     return intercept, home_advantage
 
 
-def _get_team_row(df: pd.DataFrame, team: str) -> pd.Series:
+class CompiledTeamParams:
+    """
+    Team parameters compiled into contiguous NumPy arrays.
+
+    Teams are addressed by integer ids (their row in team_params_poisson.csv),
+    so λ lookups are plain array gathers with no pandas on the hot path.
+    """
+
+    def __init__(
+        self,
+        teams: list[str],
+        attack: np.ndarray,
+        defence: np.ndarray,
+        intercept: float,
+        home_advantage: float,
+    ):
+        self.teams = list(teams)
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.attack = np.ascontiguousarray(attack, dtype=np.float64)
+        self.defence = np.ascontiguousarray(defence, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.home_advantage = float(home_advantage)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "CompiledTeamParams":
+        """
+        Build the compiled parameters from a team_params_poisson.csv DataFrame.
+        """
+        intercept, home_advantage = _get_global_params(df)
+        return cls(
+            teams=df["team"].tolist(),
+            attack=df["attack"].to_numpy(),
+            defence=df["defence"].to_numpy(),
+            intercept=intercept,
+            home_advantage=home_advantage,
+        )
+
+    @property
+    def n_teams(self) -> int:
+        return len(self.teams)
+
+    def team_id(self, team: str) -> int:
+        """
+        Return the integer id of a team.
+        """
+        try:
+            return self.team_index[team]
+        except KeyError:
+            raise ValueError(f"Team '{team}' not found in team_params_poisson.csv") from None
+
+    def team_ids(self, teams) -> np.ndarray:
+        """
+        Return the integer ids of a sequence of teams.
+        """
+        return np.array([self.team_id(t) for t in teams], dtype=np.intp)
+
+    def expected_goals(self, home_ids, away_ids, neutral=True):
+        """
+        Expected goals for integer team ids (scalars or arrays of equal shape).
+
+        `neutral` may be a bool or a boolean array broadcastable to the ids.
+        Returns (λ_home, λ_away) with the same shape as the ids.
+        """
+        home_ids = np.asarray(home_ids)
+        away_ids = np.asarray(away_ids)
+        instrumentation.count("expected_goals_calls")
+        instrumentation.count("expected_goals_pairs", np.broadcast(home_ids, away_ids).size)
+
+        log_lambda_home = self.intercept + self.attack[home_ids] + self.defence[away_ids]
+        log_lambda_away = self.intercept + self.attack[away_ids] + self.defence[home_ids]
+
+        # apply home advantage where not neutral
+        log_lambda_home = log_lambda_home + np.where(neutral, 0.0, self.home_advantage)
+
+        return np.exp(log_lambda_home), np.exp(log_lambda_away)
+
+
+ScorelineCacheInfo = namedtuple("ScorelineCacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class _ScorelineCache:
+    """
+    Size-bounded mapping with least-recently-used eviction and hit/miss counters.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            instrumentation.count("scoreline_cache_misses")
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        instrumentation.count("scoreline_cache_hits")
+        return value
+
+    def put(self, key, value) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> ScorelineCacheInfo:
+        return ScorelineCacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+
+_SCORELINE_CACHE = _ScorelineCache(maxsize=SCORELINE_CACHE_SIZE)
+
+_COMPILED = {"source": None, "params": None}
+
+
+def get_compiled_team_params() -> CompiledTeamParams:
+    """
+    Return the compiled team parameters for the currently loaded params file.
+
+    Compiled once per `load_team_params()` result, so clearing that cache
+    (e.g. after refitting the model) also triggers a recompile.
+    """
+    df = load_team_params()
+    if _COMPILED["source"] is not df:
+        _COMPILED["params"] = CompiledTeamParams.from_frame(df)
+        _COMPILED["source"] = df
+        # anything derived from the previous parameters is now stale
+        _SCORELINE_CACHE.clear()
+        instrumentation.count("team_params_compiles")
+    else:
+        instrumentation.count("team_params_cache_hits")
+    return _COMPILED["params"]
+
+
+def reload_team_params() -> pd.DataFrame:
     """
-    Return the row in df corresponding to the given team.
+    Re-read team_params_poisson.csv (e.g. after refitting the model in the
+    same process) and invalidate every cache derived from it.
     """
-    row = df.loc[df["team"] == team]
-    if row.empty:
-        raise ValueError(f"Team '{team}' not found in team_params_poisson.csv")
-    return row.iloc[0]
+    load_team_params.cache_clear()
+    _SCORELINE_CACHE.clear()
+    get_compiled_team_params()
+    return load_team_params()
 
 
 def expected_goals(home_team: str, away_team: str, neutral: bool = True) -> tuple[float, float]:
@@ -47,30 +195,110 @@ def expected_goals(home_team: str, away_team: str, neutral: bool = True) -> tupl
     Poisson log-rate structure:
         log(λ_home) = intercept + attack_home + defence_away + (home_advantage if not neutral)
         log(λ_away) = intercept + attack_away + defence_home
+
+    Thin wrapper over CompiledTeamParams.expected_goals for team names.
     """
-    df = load_team_params()
-    intercept, home_advantage = _get_global_params(df)
+    params = get_compiled_team_params()
+    lambda_home, lambda_away = params.expected_goals(
+        params.team_id(home_team),
+        params.team_id(away_team),
+        neutral=neutral,
+    )
+    return float(lambda_home), float(lambda_away)
 
-    home_row = _get_team_row(df, home_team)
-    away_row = _get_team_row(df, away_team)
 
-    attack_home = float(home_row["attack"])
-    defence_home = float(home_row["defence"])
-    attack_away = float(away_row["attack"])
-    defence_away = float(away_row["defence"])
+def _scoreline_matrices(lambda_home: np.ndarray, lambda_away: np.ndarray, max_goals: int) -> np.ndarray:
+    """
+    Joint scoreline probabilities for N matches as an (N, G, G) array,
+    with G = max_goals + 1 and entry [n, i, j] = P(home scores i, away scores j).
+    """
+    goals = np.arange(max_goals + 1)
+    pmf_home = poisson.pmf(goals, np.asarray(lambda_home, dtype=np.float64)[:, None])
+    pmf_away = poisson.pmf(goals, np.asarray(lambda_away, dtype=np.float64)[:, None])
+    return pmf_home[:, :, None] * pmf_away[:, None, :]
 
-    # log-lambdas
-    log_lambda_home = intercept + attack_home + defence_away
-    log_lambda_away = intercept + attack_away + defence_home
 
-    # apply home advantage if not neutral
-    if not neutral:
-        log_lambda_home += home_advantage
+def _outcome_probabilities(matrices: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Collapse (N, G, G) scoreline matrices into home win / draw / away win
+    probabilities, renormalised over the truncated grid.
+    """
+    p_home = np.tril(matrices, k=-1).sum(axis=(1, 2))
+    p_draw = np.trace(matrices, axis1=1, axis2=2)
+    p_away = np.triu(matrices, k=1).sum(axis=(1, 2))
+
+    # small probability mass might be in scorelines beyond max_goals -> renormalise
+    total = p_home + p_draw + p_away
+    total = np.where(total > 0, total, 1.0)
+    return p_home / total, p_draw / total, p_away / total
+
+
+def _truncation_error(lambda_home, lambda_away, max_goals) -> np.ndarray:
+    """
+    Probability mass lost by truncating both teams' goals at max_goals.
+    """
+    tail_home = poisson.sf(max_goals, lambda_home)
+    tail_away = poisson.sf(max_goals, lambda_away)
+    return tail_home + tail_away - tail_home * tail_away
+
+
+def goals_for_tail_tolerance(lambda_home, lambda_away, tail_tol: float) -> np.ndarray:
+    """
+    Smallest max_goals per match so that the scoreline mass outside the
+    (max_goals + 1) x (max_goals + 1) grid is at most tail_tol.
+
+    Each team's goals are cut at its Poisson (1 - tail_tol / 2) quantile,
+    which bounds the joint tail by tail_tol.
+    """
+    if not 0 < tail_tol < 1:
+        raise ValueError("tail_tol must be between 0 and 1")
+    q = 1.0 - tail_tol / 2.0
+    goals_home = poisson.ppf(q, lambda_home)
+    goals_away = poisson.ppf(q, lambda_away)
+    return np.maximum(goals_home, goals_away).astype(int)
 
-    lambda_home = float(np.exp(log_lambda_home))
-    lambda_away = float(np.exp(log_lambda_away))
 
-    return lambda_home, lambda_away
+def scoreline_matrix(
+    home_team: str,
+    away_team: str,
+    neutral: bool = True,
+    max_goals: int = 10,
+) -> np.ndarray:
+    """
+    Joint scoreline distribution as a read-only (max_goals + 1, max_goals + 1)
+    array: entry [i, j] = P(home scores i, away scores j), not renormalised.
+
+    Results are kept in a bounded LRU cache keyed by
+    (home_team, away_team, neutral, max_goals); see scoreline_cache_info().
+    """
+    params = get_compiled_team_params()
+    key = (home_team, away_team, bool(neutral), int(max_goals))
+
+    matrix = _SCORELINE_CACHE.get(key)
+    if matrix is None:
+        lambda_home, lambda_away = params.expected_goals(
+            params.team_id(home_team),
+            params.team_id(away_team),
+            neutral=neutral,
+        )
+        matrix = _scoreline_matrices(np.array([lambda_home]), np.array([lambda_away]), max_goals)[0]
+        matrix.setflags(write=False)
+        _SCORELINE_CACHE.put(key, matrix)
+    return matrix
+
+
+def scoreline_cache_info() -> ScorelineCacheInfo:
+    """
+    Hits, misses, maxsize and current size of the scoreline_matrix cache.
+    """
+    return _SCORELINE_CACHE.info()
+
+
+def clear_scoreline_cache() -> None:
+    """
+    Empty the scoreline_matrix cache and reset its counters.
+    """
+    _SCORELINE_CACHE.clear()
 
 
 def match_outcome_probabilities(
@@ -78,40 +306,89 @@ def match_outcome_probabilities(
     away_team: str,
     neutral: bool = True,
     max_goals: int = 10,
+    tail_tol: float | None = None,
 ) -> dict:
     """
     Compute probabilities of home win, draw, and away win using independent Poisson goals.
 
     We approximate by summing probabilities of all scorelines from 0..max_goals for each team.
+    If tail_tol is given, max_goals is instead chosen per match so that the
+    truncated tail mass is at most tail_tol (see goals_for_tail_tolerance).
+
+    "truncation_error" is the scoreline mass outside the grid that was
+    renormalised away.
     """
     lambda_home, lambda_away = expected_goals(home_team, away_team, neutral=neutral)
 
-    p_home = 0.0
-    p_draw = 0.0
-    p_away = 0.0
-
-    # sum over possible scorelines
-    for i in range(0, max_goals + 1):
-        for j in range(0, max_goals + 1):
-            p_ij = poisson.pmf(i, lambda_home) * poisson.pmf(j, lambda_away)
-            if i > j:
-                p_home += p_ij
-            elif i == j:
-                p_draw += p_ij
-            else:
-                p_away += p_ij
+    if tail_tol is not None:
+        max_goals = int(goals_for_tail_tolerance(lambda_home, lambda_away, tail_tol))
 
-    # small probability mass might be in scorelines beyond max_goals -> renormalise
-    total = p_home + p_draw + p_away
-    if total > 0:
-        p_home /= total
-        p_draw /= total
-        p_away /= total
+    matrices = scoreline_matrix(home_team, away_team, neutral=neutral, max_goals=max_goals)[None]
+    p_home, p_draw, p_away = _outcome_probabilities(matrices)
 
     return {
         "lambda_home": lambda_home,
         "lambda_away": lambda_away,
-        "p_home_win": p_home,
-        "p_draw": p_draw,
-        "p_away_win": p_away,
+        "p_home_win": float(p_home[0]),
+        "p_draw": float(p_draw[0]),
+        "p_away_win": float(p_away[0]),
+        "max_goals": max_goals,
+        "truncation_error": float(_truncation_error(lambda_home, lambda_away, max_goals)),
     }
+
+
+def match_outcome_probabilities_batch(
+    home_teams,
+    away_teams,
+    neutral=True,
+    max_goals: int = 10,
+    tail_tol: float | None = None,
+) -> pd.DataFrame:
+    """
+    Vectorized match_outcome_probabilities over many fixtures at once.
+
+    home_teams / away_teams are equal-length sequences of team names,
+    neutral is a bool or a sequence of bools. All (N, G, G) scoreline
+    matrices are built in one broadcasted pmf/outer-product step.
+
+    With tail_tol, the shared grid is padded to the largest max_goals any
+    match in the batch needs, so every match meets the tolerance.
+
+    Returns a DataFrame with one row per fixture:
+      home_team, away_team, neutral, lambda_home, lambda_away,
+      p_home_win, p_draw, p_away_win, max_goals, truncation_error
+    """
+    home_teams = list(home_teams)
+    away_teams = list(away_teams)
+    if len(home_teams) != len(away_teams):
+        raise ValueError("home_teams and away_teams must have the same length")
+
+    neutral = np.broadcast_to(np.asarray(neutral, dtype=bool), (len(home_teams),))
+
+    params = get_compiled_team_params()
+    lambda_home, lambda_away = params.expected_goals(
+        params.team_ids(home_teams),
+        params.team_ids(away_teams),
+        neutral=neutral,
+    )
+
+    if tail_tol is not None and len(home_teams) > 0:
+        max_goals = int(goals_for_tail_tolerance(lambda_home, lambda_away, tail_tol).max())
+
+    matrices = _scoreline_matrices(lambda_home, lambda_away, max_goals)
+    p_home, p_draw, p_away = _outcome_probabilities(matrices)
+
+    return pd.DataFrame(
+        {
+            "home_team": home_teams,
+            "away_team": away_teams,
+            "neutral": neutral,
+            "lambda_home": lambda_home,
+            "lambda_away": lambda_away,
+            "p_home_win": p_home,
+            "p_draw": p_draw,
+            "p_away_win": p_away,
+            "max_goals": max_goals,
+            "truncation_error": _truncation_error(lambda_home, lambda_away, max_goals),
+        }
+    )
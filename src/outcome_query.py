@@ -0,0 +1,273 @@
+# src/outcome_query.py
+
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .knockout import ROUND_LABELS, ROUND_R32
+from .outcome_store import OUTCOME_STORE_DIR, OutcomeStore
+
+# Per-team events kept as bitmaps in the query index: having reached each
+# knockout round (R32 = qualified ... W = champion), then finishing 1st-4th
+INDEX_EVENTS = tuple(f"reach_{label}" for label in ROUND_LABELS[ROUND_R32:]) + (
+    "pos_1",
+    "pos_2",
+    "pos_3",
+    "pos_4",
+)
+
+# Simulations decoded at a time when building bitmaps (a multiple of 8, so
+# batches start on a byte boundary of the bitmaps)
+INDEX_BATCH_SIZE = 262_144
+
+QueryResult = namedtuple("QueryResult", ["prob", "se", "n"])
+
+
+class Event:
+    """
+    A set of simulations, stored as a packed bitmap (one bit per simulation).
+
+    Events combine with & (and), | (or) and ~ (not); each operation is a
+    single pass over n_sim / 8 bytes.
+    """
+
+    def __init__(self, bits: np.ndarray, n_sim: int):
+        self.bits = bits
+        self.n_sim = n_sim
+
+    def __and__(self, other: "Event") -> "Event":
+        return Event(self.bits & other.bits, self.n_sim)
+
+    def __or__(self, other: "Event") -> "Event":
+        return Event(self.bits | other.bits, self.n_sim)
+
+    def __invert__(self) -> "Event":
+        bits = ~self.bits
+        # clear the padding bits past n_sim in the last byte
+        tail = self.n_sim % 8
+        if tail:
+            bits[-1] &= np.uint8((1 << tail) - 1)
+        return Event(bits, self.n_sim)
+
+    def count(self) -> int:
+        return int(np.bitwise_count(self.bits).sum(dtype=np.int64))
+
+    def mask(self) -> np.ndarray:
+        """
+        (n_sim,) boolean mask, e.g. to select rows of the store.
+        """
+        return np.unpackbits(self.bits, count=self.n_sim, bitorder="little").astype(bool)
+
+
+def _pack_events(flags: np.ndarray) -> np.ndarray:
+    """
+    Pack (n_rows, ...) booleans along the simulation axis: (..., n_rows / 8).
+    """
+    return np.packbits(np.moveaxis(flags, 0, -1), axis=-1, bitorder="little")
+
+
+def _check_batch_size(batch_size: int) -> None:
+    """
+    Batches are packed at byte offset start // 8, so they must start on a
+    byte boundary.
+    """
+    if batch_size <= 0 or batch_size % 8:
+        raise ValueError(f"batch_size must be a positive multiple of 8, got {batch_size}")
+
+
+def build_query_index(store: OutcomeStore, batch_size: int = INDEX_BATCH_SIZE) -> np.ndarray:
+    """
+    Write the per-team event bitmaps (n_teams, len(INDEX_EVENTS), n_bytes)
+    of a store to <store>/query_index.npy, decoding it batch_size
+    simulations at a time (a multiple of 8).
+    """
+    _check_batch_size(batch_size)
+    n_sim = store.n_sim
+    n_bytes = -(-n_sim // 8)
+    path = os.path.join(store.path, "query_index.npy")
+    index = np.lib.format.open_memmap(
+        path + ".tmp", mode="w+", dtype=np.uint8, shape=(store.n_teams, len(INDEX_EVENTS), n_bytes)
+    )
+
+    round_codes = np.arange(ROUND_R32, len(ROUND_LABELS))
+    positions = np.arange(1, 5)
+    for start in range(0, n_sim, batch_size):
+        rows = slice(start, min(start + batch_size, n_sim))
+        reached = store.rounds(rows)[:, :, None] >= round_codes
+        finished = store.positions(rows)[:, :, None] == positions
+        flags = np.concatenate([reached, finished], axis=2)
+        index[:, :, start // 8 : start // 8 + -(-flags.shape[0] // 8)] = _pack_events(flags)
+
+    index.flush()
+    del index
+    os.replace(path + ".tmp", path)
+    with open(os.path.join(store.path, "query_index.json"), "w", encoding="utf-8") as f:
+        json.dump({"n_sim": n_sim, "events": list(INDEX_EVENTS), "run": store.run_id}, f, indent=2)
+    return np.load(path, mmap_mode="r")
+
+
+def _load_query_index(store: OutcomeStore) -> np.ndarray:
+    """
+    Memory-mapped query index of the store, (re)built first if it is
+    missing, older than the store's rows or from another run.
+    """
+    meta_path = os.path.join(store.path, "query_index.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if (
+            meta["n_sim"] == store.n_sim
+            and meta["events"] == list(INDEX_EVENTS)
+            and meta.get("run") == store.run_id
+        ):
+            return np.load(os.path.join(store.path, "query_index.npy"), mmap_mode="r")
+    return build_query_index(store)
+
+
+class OutcomeQuery:
+    """
+    Joint and conditional probabilities over a stored simulation run.
+
+    Team-level events (reaching a round, finishing position) are read from
+    precomputed bitmaps, so a query costs a few passes over n_sim / 8
+    bytes: milliseconds even for 10^7 tournaments. Any other predicate can
+    be turned into an Event with where().
+
+        q = OutcomeQuery()
+        q.prob(q.reaches("Brazil", "SF") & q.reaches("Argentina", "SF"))
+        q.prob(q.reaches("Spain", "QF"), given=q.position("Spain", 2))
+    """
+
+    def __init__(self, store: OutcomeStore | None = None):
+        self.store = store if store is not None else OutcomeStore(OUTCOME_STORE_DIR)
+        self.index = _load_query_index(self.store)
+        self.n_sim = self.store.n_sim
+        self._events = {name: i for i, name in enumerate(INDEX_EVENTS)}
+
+    def _team_id(self, team: str) -> int:
+        try:
+            return self.store.team_index[team]
+        except KeyError:
+            raise ValueError(f"Team '{team}' not found in the stored run") from None
+
+    def _indexed(self, team: str, event: str) -> Event:
+        return Event(np.asarray(self.index[self._team_id(team), self._events[event]]), self.n_sim)
+
+    # ---- events -----------------------------------------------------------
+
+    def everything(self) -> Event:
+        return ~Event(np.zeros(self.index.shape[-1], dtype=np.uint8), self.n_sim)
+
+    def reaches(self, team: str, round_label: str) -> Event:
+        """
+        team plays in round_label ("R32" = qualified ... "F"; "W" = champion).
+        """
+        if round_label not in ROUND_LABELS[ROUND_R32:]:
+            raise ValueError(f"round_label must be one of {ROUND_LABELS[ROUND_R32:]}, got {round_label!r}")
+        return self._indexed(team, f"reach_{round_label}")
+
+    def exits_in(self, team: str, round_label: str) -> Event:
+        """
+        team goes out in round_label ("Group" for not qualifying).
+        """
+        if round_label == "Group":
+            return ~self.reaches(team, "R32")
+        if round_label == "W":
+            return self.reaches(team, "W")
+        next_label = ROUND_LABELS[ROUND_LABELS.index(round_label) + 1]
+        return self.reaches(team, round_label) & ~self.reaches(team, next_label)
+
+    def position(self, team: str, position: int) -> Event:
+        """
+        team finishes its group in position (1-4).
+        """
+        return self._indexed(team, f"pos_{position}")
+
+    def group_winner(self, team: str) -> Event:
+        return self.position(team, 1)
+
+    def final(self, team_a: str, team_b: str) -> Event:
+        """
+        The final is team_a vs team_b (only two teams reach it).
+        """
+        return self.reaches(team_a, "F") & self.reaches(team_b, "F")
+
+    def where(self, predicate, batch_size: int = INDEX_BATCH_SIZE) -> Event:
+        """
+        Event from any vectorized predicate(store, rows) -> (n_rows,) bool,
+        e.g. lambda s, rows: s.group_totals(rows)["points"][:, i] >= 7.
+        Evaluated over the store batch_size simulations at a time (a
+        multiple of 8; not served from the index).
+        """
+        _check_batch_size(batch_size)
+        bits = np.zeros(self.index.shape[-1], dtype=np.uint8)
+        for start in range(0, self.n_sim, batch_size):
+            rows = slice(start, min(start + batch_size, self.n_sim))
+            flags = np.asarray(predicate(self.store, rows), dtype=bool)
+            bits[start // 8 : start // 8 + -(-len(flags) // 8)] = _pack_events(flags)
+        return Event(bits, self.n_sim)
+
+    # ---- probabilities ------------------------------------------------------
+
+    def prob(self, event: Event, given: Event | None = None) -> QueryResult:
+        """
+        P(event) or P(event | given), with its binomial standard error and
+        the number of simulations it is estimated from.
+        """
+        if given is None:
+            n = self.n_sim
+            hits = event.count()
+        else:
+            n = given.count()
+            hits = (event & given).count()
+        if n == 0:
+            return QueryResult(float("nan"), float("nan"), 0)
+        p = hits / n
+        return QueryResult(p, float(np.sqrt(p * (1 - p) / n)), n)
+
+    def round_distribution(self, given: Event | None = None) -> pd.DataFrame:
+        """
+        Per-team probabilities of reaching every knockout round and of each
+        finishing position, conditional on `given` (e.g. a group winner).
+
+        Columns: team, reach_R32 ... reach_W, pos_1 ... pos_4, and n (the
+        number of simulations in the condition).
+        """
+        given_bits = self.everything().bits if given is None else given.bits
+        n = int(np.bitwise_count(given_bits).sum(dtype=np.int64))
+        # one team at a time keeps the temporaries at len(INDEX_EVENTS) bitmaps
+        counts = np.stack(
+            [np.bitwise_count(team_bits & given_bits).sum(axis=-1, dtype=np.int64) for team_bits in self.index]
+        )
+
+        df = pd.DataFrame(counts / max(n, 1), columns=list(INDEX_EVENTS))
+        df.insert(0, "team", self.store.teams)
+        df["n"] = n
+        return df
+
+    def final_distribution(self, given: Event | None = None, top: int = 20) -> pd.DataFrame:
+        """
+        Most likely finals (team_a, team_b, prob, se), optionally conditional.
+        """
+        finalist = self.index[:, self._events["reach_F"]]
+        if given is not None:
+            finalist = finalist & given.bits
+        n = self.n_sim if given is None else given.count()
+
+        # Only teams that ever reach the final can be part of one
+        teams = np.flatnonzero(np.bitwise_count(finalist).sum(axis=-1) > 0)
+        rows = []
+        for k, i in enumerate(teams):
+            both = np.bitwise_count(finalist[teams[k + 1 :]] & finalist[i]).sum(axis=-1, dtype=np.int64)
+            rows.extend((i, j, c) for j, c in zip(teams[k + 1 :], both) if c)
+
+        df = pd.DataFrame(rows, columns=["a", "b", "count"])
+        df["team_a"] = [self.store.teams[i] for i in df["a"]]
+        df["team_b"] = [self.store.teams[i] for i in df["b"]]
+        df["prob"] = df["count"] / max(n, 1)
+        df["se"] = np.sqrt(df["prob"] * (1 - df["prob"]) / max(n, 1))
+        df = df.sort_values("prob", ascending=False, ignore_index=True).head(top)
+        return df[["team_a", "team_b", "prob", "se"]]
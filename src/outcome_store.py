@@ -0,0 +1,315 @@
+# src/outcome_store.py
+
+import glob
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .bracket_wc2026 import bracket_from_thirds_mask, compile_bracket
+from .config import DATA_PROCESSED_DIR
+from .group_simulation import group_stage_totals
+from .knockout import _play_bracket
+
+OUTCOME_STORE_DIR = os.path.join(DATA_PROCESSED_DIR, "wc2026_outcomes")
+STORE_FORMAT_VERSION = 3
+
+# Goals are stored in 4 bits, so higher scores are capped (about 2 in a
+# million tournaments with the current parameters; GD / GF of those rows
+# are off by the excess, positions are stored as simulated). Such rows are
+# flagged, and meta.json records the cap and their number.
+MAX_STORED_GOALS = 15
+
+# Bit width of each stored value; every column is a (n_sim, n_bytes) uint8
+# array of little-endian bit-packed rows, except the two bitmasks.
+#   group_goals: home and away goals of every group match (2 * n_matches values)
+#   positions:   finishing position - 1 of every team
+#   thirds:      uint16, bit g set if the third of group g qualified (the
+#                bracket follows from it and the positions, see
+#                bracket_from_thirds_mask); CLIPPED_BIT set if goals were capped
+#   winners:     uint32, bit m set if the first team of knockout match m won
+COLUMN_BITS = {"group_goals": 4, "positions": 2}
+CLIPPED_BIT = 15
+
+
+def _pack_bits(values: np.ndarray, bits: int) -> np.ndarray:
+    """
+    Pack an (n, k) array of small non-negative integers into
+    (n, ceil(k * bits / 8)) uint8 rows.
+    """
+    n, k = values.shape
+    planes = (values[..., None].astype(np.uint8) >> np.arange(bits, dtype=np.uint8)) & 1
+    return np.packbits(planes.reshape(n, k * bits), axis=1, bitorder="little")
+
+
+def _unpack_bits(packed: np.ndarray, bits: int, k: int) -> np.ndarray:
+    """
+    Inverse of _pack_bits: (n, k) int64 values.
+    """
+    planes = np.unpackbits(packed, axis=1, count=k * bits, bitorder="little").reshape(len(packed), k, bits)
+    values = np.zeros((len(packed), k), dtype=np.uint8)
+    for b in range(bits):
+        values |= planes[:, :, b] << np.uint8(b)
+    return values.astype(np.int64)
+
+
+def _column_shapes(n_teams: int, n_matches: int) -> dict:
+    """
+    Per-simulation (row shape, dtype) of every column.
+    """
+    values = {"group_goals": 2 * n_matches, "positions": n_teams}
+    shapes = {col: ((-(-values[col] * bits // 8),), np.uint8) for col, bits in COLUMN_BITS.items()}
+    shapes["thirds"] = ((), np.uint16)
+    shapes["winners"] = ((), np.uint32)
+    return shapes
+
+
+def _winners_mask(qualifiers: np.ndarray, rounds: np.ndarray) -> np.ndarray:
+    """
+    (n_sim,) uint32 bitmask of knockout results: the winner of a match is
+    the team that went out in a later round.
+    """
+    rows = np.arange(len(qualifiers))[:, None]
+    mask = np.zeros(len(qualifiers), dtype=np.uint32)
+
+    def resolve(match_offset, team1, team2):
+        team1_wins = rounds[rows, team1] > rounds[rows, team2]
+        shifts = np.arange(match_offset, match_offset + team1.shape[1], dtype=np.uint32)
+        mask[...] |= np.bitwise_or.reduce(team1_wins.astype(np.uint32) << shifts, axis=1)
+        return team1_wins
+
+    _play_bracket(qualifiers, rounds.shape[1], resolve)
+    return mask
+
+
+def create_outcome_store(path: str, compiled, n_sim: int, meta: dict) -> str:
+    """
+    Preallocate the memory-mapped columns for n_sim tournaments under the
+    directory `path` and write its meta.json header.
+
+    meta holds the run settings (random_seed, chunk_size, params_sha256,
+    ...); the creation time, team index and fixtures are added here, with
+    the bracket if the fixtures already fix it and the third-place
+    allocation the bracket is rebuilt with otherwise. Files derived from a
+    previous store in the directory (query_index.*) are deleted. Kept free of pandas so pool workers can
+    import the writer cheaply.
+    """
+    os.makedirs(path, exist_ok=True)
+    # an index built on a previous run's rows would answer for the wrong run
+    for stale in glob.glob(os.path.join(path, "query_index.*")):
+        os.remove(stale)
+    columns = {}
+    for col, (row_shape, dtype) in _column_shapes(compiled.n_teams, compiled.n_matches).items():
+        array = np.lib.format.open_memmap(
+            os.path.join(path, f"{col}.npy"), mode="w+", dtype=dtype, shape=(n_sim,) + row_shape
+        )
+        columns[col] = array.itemsize * int(np.prod(row_shape))
+        del array
+
+    header = dict(meta)
+    header.update(
+        {
+            "format_version": STORE_FORMAT_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "n_sim": 0,
+            "n_sim_allocated": n_sim,
+            "teams": compiled.teams,
+            "groups": compiled.groups,
+            "team_group": compiled.team_group.tolist(),
+            "home": compiled.home.tolist(),
+            "away": compiled.away.tolist(),
+            "bracket": compiled.bracket.tolist(),
+            **compile_bracket(tuple(compiled.groups)).allocation,
+            "max_stored_goals": MAX_STORED_GOALS,
+            "n_clipped_rows": 0,
+            "column_bytes": columns,
+            "bytes_per_sim": sum(columns.values()),
+        }
+    )
+    _write_meta(path, header)
+    return path
+
+
+def _write_meta(path: str, meta: dict) -> None:
+    tmp_path = os.path.join(path, "meta.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+
+def _read_meta(path: str) -> dict:
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def set_stored_n_sim(path: str, n_sim: int) -> None:
+    """
+    Record that rows [0, n_sim) are complete, and how many of them had
+    group goals capped at MAX_STORED_GOALS.
+    """
+    meta = _read_meta(path)
+    thirds = np.load(os.path.join(path, "thirds.npy"), mmap_mode="r")[:n_sim]
+    meta["n_sim"] = int(n_sim)
+    meta["n_clipped_rows"] = int(np.count_nonzero(thirds >> CLIPPED_BIT))
+    _write_meta(path, meta)
+
+
+def write_outcome_block(path: str, start: int, out: dict) -> None:
+    """
+    Encode one simulate_tournament_block output into rows
+    [start, start + n_sim) of the store.
+    """
+    positions = out["positions"]
+    n_sim = len(positions)
+    rows = slice(start, start + n_sim)
+    goals = np.hstack([out["goals_home"], out["goals_away"]])
+    team_group = np.array(_read_meta(path)["team_group"])
+
+    # groups of the qualified thirds, and the rows with capped goals
+    qualified = np.zeros(positions.shape, dtype=bool)
+    qualified[np.arange(n_sim)[:, None], out["qualifiers"]] = True
+    thirds = np.bitwise_or.reduce(np.where(qualified & (positions == 3), 1 << team_group, 0), axis=1)
+    thirds |= (goals > MAX_STORED_GOALS).any(axis=1) << CLIPPED_BIT
+
+    encoded = {
+        "group_goals": _pack_bits(np.minimum(goals, MAX_STORED_GOALS), COLUMN_BITS["group_goals"]),
+        "positions": _pack_bits(positions - 1, COLUMN_BITS["positions"]),
+        "thirds": thirds.astype(np.uint16),
+        "winners": _winners_mask(out["qualifiers"], out["rounds"]),
+    }
+    for col, values in encoded.items():
+        array = np.load(os.path.join(path, f"{col}.npy"), mmap_mode="r+")
+        array[rows] = values
+        array.flush()
+        del array
+
+
+class OutcomeStore:
+    """
+    Read-only view on a per-simulation outcome store.
+
+    Columns are memory-mapped and decoded on demand; pass `rows` (a slice
+    or index array) to decode part of the store at a time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.meta = _read_meta(path)
+        if self.meta.get("format_version") != STORE_FORMAT_VERSION:
+            raise ValueError(
+                f"{path} has store format {self.meta.get('format_version')}, expected {STORE_FORMAT_VERSION}; "
+                "simulate again with store= to rebuild it"
+            )
+        self.teams = self.meta["teams"]
+        self.groups = self.meta["groups"]
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.team_group = np.array(self.meta["team_group"], dtype=np.intp)
+        self.group_members = np.array([np.flatnonzero(self.team_group == g) for g in range(len(self.groups))])
+        self.home = np.array(self.meta["home"], dtype=np.intp)
+        self.away = np.array(self.meta["away"], dtype=np.intp)
+        self.columns = {
+            col: np.load(os.path.join(path, f"{col}.npy"), mmap_mode="r")
+            for col in self.meta["column_bytes"]
+        }
+
+    @property
+    def n_sim(self) -> int:
+        return self.meta["n_sim"]
+
+    @property
+    def run_id(self) -> dict:
+        """
+        Identifies the run that wrote the store (files derived from it
+        record this to detect a rerun with the same n_sim).
+        """
+        return {key: self.meta.get(key) for key in ("random_seed", "params_sha256", "created")}
+
+    @property
+    def n_teams(self) -> int:
+        return len(self.teams)
+
+    @property
+    def n_matches(self) -> int:
+        return len(self.home)
+
+    def _rows(self, col: str, rows) -> np.ndarray:
+        if rows is None:
+            rows = slice(0, self.n_sim)
+        return np.asarray(self.columns[col][rows])
+
+    def group_goals(self, rows=None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (goals_home, goals_away), each (n_rows, n_matches).
+        """
+        packed = self._rows("group_goals", rows)
+        goals = _unpack_bits(packed, COLUMN_BITS["group_goals"], 2 * self.n_matches)
+        return goals[:, : self.n_matches], goals[:, self.n_matches :]
+
+    def group_totals(self, rows=None) -> dict:
+        """
+        (n_rows, n_teams) points, gd and gf, recomputed from the stored goals.
+        """
+        points, gf, ga = group_stage_totals(self, *self.group_goals(rows))
+        return {"points": points, "gd": gf - ga, "gf": gf}
+
+    def positions(self, rows=None) -> np.ndarray:
+        """
+        (n_rows, n_teams) finishing position (1-4) in the group.
+        """
+        return _unpack_bits(self._rows("positions", rows), COLUMN_BITS["positions"], self.n_teams) + 1
+
+    def clipped(self, rows=None) -> np.ndarray:
+        """
+        (n_rows,) True where some group goals were capped at max_stored_goals.
+        """
+        return (self._rows("thirds", rows) >> CLIPPED_BIT).astype(bool)
+
+    def bracket(self, rows=None) -> np.ndarray:
+        """
+        (n_rows, 32) team index in each Round-of-32 slot, rebuilt from the
+        positions and the qualified thirds (or the bracket fixed by the
+        results). Raises ValueError if the third-place allocation has
+        changed since the store was written (see compile_bracket).
+        """
+        thirds = self._rows("thirds", rows)
+        if self.meta["bracket"]:
+            return np.tile(np.array(self.meta["bracket"], dtype=np.int64), (len(thirds), 1))
+        allocation = compile_bracket(tuple(self.groups)).allocation
+        stored = {key: self.meta.get(key) for key in allocation}
+        if stored != allocation:
+            # the knockout winners were stored for the brackets of the old allocation
+            raise ValueError(
+                f"{self.path} was written with third-place allocation {stored}, but the current one is "
+                f"{allocation}; simulate again with store= to rebuild it"
+            )
+        mask = thirds & ((1 << CLIPPED_BIT) - 1)
+        return bracket_from_thirds_mask(self.groups, self.group_members, self.positions(rows), mask)
+
+    def bracket_slots(self, rows=None) -> np.ndarray:
+        """
+        (n_rows, n_teams) Round-of-32 slot of each team, -1 if it did not qualify.
+        """
+        bracket = self.bracket(rows)
+        slots = np.full((len(bracket), self.n_teams), -1, dtype=np.int64)
+        slots[np.arange(len(bracket))[:, None], bracket] = np.arange(bracket.shape[1])
+        return slots
+
+    def rounds(self, rows=None) -> np.ndarray:
+        """
+        (n_rows, n_teams) round codes (ROUND_LABELS), replayed from the
+        stored bracket and knockout winners.
+        """
+        bracket = self.bracket(rows)
+        winners = self._rows("winners", rows)[:, None]
+
+        def resolve(match_offset, team1, team2):
+            shifts = np.arange(match_offset, match_offset + team1.shape[1], dtype=np.uint32)
+            return ((winners >> shifts) & 1).astype(bool)
+
+        return _play_bracket(bracket, self.n_teams, resolve)
+
+
+def load_outcome_store(path: str = OUTCOME_STORE_DIR) -> OutcomeStore:
+    return OutcomeStore(path)
+
@@ -0,0 +1,138 @@
+# src/pair_table.py
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .config import DATA_PROCESSED_DIR
+from .match_prediction import (
+    TEAM_PARAMS_PATH,
+    CompiledTeamParams,
+    _outcome_probabilities,
+    _scoreline_matrices,
+)
+
+PAIR_TABLE_PATH = os.path.join(DATA_PROCESSED_DIR, "team_pair_table.npy")
+PAIR_TABLE_META_PATH = os.path.join(DATA_PROCESSED_DIR, "team_pair_table.json")
+
+# Last axis of the table
+PAIR_TABLE_FIELDS = ("lambda_home", "lambda_away", "p_home_win", "p_draw", "p_away_win")
+
+# Venue axis of the table: 0 = neutral ground, 1 = home_team at home
+VENUE_NEUTRAL = 0
+VENUE_HOME = 1
+
+
+def file_sha256(path: str) -> str:
+    """
+    Hex SHA-256 of a file's contents (recorded in run metadata to tell
+    which inputs produced an output).
+    """
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def build_pair_table(
+    params_path: str = TEAM_PARAMS_PATH,
+    out_path: str = PAIR_TABLE_PATH,
+    meta_path: str = PAIR_TABLE_META_PATH,
+    max_goals: int = 10,
+) -> str:
+    """
+    Precompute head-to-head numbers for every ordered pair of teams.
+
+    Writes a dense float64 array of shape (n_teams, n_teams, 2, 5):
+      [home_team_id, away_team_id, venue (neutral/home), field]
+    with fields as in PAIR_TABLE_FIELDS, plus a JSON sidecar holding the
+    team index and the hash of the params file it was built from.
+    """
+    params = CompiledTeamParams.from_frame(pd.read_csv(params_path))
+    n = params.n_teams
+    ids = np.arange(n)
+
+    table = np.lib.format.open_memmap(
+        out_path + ".tmp", mode="w+", dtype=np.float64, shape=(n, n, 2, len(PAIR_TABLE_FIELDS))
+    )
+    # One home team at a time keeps the (n, G, G) scoreline grids small
+    for home_id in range(n):
+        home_ids = np.full(n, home_id)
+        for venue, neutral in ((VENUE_NEUTRAL, True), (VENUE_HOME, False)):
+            lambda_home, lambda_away = params.expected_goals(home_ids, ids, neutral=neutral)
+            matrices = _scoreline_matrices(lambda_home, lambda_away, max_goals)
+            p_home, p_draw, p_away = _outcome_probabilities(matrices)
+            table[home_id, :, venue, :] = np.stack(
+                [lambda_home, lambda_away, p_home, p_draw, p_away], axis=-1
+            )
+    table.flush()
+    del table
+    os.replace(out_path + ".tmp", out_path)
+
+    meta = {
+        "teams": params.teams,
+        "fields": list(PAIR_TABLE_FIELDS),
+        "max_goals": max_goals,
+        "params_sha256": file_sha256(params_path),
+    }
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+    return out_path
+
+
+class PairTable:
+    """
+    Read-only view on the memory-mapped all-pairs table.
+
+    Only the pages touched by lookups are read from disk.
+    """
+
+    def __init__(self, table: np.ndarray, meta: dict):
+        self.table = table
+        self.teams = meta["teams"]
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+        self.max_goals = meta["max_goals"]
+
+    def team_id(self, team: str) -> int:
+        try:
+            return self.team_index[team]
+        except KeyError:
+            raise ValueError(f"Team '{team}' not found in team_params_poisson.csv") from None
+
+    def lookup(self, home_team: str, away_team: str, neutral: bool = True) -> dict:
+        """
+        Same output as match_outcome_probabilities, read from the table.
+        """
+        venue = VENUE_NEUTRAL if neutral else VENUE_HOME
+        row = self.table[self.team_id(home_team), self.team_id(away_team), venue]
+        return {field: float(value) for field, value in zip(PAIR_TABLE_FIELDS, row)}
+
+
+def _is_stale(params_path: str, table_path: str, meta_path: str) -> bool:
+    if not (os.path.exists(table_path) and os.path.exists(meta_path)):
+        return True
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    return meta.get("params_sha256") != file_sha256(params_path)
+
+
+def load_pair_table(
+    params_path: str = TEAM_PARAMS_PATH,
+    table_path: str = PAIR_TABLE_PATH,
+    meta_path: str = PAIR_TABLE_META_PATH,
+) -> PairTable:
+    """
+    Open the all-pairs table as a memory map.
+
+    The table is (re)built first if it is missing or was built from a
+    different version of the params file.
+    """
+    if _is_stale(params_path, table_path, meta_path):
+        build_pair_table(params_path, table_path, meta_path)
+
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    table = np.load(table_path, mmap_mode="r")
+    return PairTable(table, meta)
@@ -1,11 +1,17 @@
 # src/poisson_model.py
 
 import os
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
-import statsmodels.api as sm
-import statsmodels.formula.api as smf
+import scipy.linalg
+import scipy.sparse as sp
+from scipy.special import gammaln
+from scipy.stats import norm
 
 from .config import DATA_PROCESSED_DIR
+from .match_prediction import reload_team_params
 
 
 def load_processed_matches(filename: str = "matches_2018_2025.csv") -> pd.DataFrame:
@@ -21,34 +27,251 @@ def build_team_goal_dataset(matches: pd.DataFrame) -> pd.DataFrame:
     - one for home team goals
     - one for away team goals
 
-    Columns: team, opponent, home (0/1), goals
+    Columns: team, opponent, home (0/1), goals. team and opponent are
+    categoricals over the same (sorted) list of teams.
     """
-    rows = []
+    home_team = matches["home_team"].to_numpy()
+    away_team = matches["away_team"].to_numpy()
+    teams = pd.Index(np.concatenate([home_team, away_team])).unique().sort_values()
 
-    for _, row in matches.iterrows():
-        # Home team row
-        rows.append(
-            {
-                "team": row["home_team"],
-                "opponent": row["away_team"],
-                "home": 1,
-                "goals": row["home_score"],
-            }
-        )
-        # Away team row
-        rows.append(
+    # home row then away row of each match
+    return pd.DataFrame(
+        {
+            "team": pd.Categorical(np.column_stack([home_team, away_team]).ravel(), categories=teams),
+            "opponent": pd.Categorical(np.column_stack([away_team, home_team]).ravel(), categories=teams),
+            "home": np.tile(np.array([1, 0], dtype=np.int64), len(matches)),
+            "goals": np.column_stack([matches["home_score"], matches["away_score"]]).ravel(),
+        }
+    )
+
+
+@dataclass
+class GoalDesign:
+    """
+    Sparse design matrix of goals ~ home + team + opponent.
+
+    Columns: 0 intercept, 1 home, then the attack of teams[1:], then the
+    defence of teams[1:]. teams[0] (alphabetically first) is the reference
+    team and has no columns of its own.
+    """
+
+    matrix: sp.csr_matrix   # (n_rows, 2 * len(teams)), 0/1 entries
+    goals: np.ndarray       # (n_rows,) response
+    teams: pd.Index
+
+    @property
+    def attack_columns(self) -> slice:
+        return slice(2, 1 + len(self.teams))
+
+    @property
+    def defence_columns(self) -> slice:
+        return slice(1 + len(self.teams), 2 * len(self.teams))
+
+    @property
+    def column_names(self) -> list[str]:
+        """
+        statsmodels' names for the columns: "Intercept", "home",
+        "C(team)[T.<team>]" (attack), "C(opponent)[T.<team>]" (defence).
+        """
+        others = list(self.teams[1:])
+        return [
+            "Intercept",
+            "home",
+            *(f"C(team)[T.{t}]" for t in others),
+            *(f"C(opponent)[T.{t}]" for t in others),
+        ]
+
+    @property
+    def formula_order(self) -> np.ndarray:
+        """
+        Column indices in the order of statsmodels' formula fit: intercept,
+        team terms, opponent terms, then home.
+        """
+        return np.r_[0, 2 : self.matrix.shape[1], 1]
+
+
+def _team_codes(df_goals: pd.DataFrame) -> tuple[pd.Index, np.ndarray, np.ndarray]:
+    """
+    The sorted teams of df_goals and the team / opponent code of each row.
+    """
+    team = pd.Categorical(df_goals["team"])
+    opponent = pd.Categorical(df_goals["opponent"])
+    teams = team.categories.union(opponent.categories)
+    team_codes = teams.get_indexer(team.categories)[team.codes]
+    opponent_codes = teams.get_indexer(opponent.categories)[opponent.codes]
+    return teams, team_codes, opponent_codes
+
+
+def build_goal_design(df_goals: pd.DataFrame) -> GoalDesign:
+    """
+    The CSR design matrix of a build_team_goal_dataset() table: every row
+    has at most four non-zeros (intercept, home, attack, defence).
+    """
+    teams, team_codes, opponent_codes = _team_codes(df_goals)
+    n_rows, n_teams = len(df_goals), len(teams)
+    row_ids = np.arange(n_rows)
+    home_rows = row_ids[df_goals["home"].to_numpy() == 1]
+    attack_rows = row_ids[team_codes > 0]
+    defence_rows = row_ids[opponent_codes > 0]
+
+    rows = np.concatenate([row_ids, home_rows, attack_rows, defence_rows])
+    cols = np.concatenate(
+        [
+            np.zeros(n_rows, dtype=np.int64),
+            np.ones(len(home_rows), dtype=np.int64),
+            1 + team_codes[attack_rows],             # attack of teams[c] -> column 1 + c
+            n_teams + opponent_codes[defence_rows],  # defence of teams[c] -> column n_teams + c
+        ]
+    )
+    matrix = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_rows, 2 * n_teams))
+    return GoalDesign(matrix=matrix, goals=df_goals["goals"].to_numpy(dtype=float), teams=teams)
+
+
+@dataclass
+class PoissonFit:
+    """
+    Maximum-likelihood fit of a GoalDesign (see fit_poisson_model).
+
+    Keeps the parts of the statsmodels GLM results interface that callers
+    of fit_poisson_model use: params, bse, tvalues, pvalues, conf_int(),
+    nobs, df_model, df_resid, llf, deviance, aic and summary(), with the
+    same coefficient names and order.
+    """
+
+    design: GoalDesign
+    coefficients: np.ndarray   # one per design column
+    std_errors: np.ndarray
+    deviance: float
+    llf: float                 # log-likelihood
+    n_iter: int
+    converged: bool
+
+    def _series(self, values: np.ndarray) -> pd.Series:
+        order = self.design.formula_order
+        return pd.Series(values[order], index=np.asarray(self.design.column_names)[order])
+
+    @property
+    def params(self) -> pd.Series:
+        return self._series(self.coefficients)
+
+    @property
+    def bse(self) -> pd.Series:
+        return self._series(self.std_errors)
+
+    @property
+    def tvalues(self) -> pd.Series:
+        return self.params / self.bse
+
+    @property
+    def pvalues(self) -> pd.Series:
+        tvalues = self.tvalues
+        return pd.Series(2 * norm.sf(np.abs(tvalues)), index=tvalues.index)
+
+    def conf_int(self, alpha: float = 0.05) -> pd.DataFrame:
+        half_width = norm.ppf(1 - alpha / 2) * self.bse
+        return pd.DataFrame({0: self.params - half_width, 1: self.params + half_width})
+
+    @property
+    def nobs(self) -> int:
+        return self.design.matrix.shape[0]
+
+    @property
+    def df_model(self) -> int:
+        return self.design.matrix.shape[1] - 1
+
+    @property
+    def df_resid(self) -> int:
+        return self.nobs - self.design.matrix.shape[1]
+
+    @property
+    def aic(self) -> float:
+        return -2 * self.llf + 2 * self.design.matrix.shape[1]
+
+    def summary(self) -> str:
+        lines = [
+            "Poisson regression: goals ~ home + C(team) + C(opponent)",
+            f"Observations: {self.nobs}   Teams: {len(self.design.teams)} (reference: {self.design.teams[0]})",
+            f"Parameters: {self.df_model + 1}   Residual df: {self.df_resid}",
+            f"Log-likelihood: {self.llf:.3f}   Deviance: {self.deviance:.3f}   AIC: {self.aic:.3f}",
+            f"Iterations: {self.n_iter}   Converged: {self.converged}",
+            "",
+        ]
+        table = pd.DataFrame(
             {
-                "team": row["away_team"],
-                "opponent": row["home_team"],
-                "home": 0,
-                "goals": row["away_score"],
+                "coef": self.params,
+                "std err": self.bse,
+                "z": self.tvalues,
+                "P>|z|": self.pvalues,
+                "[0.025": self.conf_int()[0],
+                "0.975]": self.conf_int()[1],
             }
         )
+        lines.append(table.to_string(float_format=lambda v: f"{v:.4f}"))
+        return "\n".join(lines)
+
+
+def _poisson_deviance(y: np.ndarray, mu: np.ndarray) -> float:
+    ratio = np.where(y > 0, y / mu, 1.0)
+    return float(2.0 * np.sum(y * np.log(ratio) - (y - mu)))
+
+
+def fit_goal_design(design: GoalDesign, max_iter: int = 100, tol: float = 1e-8) -> PoissonFit:
+    """
+    Poisson log-link GLM on the sparse design by Newton / IRLS steps.
+
+    Only X^T W X (2 * n_teams square) is dense; the deviance convergence
+    test is the one statsmodels' IRLS uses, so the estimates agree with
+    smf.glm on the same formula. If no step halving lowers the deviance,
+    the fit stops at the previous estimates with converged=False.
+    """
+    X, y = design.matrix, design.goals
+    Xt = X.T.tocsr()
+
+    beta = np.zeros(X.shape[1])
+    beta[0] = np.log(y.mean())
+    mu = np.exp(X @ beta)
+    deviance = _poisson_deviance(y, mu)
+    converged = False
+
+    for n_iter in range(1, max_iter + 1):
+        hessian = (Xt @ X.multiply(mu[:, None]).tocsr()).toarray()
+        step = scipy.linalg.cho_solve(scipy.linalg.cho_factor(hessian), Xt @ (y - mu))
 
-    return pd.DataFrame(rows)
+        # halve the step until the deviance does not increase; if it never
+        # does, keep the last estimates and report no convergence
+        for _ in range(30):
+            new_beta = beta + step
+            new_mu = np.exp(X @ new_beta)
+            new_deviance = _poisson_deviance(y, new_mu)
+            if new_deviance <= deviance:
+                break
+            step /= 2
+        else:
+            break
 
+        beta, mu = new_beta, new_mu
+        change = abs(new_deviance - deviance) / (abs(new_deviance) + 0.1)
+        deviance = new_deviance
+        if change < tol:
+            converged = True
+            break
 
-def fit_poisson_model(matches: pd.DataFrame):
+    hessian = (Xt @ X.multiply(mu[:, None]).tocsr()).toarray()
+    cov = scipy.linalg.cho_solve(scipy.linalg.cho_factor(hessian), np.eye(len(beta)))
+    llf = float(np.sum(y * np.log(mu) - mu - gammaln(y + 1)))
+
+    return PoissonFit(
+        design=design,
+        coefficients=beta,
+        std_errors=np.sqrt(np.diag(cov)),
+        deviance=deviance,
+        llf=llf,
+        n_iter=n_iter,
+        converged=converged,
+    )
+
+
+def fit_poisson_model(matches: pd.DataFrame) -> PoissonFit:
     """
     Fit a Poisson regression model:
         goals ~ home + C(team) + C(opponent)
@@ -59,63 +282,36 @@ def fit_poisson_model(matches: pd.DataFrame):
     - home advantage (home)
     """
     df_goals = build_team_goal_dataset(matches)
+    return fit_goal_design(build_goal_design(df_goals))
 
-    model = smf.glm(
-        formula="goals ~ home + C(team) + C(opponent)",
-        data=df_goals,
-        family=sm.families.Poisson(),
-    )
-    result = model.fit()
-    return result
 
-
-def extract_team_parameters(result) -> pd.DataFrame:
+def extract_team_parameters(result: PoissonFit) -> pd.DataFrame:
     """
     From the fitted model, extract per-team attack and defence parameters.
 
     log(λ_team_vs_opponent) ≈ Intercept + home*β_home + attack_team + defence_opponent
 
-    Where:
-    - attack_team  comes from C(team)[T.team]
-    - defence_team comes from C(opponent)[T.team]
-    The reference team (alphabetically first) has 0 for attack/defence by construction.
+    Attack and defence are read from the design's team columns. The
+    reference team (alphabetically first) has 0 for attack/defence by
+    construction.
     """
-    params = result.params
-
-    intercept = params.get("Intercept", 0.0)
-    home_adv = params.get("home", 0.0)
-
-    # All parameter names for team attack and opponent defence
-    attack_coefs = {k: v for k, v in params.items() if k.startswith("C(team)[T.")}
-    defence_coefs = {k: v for k, v in params.items() if k.startswith("C(opponent)[T.")}
-
-    # Get team names from the coefficient labels
-    def _extract_name(prefix: str, full: str) -> str:
-        # e.g. "C(team)[T.Brazil]" -> "Brazil"
-        return full.replace(prefix, "").rstrip("]")
+    design, coefs = result.design, result.coefficients
+    n_teams = len(design.teams)
 
-    attack_teams = { _extract_name("C(team)[T.", k): v for k, v in attack_coefs.items() }
-    defence_teams = { _extract_name("C(opponent)[T.", k): v for k, v in defence_coefs.items() }
+    attack = np.zeros(n_teams)
+    defence = np.zeros(n_teams)
+    attack[1:] = coefs[design.attack_columns]
+    defence[1:] = coefs[design.defence_columns]
 
-    # Collect all teams that appear in either side
-    all_teams = sorted(set(list(attack_teams.keys()) + list(defence_teams.keys())))
-
-    rows = []
-    for team in all_teams:
-        att = attack_teams.get(team, 0.0)   # reference team -> 0
-        defe = defence_teams.get(team, 0.0)
-
-        rows.append(
-            {
-                "team": team,
-                "attack": att,
-                "defence": defe,
-                "intercept": intercept,
-                "home_advantage": home_adv,
-            }
-        )
-
-    df_params = pd.DataFrame(rows)
+    df_params = pd.DataFrame(
+        {
+            "team": np.asarray(design.teams, dtype=object),
+            "attack": attack,
+            "defence": defence,
+            "intercept": coefs[0],
+            "home_advantage": coefs[1],
+        }
+    )
     return df_params
 
 
@@ -138,3 +334,6 @@ def fit_and_save_model():
     out_path = os.path.join(DATA_PROCESSED_DIR, "team_params_poisson.csv")
     team_params.to_csv(out_path, index=False)
     print(f"\nSaved team parameters to {out_path}")
+
+    # drop cached parameters / scoreline matrices from the previous fit
+    reload_team_params()
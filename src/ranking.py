@@ -0,0 +1,300 @@
+# src/ranking.py
+
+import numpy as np
+
+# Group-ranking rules: "fifa" breaks points ties on head-to-head results
+# among the tied teams (re-applied to teams still level), then overall
+# goal difference and goals scored, then a random draw; "basic" uses
+# points, goal difference, goals scored, then team (as the reference
+# simulators do).
+TIEBREAKERS = ("fifa", "basic")
+
+# Simulations ranked together by rank_groups (keeps the keys in cache)
+RANK_BLOCK_SIZE = 2048
+
+
+def composite_key(keys: list[np.ndarray]) -> np.ndarray:
+    """
+    Pack several integer keys (primary first, bigger is better) into one
+    int64 key that orders identically. Each key is shifted to start at 0 and
+    given just enough room for its observed range.
+    """
+    out = np.zeros(np.broadcast_shapes(*(np.shape(k) for k in keys)), dtype=np.int64)
+    for k in keys:
+        k = np.asarray(k, dtype=np.int64)
+        low = int(k.min()) if k.size else 0
+        width = (int(k.max()) - low + 1) if k.size else 1
+        out = out * width + (k - low)
+    return out
+
+
+def rank_groups(
+    points: np.ndarray,
+    gd: np.ndarray,
+    gf: np.ndarray,
+    group_members: np.ndarray,
+    tiebreak: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Finishing position (1 = group winner) of every team in every simulation.
+
+    points, gd, gf: (n_sim, n_teams) integer arrays.
+    group_members: (n_groups, k) team indices of each group.
+    tiebreak: integer last-resort key, bigger is better; broadcastable to
+        (n_sim, n_teams), and distinct within every group. Defaults to the
+        team index, which reproduces the reference simulators'
+        sorted(..., reverse=True) on the team name.
+
+    All groups are ranked at once, RANK_BLOCK_SIZE simulations at a time:
+    with distinct composite keys, a team's position is one plus the number
+    of its group's teams with a bigger key.
+    """
+    if tiebreak is None:
+        tiebreak = np.arange(points.shape[1])
+    tiebreak = np.broadcast_to(tiebreak, points.shape)
+    members = group_members.ravel()
+
+    positions = np.empty(points.shape, dtype=np.int64)
+    for start in range(0, len(points), RANK_BLOCK_SIZE):
+        rows = slice(start, start + RANK_BLOCK_SIZE)
+        key = composite_key([points[rows], gd[rows], gf[rows], tiebreak[rows]])
+        group_keys = key[:, group_members]                  # (rows, n_groups, k)
+        local_positions = np.ones(group_keys.shape, dtype=np.int64)
+        for j in range(group_members.shape[1]):
+            local_positions += group_keys[..., j, None] > group_keys
+        positions[rows, members] = local_positions.reshape(len(key), -1)
+    return positions
+
+
+def _beaten_by(key: np.ndarray) -> np.ndarray:
+    """
+    (m, k) number of teams in the same row with a bigger key (0 = best);
+    teams level on key share a value.
+    """
+    beaten = np.zeros(key.shape, dtype=np.int64)
+    for j in range(key.shape[1]):
+        beaten += key[:, j, None] > key
+    return beaten
+
+
+def _group_match_layout(group_members: np.ndarray, home: np.ndarray, away: np.ndarray, n_teams: int):
+    """
+    (n_groups, matches per group) match ids of each group in group_members,
+    with the within-group index (column of group_members) of every match's
+    home and away team.
+    """
+    n_groups, k = group_members.shape
+    team_group = np.full(n_teams, -1, dtype=np.intp)
+    team_group[group_members] = np.arange(n_groups)[:, None]
+    local = np.zeros(n_teams, dtype=np.intp)
+    local[group_members] = np.arange(k)
+
+    match_group = team_group[home]
+    in_groups = np.flatnonzero(match_group >= 0)
+    matches = in_groups[np.argsort(match_group[in_groups], kind="stable")].reshape(n_groups, -1)
+    return matches, local[home], local[away]
+
+
+def _has_level_teams(values: np.ndarray) -> np.ndarray:
+    """
+    (m,) True where two of the k values of a row are equal.
+    """
+    k = values.shape[1]
+    level = np.zeros(len(values), dtype=bool)
+    for i in range(k):
+        for j in range(i + 1, k):
+            level |= values[:, i] == values[:, j]
+    return level
+
+
+def _head_to_head(
+    level: np.ndarray,
+    goals_home: np.ndarray,
+    goals_away: np.ndarray,
+    local_home: np.ndarray,
+    local_away: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (m, k) points, goal difference and goals scored of every team of one
+    group in the matches against teams with the same `level` value (its
+    mini-table).
+
+    goals_home, goals_away: (m, n_group_matches) scores of the group's
+    matches; local_home, local_away: their teams' within-group indices.
+    """
+    k = level.shape[1]
+    home_incidence = np.eye(k)[local_home]
+    away_incidence = np.eye(k)[local_away]
+
+    among = level[:, local_home] == level[:, local_away]
+    gh = np.where(among, goals_home, 0).astype(np.float64)
+    ga = np.where(among, goals_away, 0).astype(np.float64)
+    draws = among & (gh == ga)
+    points_home = 3.0 * (gh > ga) + draws
+    points_away = 3.0 * (ga > gh) + draws
+
+    # Small integer sums, so the float matrix products are exact
+    points = points_home @ home_incidence + points_away @ away_incidence
+    gf = gh @ home_incidence + ga @ away_incidence
+    conceded = ga @ home_incidence + gh @ away_incidence
+    return points.astype(np.int64), (gf - conceded).astype(np.int64), gf.astype(np.int64)
+
+
+def _break_ties(
+    level: np.ndarray,
+    goals_home: np.ndarray,
+    goals_away: np.ndarray,
+    local_home: np.ndarray,
+    local_away: np.ndarray,
+) -> np.ndarray:
+    """
+    Refine the (m, k) levels of one group's teams (equal = still tied) by
+    head-to-head mini-tables among level teams, re-applied to the teams a
+    pass leaves level. Each pass can only split sets of level teams, so
+    k - 1 passes suffice; later passes only revisit rows the previous pass
+    split without settling.
+    """
+    level = level.copy()
+    active = np.arange(len(level))
+    for _ in range(level.shape[1] - 1):
+        h2h = _head_to_head(level[active], goals_home[active], goals_away[active], local_home, local_away)
+        refined = _beaten_by(composite_key([-level[active], *h2h]))
+        split = (refined != level[active]).any(axis=-1)
+        level[active] = refined
+        active = active[split & _has_level_teams(refined)]
+        if not len(active):
+            break
+    return level
+
+
+def rank_groups_fifa(
+    points: np.ndarray,
+    gd: np.ndarray,
+    gf: np.ndarray,
+    goals_home: np.ndarray,
+    goals_away: np.ndarray,
+    group_members: np.ndarray,
+    home: np.ndarray,
+    away: np.ndarray,
+    rng: np.random.Generator | None,
+    draw: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    rank_groups with the FIFA tie-breaking rules.
+
+    Teams level on points are separated by their head-to-head points, goal
+    difference and goals scored in the matches among them; if some are
+    still level, those criteria are applied again to the matches among
+    just those teams. Then overall goal difference, goals scored and a
+    drawing of lots: a random permutation per group from rng, unless an
+    (n_sim, n_teams) integer `draw` key (bigger is better) is given.
+
+    goals_home, goals_away: (n_sim, n_matches) scores of the matches
+    whose teams are listed in home / away.
+
+    Groups are ranked one at a time by points; the tie-breaks then only
+    run on the simulations where that group has teams level on points.
+    """
+    layout, local_home, local_away = _group_match_layout(group_members, home, away, points.shape[1])
+    k = group_members.shape[1]
+
+    # Team-major copies: the rows of a group's teams are then contiguous
+    points_by_team = np.ascontiguousarray(points.T)
+    positions_by_team = np.empty_like(points_by_team)
+
+    for members, matches in zip(group_members, layout):
+        group_points = points_by_team[members].T                 # (n_sim, k)
+        level = _beaten_by(group_points)
+        sims = np.flatnonzero(_has_level_teams(group_points))
+        if len(sims):
+            rows = sims[:, None]
+            tied = _break_ties(
+                level[sims],
+                goals_home[rows, matches],
+                goals_away[rows, matches],
+                local_home[matches],
+                local_away[matches],
+            )
+            if draw is None:
+                group_draw = rng.permuted(np.broadcast_to(np.arange(k), (len(sims), k)), axis=-1)
+            else:
+                group_draw = draw[rows, members]
+            # the draw makes every key distinct, so counting better teams ranks them
+            key = composite_key([-tied, gd[rows, members], gf[rows, members], group_draw])
+            level[sims] = _beaten_by(key)
+        positions_by_team[members] = level.T + 1
+    return positions_by_team.T
+
+
+def rank_fixture_groups(
+    compiled,
+    points: np.ndarray,
+    gd: np.ndarray,
+    gf: np.ndarray,
+    goals_home: np.ndarray,
+    goals_away: np.ndarray,
+    rng: np.random.Generator | None,
+    group_members: np.ndarray | None = None,
+    draw: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Rank the groups of compiled fixtures with their tie-breaking rules
+    (compiled.tiebreakers, one of TIEBREAKERS); group_members restricts the
+    ranking to some groups (the other teams' positions are undefined).
+    """
+    if group_members is None:
+        group_members = compiled.group_members
+    if compiled.tiebreakers == "basic":
+        return rank_groups(points, gd, gf, group_members)
+    return rank_groups_fifa(
+        points, gd, gf, goals_home, goals_away, group_members, compiled.home, compiled.away, rng, draw
+    )
+
+
+def teams_in_position(positions: np.ndarray, group_members: np.ndarray, position: int) -> np.ndarray:
+    """
+    (n_sim, n_groups) index of the team finishing in `position` in each group.
+    """
+    members_positions = positions[:, group_members]      # (n_sim, n_groups, k)
+    local = np.argmax(members_positions == position, axis=-1)
+    return group_members[np.arange(group_members.shape[0]), local]
+
+
+def rank_third_placed(
+    positions: np.ndarray,
+    points: np.ndarray,
+    gd: np.ndarray,
+    gf: np.ndarray,
+    group_members: np.ndarray,
+    rng: np.random.Generator | None,
+    n_best: int = 8,
+    draw: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rank the third-placed teams across groups by points, goal difference,
+    goals scored, then a random draw.
+
+    The draw is a random permutation per simulation from rng, unless an
+    (n_sim, n_groups) integer `draw` key (bigger is better) is given.
+
+    Returns:
+      - third_teams: (n_sim, n_groups) third-placed team of each group
+      - best_thirds: (n_sim, n_best) team indices of the best thirds, best first
+    """
+    third_teams = teams_in_position(positions, group_members, 3)
+    rows = np.arange(third_teams.shape[0])[:, None]
+
+    if draw is None:
+        # A random permutation per simulation gives a unique integer draw key
+        draw = rng.permuted(np.broadcast_to(np.arange(third_teams.shape[1]), third_teams.shape), axis=-1)
+    key = composite_key(
+        [
+            points[rows, third_teams],
+            gd[rows, third_teams],
+            gf[rows, third_teams],
+            draw,
+        ]
+    )
+    order = np.lexsort((-key,), axis=-1)
+    best_thirds = np.take_along_axis(third_teams, order[:, :n_best], axis=-1)
+    return third_teams, best_thirds
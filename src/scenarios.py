@@ -0,0 +1,248 @@
+# src/scenarios.py
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .bracket_wc2026 import check_third_place_table, place_in_bracket
+from .fixtures_wc2026 import load_group_stage_fixtures
+from .group_simulation import CompiledFixtures, compile_fixtures, group_stage_totals
+from .knockout import (
+    ROUND_F,
+    ROUND_GROUP,
+    ROUND_QF,
+    ROUND_R16,
+    ROUND_SF,
+    ROUND_W,
+    inverse_poisson_cdf,
+    neutral_lambda_matrix,
+    poisson_cdf_table,
+    simulate_knockout_inverse_cdf,
+)
+from .match_prediction import TEAM_PARAMS_PATH, CompiledTeamParams
+from .ranking import rank_fixture_groups, rank_third_placed
+from .tournament_kernel import MEAN_COLUMNS, TOURNAMENT_PROB_COLUMNS
+
+# Simulations per block in paired runs (the inverse-CDF draws are wider
+# than plain Poisson draws, so blocks are smaller than BLOCK_SIZE)
+CRN_BLOCK_SIZE = 10_000
+
+# Number of knockout matches in a 32-team bracket
+N_KNOCKOUT_MATCHES = 31
+
+
+@dataclass
+class Scenario:
+    """
+    One model configuration to simulate: a fixture list and team parameters.
+    """
+
+    name: str
+    fixtures: pd.DataFrame
+    params: CompiledTeamParams
+
+
+def make_scenario(
+    name: str,
+    params_path: str = TEAM_PARAMS_PATH,
+    replace_teams: dict[str, str] | None = None,
+) -> Scenario:
+    """
+    Build a scenario from a params file and the WC 2026 fixtures, optionally
+    swapping teams (e.g. a different playoff winner, {"Italy": "Wales"}).
+    """
+    fixtures = load_group_stage_fixtures()
+    if replace_teams:
+        fixtures["home_team"] = fixtures["home_team"].replace(replace_teams)
+        fixtures["away_team"] = fixtures["away_team"].replace(replace_teams)
+    params = CompiledTeamParams.from_frame(pd.read_csv(params_path))
+    return Scenario(name=name, fixtures=fixtures, params=params)
+
+
+@dataclass
+class _CompiledScenario:
+    compiled: CompiledFixtures
+    cdf_home: np.ndarray   # (n_matches, K) group-stage goal CDFs
+    cdf_away: np.ndarray
+    goal_cdf: np.ndarray   # (n_teams, n_teams, K) neutral knockout goal CDFs
+
+
+def _compile_scenario(scenario: Scenario) -> _CompiledScenario:
+    compiled = compile_fixtures(scenario.fixtures, scenario.params)
+    lambda_matrix = neutral_lambda_matrix(scenario.params, compiled.param_ids)
+
+    # Cap goals far enough out that the lost tail is negligible (< 1e-12)
+    max_lambda = max(lambda_matrix.max(), compiled.lambda_home.max(), compiled.lambda_away.max())
+    max_goals = int(max_lambda + 12 * np.sqrt(max_lambda) + 15)
+
+    return _CompiledScenario(
+        compiled=compiled,
+        cdf_home=poisson_cdf_table(compiled.lambda_home, max_goals),
+        cdf_away=poisson_cdf_table(compiled.lambda_away, max_goals),
+        goal_cdf=poisson_cdf_table(lambda_matrix, max_goals),
+    )
+
+
+def _draw_common_randomness(
+    n_sim: int, n_matches: int, n_groups: int, group_size: int, rng: np.random.Generator
+) -> dict:
+    """
+    Every random input of one tournament, drawn once and shared by all scenarios.
+    """
+    return {
+        "u_group": rng.random((n_sim, 2, n_matches)),
+        # drawing of lots within groups, by slot in group_members
+        "group_draw": rng.permuted(
+            np.broadcast_to(np.arange(group_size), (n_sim, n_groups, group_size)), axis=-1
+        ),
+        "third_draw": rng.permuted(np.broadcast_to(np.arange(n_groups), (n_sim, n_groups)), axis=-1),
+        "u_knockout": rng.random((n_sim, 2, N_KNOCKOUT_MATCHES)),
+        "u_penalties": rng.random((n_sim, N_KNOCKOUT_MATCHES)),
+    }
+
+
+def _simulate_with_common_randomness(sc: _CompiledScenario, randomness: dict) -> dict:
+    """
+    One scenario's block of tournaments driven by the shared random inputs.
+    Returns per-simulation metric arrays (n_sim, n_teams) keyed by summary column.
+    """
+    compiled = sc.compiled
+    u_group = randomness["u_group"]
+    goals_home = inverse_poisson_cdf(u_group[:, 0, :], sc.cdf_home)
+    goals_away = inverse_poisson_cdf(u_group[:, 1, :], sc.cdf_away)
+
+    points, gf, ga = group_stage_totals(compiled, goals_home, goals_away)
+    gd = gf - ga
+    draw = np.empty_like(points)
+    draw[:, compiled.group_members] = randomness["group_draw"]
+    positions = rank_fixture_groups(compiled, points, gd, gf, goals_home, goals_away, None, draw=draw)
+
+    third_teams, best_thirds = rank_third_placed(
+        positions, points, gd, gf, compiled.group_members, None, draw=randomness["third_draw"]
+    )
+    qualifiers = place_in_bracket(compiled, positions, third_teams, best_thirds)
+
+    rounds = simulate_knockout_inverse_cdf(
+        qualifiers, sc.goal_cdf, randomness["u_knockout"], randomness["u_penalties"]
+    )
+
+    return {
+        "exp_points": points,
+        "exp_gd": gd,
+        "exp_gf": gf,
+        "prob_1st": positions == 1,
+        "prob_2nd": positions == 2,
+        "prob_3rd": positions == 3,
+        "prob_4th": positions == 4,
+        "prob_qual": rounds != ROUND_GROUP,
+        "prob_R16": rounds == ROUND_R16,
+        "prob_QF": rounds == ROUND_QF,
+        "prob_SF": rounds == ROUND_SF,
+        "prob_F": rounds == ROUND_F,
+        "prob_W": rounds == ROUND_W,
+    }
+
+
+def compare_scenarios(
+    scenario_a: Scenario,
+    scenario_b: Scenario,
+    n_sim: int = 10_000,
+    random_seed: int = 123,
+) -> pd.DataFrame:
+    """
+    Paired (common-random-numbers) comparison of two tournament scenarios.
+
+    Both scenarios are driven by the same uniforms: group and knockout goals
+    by inverse-CDF Poisson sampling, plus the same drawing of lots in
+    groups and among third-placed teams and the same penalty coins (the
+    bracket follows from the group results). Their per-simulation outcomes
+    are therefore strongly correlated and the differences have far smaller
+    Monte Carlo error than two independent runs. Both fixture lists must
+    have the same layout (same groups and match order).
+
+    Returns a long DataFrame with one row per (team, metric):
+      team, metric, value_a, value_b, delta (b - a), delta_se (paired),
+      independent_se (what two independent runs of n_sim would give)
+    A team missing from one scenario counts as never reaching anything there.
+    """
+    sc_a = _compile_scenario(scenario_a)
+    sc_b = _compile_scenario(scenario_b)
+    fifa_table = check_third_place_table(sc_a.compiled.groups)
+    if not (
+        np.array_equal(sc_a.compiled.match_group, sc_b.compiled.match_group)
+        and sc_a.compiled.groups == sc_b.compiled.groups
+    ):
+        raise ValueError("Scenarios must share the same fixture layout")
+
+    teams = sorted(set(sc_a.compiled.teams) | set(sc_b.compiled.teams))
+    team_index = {t: i for i, t in enumerate(teams)}
+    cols_a = np.array([team_index[t] for t in sc_a.compiled.teams])
+    cols_b = np.array([team_index[t] for t in sc_b.compiled.teams])
+    metrics = list(MEAN_COLUMNS) + list(TOURNAMENT_PROB_COLUMNS)
+
+    sum_a, sumsq_a, sum_b, sumsq_b, sum_d, sumsq_d = (
+        {m: np.zeros(len(teams)) for m in metrics} for _ in range(6)
+    )
+
+    rng = np.random.default_rng(random_seed)
+    for start in range(0, n_sim, CRN_BLOCK_SIZE):
+        block = min(CRN_BLOCK_SIZE, n_sim - start)
+        randomness = _draw_common_randomness(
+            block, sc_a.compiled.n_matches, sc_a.compiled.n_groups, sc_a.compiled.group_members.shape[1], rng
+        )
+        out_a = _simulate_with_common_randomness(sc_a, randomness)
+        out_b = _simulate_with_common_randomness(sc_b, randomness)
+
+        for m in metrics:
+            values_a = np.zeros((block, len(teams)))
+            values_b = np.zeros((block, len(teams)))
+            values_a[:, cols_a] = out_a[m]
+            values_b[:, cols_b] = out_b[m]
+            diff = values_b - values_a
+
+            sum_a[m] += values_a.sum(axis=0)
+            sumsq_a[m] += (values_a**2).sum(axis=0)
+            sum_b[m] += values_b.sum(axis=0)
+            sumsq_b[m] += (values_b**2).sum(axis=0)
+            sum_d[m] += diff.sum(axis=0)
+            sumsq_d[m] += (diff**2).sum(axis=0)
+
+    n = float(n_sim)
+
+    def _variance(total, sumsq):
+        return np.maximum(sumsq / n - (total / n) ** 2, 0.0)
+
+    in_a = np.isin(np.arange(len(teams)), cols_a)
+    in_b = np.isin(np.arange(len(teams)), cols_b)
+
+    frames = []
+    for m in metrics:
+        value_a = sum_a[m] / n
+        value_b = sum_b[m] / n
+        if m in MEAN_COLUMNS:
+            # expectations are undefined for a team that is not in the scenario
+            value_a = np.where(in_a, value_a, np.nan)
+            value_b = np.where(in_b, value_b, np.nan)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "team": teams,
+                    "metric": m,
+                    "value_a": value_a,
+                    "value_b": value_b,
+                    "delta": value_b - value_a,
+                    "delta_se": np.sqrt(_variance(sum_d[m], sumsq_d[m]) / n),
+                    "independent_se": np.sqrt(
+                        (_variance(sum_a[m], sumsq_a[m]) + _variance(sum_b[m], sumsq_b[m])) / n
+                    ),
+                }
+            )
+        )
+
+    df = pd.concat(frames, ignore_index=True)
+    df.attrs["scenario_a"] = scenario_a.name
+    df.attrs["scenario_b"] = scenario_b.name
+    df.attrs["n_sim"] = n_sim
+    df.attrs["fifa_third_place_table"] = fifa_table
+    return df
@@ -0,0 +1,216 @@
+# src/shared_tables.py
+
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from . import instrumentation
+from .group_simulation import CompiledFixtures
+from .tournament_kernel import simulate_chunk
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# CompiledFixtures fields that are arrays (the rest is passed as metadata)
+FIXTURE_ARRAYS = (
+    "team_group",
+    "group_members",
+    "param_ids",
+    "home",
+    "away",
+    "match_group",
+    "neutral",
+    "lambda_home",
+    "lambda_away",
+    "home_goals",
+    "away_goals",
+    "bracket",
+    "knockout_outcomes",
+)
+
+
+class SharedTables:
+    """
+    Owner of NumPy arrays published into multiprocessing.shared_memory.
+
+    `spec` maps each array name to (segment name, shape, dtype) and is all
+    a worker needs to attach with attach_tables(). Use as a context manager
+    so the segments are unlinked when the pool is done.
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray]):
+        self.spec = {}
+        self._segments = []
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+            self._segments.append(shm)
+            self.spec[name] = (shm.name, array.shape, array.dtype.str)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(shm.size for shm in self._segments)
+
+    def close(self) -> None:
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+
+    def __enter__(self) -> "SharedTables":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach_tables(spec: dict) -> tuple[dict[str, np.ndarray], list]:
+    """
+    Zero-copy views on published arrays. The returned segments must be kept
+    alive for as long as the arrays are used.
+    """
+    arrays = {}
+    segments = []
+    for name, (shm_name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        segments.append(shm)
+    return arrays, segments
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+# Per-process state of a pool worker, filled by _init_worker
+_WORKER = {}
+
+
+def _init_worker(spec: dict, meta: dict, pool_created: float) -> None:
+    start = time.perf_counter()
+    arrays, segments = attach_tables(spec)
+
+    _WORKER["segments"] = segments
+    _WORKER["compiled"] = CompiledFixtures(
+        teams=meta["teams"],
+        groups=meta["groups"],
+        tiebreakers=meta["tiebreakers"],
+        **{name: arrays[name] for name in FIXTURE_ARRAYS},
+    )
+    _WORKER["lambda_matrix"] = arrays["lambda_matrix"]
+    _WORKER["knockout"] = meta["knockout"]
+    _WORKER["store"] = meta["store"]
+    _WORKER["instrument"] = meta["instrument"]
+    _WORKER["engine"] = meta["engine"]
+    _WORKER["stats"] = {
+        "pid": os.getpid(),
+        "startup_s": time.time() - pool_created,
+        "attach_s": time.perf_counter() - start,
+        "rss_after_attach_mb": _peak_rss_mb(),
+        "pandas_imported": "pandas" in sys.modules,
+        "chunks": 0,
+    }
+
+
+def _run_chunk(task: tuple) -> tuple:
+    n_sim, seed_seq, start = task
+    recording = instrumentation.instrument() if _WORKER["instrument"] else nullcontext()
+    with recording as inst:
+        counts = simulate_chunk(
+            _WORKER["compiled"],
+            _WORKER["lambda_matrix"],
+            n_sim,
+            seed_seq,
+            _WORKER["knockout"],
+            _WORKER["store"],
+            start,
+            _WORKER["engine"],
+        )
+
+    stats = _WORKER["stats"]
+    stats["chunks"] += 1
+    stats["peak_rss_mb"] = _peak_rss_mb()
+    if inst is not None:
+        return counts, dict(stats, instrumentation=inst.as_dict())
+    return counts, dict(stats)
+
+
+def publish_model_tables(compiled: CompiledFixtures, lambda_matrix: np.ndarray) -> SharedTables:
+    """
+    Publish the λ pair matrix and the compiled fixture arrays (which carry
+    the group-match λs) into shared memory: all the model a worker needs.
+    """
+    arrays = {"lambda_matrix": lambda_matrix}
+    arrays.update({name: getattr(compiled, name) for name in FIXTURE_ARRAYS})
+    return SharedTables(arrays)
+
+
+def iter_chunks_in_pool(
+    compiled: CompiledFixtures,
+    lambda_matrix: np.ndarray,
+    tasks,
+    workers: int,
+    start_method: str | None = None,
+    knockout: str = "sample",
+    store: str | None = None,
+    engine: str = "auto",
+):
+    """
+    Run (n_sim, seed_seq, first row) chunks on a process pool whose workers
+    attach to the model tables in shared memory instead of receiving
+    pickled copies.
+
+    tasks may be a lazy iterable; at most 2 * workers chunks are in flight.
+    knockout, store and engine are passed to simulate_chunk by every
+    worker; with a store each worker writes its chunk's rows into the
+    shared memory-mapped columns directly.
+    Yields (TournamentCounts, worker stats) per chunk, in task order. The
+    stats dict describes the worker process that ran the chunk (pid,
+    startup_s, attach_s, peak_rss_mb, ...).
+    While src.instrumentation is recording, workers record their chunks
+    too and return the report under stats["instrumentation"].
+    """
+    meta = {
+        "teams": compiled.teams,
+        "groups": compiled.groups,
+        "tiebreakers": compiled.tiebreakers,
+        "knockout": knockout,
+        "store": store,
+        "instrument": instrumentation.active() is not None,
+        "engine": engine,
+    }
+    context = get_context(start_method) if start_method else None
+
+    with publish_model_tables(compiled, lambda_matrix) as tables:
+        shared_mb = tables.nbytes / 1024.0**2
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(tables.spec, meta, time.time()),
+        ) as pool:
+            in_flight = deque()
+            tasks = iter(tasks)
+            for task in tasks:
+                in_flight.append(pool.submit(_run_chunk, task))
+                if len(in_flight) >= 2 * workers:
+                    break
+
+            while in_flight:
+                counts, stats = in_flight.popleft().result()
+                for task in tasks:
+                    in_flight.append(pool.submit(_run_chunk, task))
+                    break
+                yield counts, dict(stats, shared_tables_mb=shared_mb)
@@ -0,0 +1,389 @@
+# src/simulation.py
+
+import numpy as np
+import pandas as pd
+
+from . import instrumentation
+from .bracket_wc2026 import check_third_place_table
+from .jit_kernel import resolve_engine
+from .knockout import neutral_lambda_matrix
+from .live_results import compile_live_fixtures
+from .match_prediction import TEAM_PARAMS_PATH, get_compiled_team_params
+from .outcome_store import create_outcome_store, set_stored_n_sim
+from .pair_table import file_sha256
+from .shared_tables import iter_chunks_in_pool
+from .tournament_kernel import (
+    GROUP_PROB_COLUMNS,
+    MEAN_COLUMNS,
+    TOURNAMENT_PROB_COLUMNS,
+    Z_95,
+    TournamentCounts,
+    simulate_chunk,
+)
+
+# Simulations per independently seeded chunk (the unit of parallel work,
+# and of the stopping checks in adaptive runs)
+CHUNK_SIZE = 50_000
+
+
+def _chunk_tasks(n_sim: int, random_seed: int, chunk_size: int):
+    """
+    Lazily yield (chunk n_sim, SeedSequence child, first row) for every
+    chunk. Spawning one child at a time gives the same streams as
+    spawn(n_chunks).
+    """
+    root = np.random.SeedSequence(random_seed)
+    for start in range(0, n_sim, chunk_size):
+        yield min(chunk_size, n_sim - start), root.spawn(1)[0], start
+
+
+def _resolve_targets(target_se, target_halfwidth, prob_columns) -> dict | None:
+    """
+    Per-column target standard errors, from either a target standard error
+    or a target 95% CI half-width (a float for every prob_* column, or a
+    dict {column: value} that may also name exp_* columns).
+    """
+    if target_se is not None and target_halfwidth is not None:
+        raise ValueError("Pass either target_se or target_halfwidth, not both")
+    target = target_se if target_se is not None else target_halfwidth
+    if target is None:
+        return None
+
+    if not isinstance(target, dict):
+        target = {col: target for col in prob_columns}
+    unknown = set(target) - set(prob_columns) - set(MEAN_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown summary columns in precision target: {sorted(unknown)}")
+
+    if target_halfwidth is not None:
+        target = {col: value / Z_95 for col, value in target.items()}
+    return target
+
+
+def _iter_summaries(compiled, chunk_results, prob_columns, targets):
+    """
+    Fold chunk counters into running totals and yield the running summary
+    DataFrame after each chunk. With targets, stop as soon as every tracked
+    column's largest standard error (over teams) is within its target.
+    """
+    running = TournamentCounts.zeros(compiled.n_teams)
+    worker_stats = {}
+
+    for counts, stats in chunk_results:
+        running = running + counts
+        if stats is not None:
+            report = stats.pop("instrumentation", None)
+            if report is not None and instrumentation.active() is not None:
+                instrumentation.active().merge(report)
+            worker_stats[stats["pid"]] = stats
+
+        with instrumentation.stage("summary"):
+            df = pd.DataFrame(running.summary_columns(compiled, prob_columns))
+        df.attrs["n_sim"] = running.n_sim
+        df.attrs["worker_stats"] = list(worker_stats.values())
+
+        if targets is not None:
+            errors = running.standard_errors(prob_columns)
+            achieved = {col: float(errors[col].max()) for col in targets}
+            converged = all(achieved[col] <= targets[col] for col in targets)
+            df.attrs["target_se"] = dict(targets)
+            df.attrs["achieved_se"] = achieved
+            df.attrs["converged"] = converged
+            yield df
+            if converged:
+                return
+        else:
+            yield df
+
+
+def simulate_group_stage(
+    n_sim: int = 10_000,
+    random_seed: int = 42,
+    chunk_size: int = CHUNK_SIZE,
+    target_se=None,
+    target_halfwidth=None,
+    results: pd.DataFrame | None = None,
+    tiebreakers: str = "fifa",
+    engine: str = "auto",
+) -> pd.DataFrame:
+    """
+    Vectorized Monte Carlo simulation of the World Cup 2026 group stage.
+
+    Same model and output as src.reference_simulation.simulate_group_stage,
+    but all matches of a block of simulations are drawn as one (n_sim, 72)
+    goal matrix and standings are computed with array scatters.
+
+    This runs the group stage on its own; simulate_tournament_summaries
+    gives the same summary from the draws of a full-tournament run.
+
+    Precision-targeted mode: with target_se (or target_halfwidth, the 95% CI
+    half-width) chunks are simulated until every tracked column meets its
+    target, with n_sim as the budget. df.attrs then reports "n_sim" used,
+    "achieved_se" and "converged".
+
+    results: matches already played (src.live_results); only the remaining
+    matches are sampled.
+
+    tiebreakers: "fifa" (head-to-head results first, then overall goal
+    difference, goals scored and a random draw) or "basic" (overall goal
+    difference, goals scored, team; the reference simulator's rules).
+
+    engine: "numpy", "numba" (src.jit_kernel) or "auto" (numba if installed).
+
+    Returns a DataFrame with, for each team:
+      - expected points, goal difference, goals scored
+      - probabilities of finishing 1st, 2nd, 3rd, 4th
+      - probability of advancing (1st or 2nd)
+      - 95% confidence limits of all of the above (<col>_lo, <col>_hi)
+    """
+    if n_sim <= 0:
+        raise ValueError("n_sim must be positive")
+
+    with instrumentation.stage("compile_fixtures"):
+        compiled = compile_live_fixtures(get_compiled_team_params(), results, tiebreakers=tiebreakers)
+    targets = _resolve_targets(target_se, target_halfwidth, GROUP_PROB_COLUMNS)
+
+    chunk_results = (
+        (simulate_chunk(compiled, None, size, seed, knockout="none", engine=engine), None)
+        for size, seed, _ in _chunk_tasks(n_sim, random_seed, chunk_size)
+    )
+    for df in _iter_summaries(compiled, chunk_results, GROUP_PROB_COLUMNS, targets):
+        pass
+    df.attrs["engine"] = resolve_engine(engine)
+    return df
+
+
+def iter_full_tournament(
+    n_sim: int = 10_000,
+    random_seed: int = 123,
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    start_method: str | None = None,
+    target_se=None,
+    target_halfwidth=None,
+    knockout: str = "sample",
+    results: pd.DataFrame | None = None,
+    bracket=None,
+    store: str | None = None,
+    prob_columns=TOURNAMENT_PROB_COLUMNS,
+    tiebreakers: str = "fifa",
+    engine: str = "auto",
+):
+    """
+    Streaming version of simulate_full_tournament.
+
+    Simulates chunk by chunk, folds each chunk into running integer counters
+    and discards the raw draws, so memory stays flat whatever n_sim is.
+    Yields the running summary DataFrame after every chunk (for progress
+    display); the last one is the final result. df.attrs holds "n_sim" (the
+    simulations done so far), "worker_stats" and "fifa_third_place_table"
+    (False when the bracket used the fallback allocation of the thirds,
+    which also raises a ThirdPlaceFallbackWarning).
+
+    With store (a directory, e.g. src.outcome_store.OUTCOME_STORE_DIR) the
+    per-simulation outcomes are kept as well; its meta.json "n_sim" follows
+    the simulations folded so far.
+
+    prob_columns picks the probability columns reported (and checked
+    against precision targets); any TournamentCounts event may be added,
+    e.g. "prob_advance".
+    """
+    if n_sim <= 0:
+        raise ValueError("n_sim must be positive")
+    engine = resolve_engine(engine)
+
+    params = get_compiled_team_params()
+    with instrumentation.stage("compile_fixtures"):
+        compiled = compile_live_fixtures(params, results, bracket, tiebreakers)
+    # a bracket fixed by the results needs no allocation of the thirds
+    fifa_table = len(compiled.bracket) > 0 or check_third_place_table(compiled.groups)
+    with instrumentation.stage("lambda_matrix"):
+        lambda_matrix = neutral_lambda_matrix(params, compiled.param_ids)
+    targets = _resolve_targets(target_se, target_halfwidth, prob_columns)
+
+    if store is not None:
+        if knockout != "sample":
+            raise ValueError('Per-simulation outcomes can only be stored with knockout="sample"')
+        run = {
+            "random_seed": random_seed,
+            "chunk_size": chunk_size,
+            "knockout": knockout,
+            "tiebreakers": tiebreakers,
+            "engine": engine,
+            "params_sha256": file_sha256(TEAM_PARAMS_PATH),
+            "n_results": 0 if results is None else len(results),
+        }
+        create_outcome_store(store, compiled, n_sim, run)
+
+    tasks = _chunk_tasks(n_sim, random_seed, chunk_size)
+    if workers is None or workers <= 1:
+        chunk_results = (
+            (simulate_chunk(compiled, lambda_matrix, size, seed, knockout, store, start, engine), None)
+            for size, seed, start in tasks
+        )
+    else:
+        chunk_results = iter_chunks_in_pool(
+            compiled, lambda_matrix, tasks, workers, start_method, knockout, store, engine
+        )
+
+    for df in _iter_summaries(compiled, chunk_results, prob_columns, targets):
+        df.attrs["knockout"] = knockout
+        df.attrs["engine"] = engine
+        df.attrs["fifa_third_place_table"] = fifa_table
+        if store is not None:
+            set_stored_n_sim(store, df.attrs["n_sim"])
+            df.attrs["store"] = store
+        yield df
+
+
+def simulate_full_tournament(
+    n_sim: int = 10_000,
+    random_seed: int = 123,
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    start_method: str | None = None,
+    target_se=None,
+    target_halfwidth=None,
+    knockout: str = "sample",
+    results: pd.DataFrame | None = None,
+    bracket=None,
+    store: str | None = None,
+    tiebreakers: str = "fifa",
+    engine: str = "auto",
+) -> pd.DataFrame:
+    """
+    Vectorized simulation of the full World Cup 2026 tournament
+    (group + knockout), n_sim times.
+
+    Same model and output as src.reference_simulation.simulate_full_tournament,
+    except that the Round of 32 follows the 2026 bracket
+    (src.bracket_wc2026) instead of a random draw.
+
+    To get the group-stage summary from the same draws, use
+    simulate_tournament_summaries (or src.engine).
+
+    The run is split into chunks of chunk_size simulations, each driven by
+    its own SeedSequence(random_seed).spawn child. With workers > 1 the
+    chunks run on a process pool; their integer counters are merged exactly,
+    so the result depends only on (random_seed, n_sim, chunk_size) and the
+    engine (below), not on the number of workers or the order chunks finish
+    in. Workers attach to
+    the model and fixture tables through shared memory (src.shared_tables);
+    their startup time and peak memory end up in df.attrs["worker_stats"].
+    start_method picks the multiprocessing start method ("fork", "spawn",
+    "forkserver"; default: the platform default).
+
+    Precision-targeted mode: with target_se (or target_halfwidth, the 95% CI
+    half-width) chunks are simulated until every tracked column meets its
+    target, with n_sim as the budget. df.attrs then reports "n_sim" used,
+    "achieved_se" and "converged".
+
+    knockout="exact" samples only the group stages and brackets; each
+    bracket is then solved exactly (src.knockout.knockout_round_probabilities)
+    and prob_R16 .. prob_W average those probabilities instead of counting
+    sampled exits. Same expectations, lower variance per simulation; their
+    intervals are normal intervals on the per-simulation probabilities.
+
+    Live forecasts: results holds the matches played so far
+    (src.live_results.load_results / record_result). Played group matches
+    keep their real score and only the remaining ones are sampled; groups
+    that are complete are ranked once and shared by all simulations, unless
+    teams are level down to the drawing of lots (drawn per simulation). Once
+    the group stage is over, bracket (the 32 qualifiers in bracket order)
+    fixes the Round of 32, and knockout ties already played keep their
+    real winner.
+
+    store: opt-in directory for per-simulation outcomes (group goals,
+    positions, qualified thirds, knockout winners; 90 bytes per tournament,
+    see src.outcome_store), for questions the marginal summaries cannot
+    answer. Requires knockout="sample".
+
+    tiebreakers: group-ranking rules, "fifa" (head-to-head first) or
+    "basic" (see simulate_group_stage).
+
+    engine: "numpy" (vectorized block kernels), "numba" (a compiled loop
+    over tournaments, src.jit_kernel) or "auto" (numba when installed). The
+    engines draw different random streams, so their results agree up to
+    Monte Carlo noise; df.attrs["engine"] says which one ran.
+
+    Returns a DataFrame with per-team:
+      - group
+      - expected group points, gd, gf
+      - prob_1st, prob_2nd, prob_3rd, prob_4th
+      - prob_qual (enter R32)
+      - prob_R16, prob_QF, prob_SF, prob_F, prob_W (champion),
+        where prob_R16 etc. is the probability of going out in that round
+      - 95% confidence limits of all of the above (<col>_lo, <col>_hi)
+    """
+    for df in iter_full_tournament(
+        n_sim,
+        random_seed,
+        workers,
+        chunk_size,
+        start_method,
+        target_se,
+        target_halfwidth,
+        knockout,
+        results,
+        bracket,
+        store,
+        tiebreakers=tiebreakers,
+        engine=engine,
+    ):
+        pass
+    return df
+
+
+def _summary_view(df: pd.DataFrame, prob_columns) -> pd.DataFrame:
+    """
+    The team / group, MEAN_COLUMNS and prob_columns estimates of a summary,
+    followed by their confidence limits.
+    """
+    estimates = [*MEAN_COLUMNS, *prob_columns]
+    limits = [f"{col}_{side}" for col in estimates for side in ("lo", "hi")]
+    view = df[["team", "group", *estimates, *limits]].copy()
+    view.attrs = dict(df.attrs)
+    return view
+
+
+def simulate_tournament_summaries(
+    n_sim: int = 10_000,
+    random_seed: int = 123,
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    start_method: str | None = None,
+    target_se=None,
+    target_halfwidth=None,
+    results: pd.DataFrame | None = None,
+    tiebreakers: str = "fifa",
+    engine: str = "auto",
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Group-stage and full-tournament summaries from one simulation run.
+
+    Both come from the same simulated tournaments, so they are consistent
+    with each other (the group summary's probabilities are those of the
+    full summary, plus prob_advance). Arguments as for
+    simulate_full_tournament; precision targets may name columns of either.
+
+    Returns (group_summary, tournament_summary) with the columns of
+    simulate_group_stage and simulate_full_tournament respectively.
+    """
+    prob_columns = TOURNAMENT_PROB_COLUMNS + tuple(
+        col for col in GROUP_PROB_COLUMNS if col not in TOURNAMENT_PROB_COLUMNS
+    )
+    for df in iter_full_tournament(
+        n_sim,
+        random_seed,
+        workers,
+        chunk_size,
+        start_method,
+        target_se,
+        target_halfwidth,
+        results=results,
+        prob_columns=prob_columns,
+        tiebreakers=tiebreakers,
+        engine=engine,
+    ):
+        pass
+    return _summary_view(df, GROUP_PROB_COLUMNS), _summary_view(df, TOURNAMENT_PROB_COLUMNS)
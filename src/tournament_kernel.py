@@ -0,0 +1,443 @@
+# src/tournament_kernel.py
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import instrumentation
+from .bracket_wc2026 import place_in_bracket
+from .group_simulation import group_stage_totals, sample_group_goals
+from .jit_kernel import STAGE_BRACKET, STAGE_GROUPS, STAGE_KNOCKOUT, resolve_engine, simulate_block_jit
+from .knockout import (
+    ROUND_F,
+    ROUND_GROUP,
+    ROUND_LABELS,
+    ROUND_QF,
+    ROUND_R16,
+    ROUND_R32,
+    ROUND_SF,
+    ROUND_W,
+    condition_win_matrix,
+    knockout_round_probabilities,
+    knockout_win_matrix,
+    simulate_knockout_batch,
+)
+from .outcome_store import write_outcome_block
+from .ranking import rank_fixture_groups, rank_third_placed
+
+# Simulations drawn per vectorized block (bounds the size of the goal matrices)
+BLOCK_SIZE = 50_000
+
+# Normal quantile for the 95% confidence intervals in the summaries
+Z_95 = 1.959963984540054
+
+MEAN_COLUMNS = ("exp_points", "exp_gd", "exp_gf")
+GROUP_PROB_COLUMNS = ("prob_1st", "prob_2nd", "prob_3rd", "prob_4th", "prob_advance")
+# How simulate_chunk settles the knockout stage: not at all, by sampling
+# every match, or exactly given the bracket (Rao-Blackwellised rounds)
+KNOCKOUT_MODES = ("none", "sample", "exact")
+# How far the compiled engine plays each tournament, per knockout mode
+# (the exact rounds are then solved as in the NumPy engine)
+_JIT_STAGES = {"none": STAGE_GROUPS, "sample": STAGE_KNOCKOUT, "exact": STAGE_BRACKET}
+
+# prob_* columns that count exits in one knockout round
+ROUND_COLUMNS = {
+    "prob_R16": ROUND_R16,
+    "prob_QF": ROUND_QF,
+    "prob_SF": ROUND_SF,
+    "prob_F": ROUND_F,
+    "prob_W": ROUND_W,
+}
+
+TOURNAMENT_PROB_COLUMNS = (
+    "prob_1st",
+    "prob_2nd",
+    "prob_3rd",
+    "prob_4th",
+    "prob_qual",
+    "prob_R16",
+    "prob_QF",
+    "prob_SF",
+    "prob_F",
+    "prob_W",
+)
+
+
+def _rank_live_groups(compiled, points, gd, gf, goals_home, goals_away, rng) -> np.ndarray:
+    """
+    rank_fixture_groups for a tournament in progress. A group whose matches
+    have all been played has the same table in every simulation, so if its
+    teams are separated before the drawing of lots it is ranked once and
+    broadcast; groups still open, or finished with teams exactly level
+    (whose lots are drawn again in every simulation), are ranked per
+    simulation.
+    """
+    settled = compiled.settled_groups
+    if not settled.any():
+        return rank_fixture_groups(compiled, points, gd, gf, goals_home, goals_away, rng)
+
+    members = compiled.group_members
+    # a constant draw key leaves teams that need the lots level
+    no_lots = np.zeros((1, points.shape[1]), dtype=np.int64)
+    fixed = rank_fixture_groups(
+        compiled, points[:1], gd[:1], gf[:1], goals_home[:1], goals_away[:1], rng, members[settled], no_lots
+    )
+    separated = np.zeros(len(members), dtype=bool)
+    separated[settled] = [len(np.unique(fixed[0, m])) == len(m) for m in members[settled]]
+
+    positions = np.empty(points.shape, dtype=np.int64)
+    positions[...] = fixed
+    if not separated.all():
+        drawn_teams = members[~separated].ravel()
+        drawn_positions = rank_fixture_groups(
+            compiled, points, gd, gf, goals_home, goals_away, rng, members[~separated]
+        )
+        positions[:, drawn_teams] = drawn_positions[:, drawn_teams]
+    return positions
+
+
+def simulate_group_block(compiled, n_sim: int, rng: np.random.Generator) -> dict:
+    """
+    Simulate n_sim group stages at once (only the matches not played yet).
+
+    Returns a dict of (n_sim, n_teams) arrays: points, gd, gf, positions (1-4),
+    plus the (n_sim, n_matches) goals_home / goals_away they come from.
+    """
+    with instrumentation.stage("group_goals"):
+        goals_home, goals_away = sample_group_goals(compiled, n_sim, rng)
+    with instrumentation.stage("group_totals"):
+        points, gf, ga = group_stage_totals(compiled, goals_home, goals_away)
+        gd = gf - ga
+    with instrumentation.stage("group_ranking"):
+        positions = _rank_live_groups(compiled, points, gd, gf, goals_home, goals_away, rng)
+    return {
+        "points": points,
+        "gd": gd,
+        "gf": gf,
+        "positions": positions,
+        "goals_home": goals_home,
+        "goals_away": goals_away,
+    }
+
+
+def simulate_tournament_block(
+    compiled,
+    lambda_matrix: np.ndarray,
+    n_sim: int,
+    rng: np.random.Generator,
+    win_matrix: np.ndarray | None = None,
+) -> dict:
+    """
+    Simulate n_sim full tournaments (group stage + 32-team knockout) at once.
+
+    Qualifiers are the top two of each group plus the best eight
+    third-placed teams, placed in the 2026 bracket (the thirds by
+    the allocation table for their groups), unless the real bracket is
+    already known (compiled.bracket). Knockout ties already
+    played keep their real winner (compiled.knockout_outcomes).
+
+    Returns the simulate_group_block dict plus
+      - qualifiers: (n_sim, 32) team in each bracket slot
+      - rounds: (n_sim, n_teams) ROUND_LABELS codes
+
+    With a win_matrix (knockout_win_matrix) the knockout matches are not
+    sampled: "rounds" is replaced by "round_probs" (n_sim, 32,
+    len(ROUND_LABELS)), the exact round-exit probabilities of every slot
+    given the sampled bracket.
+    """
+    out = simulate_group_block(compiled, n_sim, rng)
+    points, gd, gf, positions = out["points"], out["gd"], out["gf"], out["positions"]
+
+    if compiled.bracket.size:
+        qualifiers = np.broadcast_to(compiled.bracket, (n_sim, compiled.bracket.size))
+    else:
+        with instrumentation.stage("third_place"):
+            third_teams, best_thirds = rank_third_placed(positions, points, gd, gf, compiled.group_members, rng)
+        with instrumentation.stage("bracket"):
+            qualifiers = place_in_bracket(compiled, positions, third_teams, best_thirds)
+
+    out["qualifiers"] = qualifiers
+    if win_matrix is not None:
+        with instrumentation.stage("knockout_exact"):
+            out["round_probs"] = knockout_round_probabilities(qualifiers, win_matrix)
+        return out
+
+    with instrumentation.stage("knockout"):
+        out["rounds"] = simulate_knockout_batch(qualifiers, lambda_matrix, rng, compiled.knockout_outcomes)
+    return out
+
+
+@dataclass
+class TournamentCounts:
+    """
+    Integer aggregate counters over a set of simulated tournaments.
+
+    Apart from exact-knockout rounds (below), all fields are integer sums,
+    so counters from separate chunks merge exactly and in any order. Sums
+    of squares give the standard errors of the expected points / GD / GF.
+
+    For exact-knockout runs round_counts holds float sums of the per
+    simulation round-exit probabilities, and round_sumsq their sums of
+    squares (None for sampled rounds, whose indicators are their own
+    squares). Floats are added in chunk order, so merged results are still
+    reproducible.
+    """
+
+    n_sim: int
+    sum_points: np.ndarray       # (n_teams,)
+    sum_gd: np.ndarray           # (n_teams,)
+    sum_gf: np.ndarray           # (n_teams,)
+    sumsq_points: np.ndarray     # (n_teams,)
+    sumsq_gd: np.ndarray         # (n_teams,)
+    sumsq_gf: np.ndarray         # (n_teams,)
+    position_counts: np.ndarray  # (n_teams, 4)
+    round_counts: np.ndarray     # (n_teams, len(ROUND_LABELS)); all ROUND_GROUP for group-only runs
+    round_sumsq: np.ndarray | None = None  # (n_teams, len(ROUND_LABELS)); exact-knockout runs only
+
+    @classmethod
+    def zeros(cls, n_teams: int) -> "TournamentCounts":
+        return cls(
+            n_sim=0,
+            sum_points=np.zeros(n_teams, dtype=np.int64),
+            sum_gd=np.zeros(n_teams, dtype=np.int64),
+            sum_gf=np.zeros(n_teams, dtype=np.int64),
+            sumsq_points=np.zeros(n_teams, dtype=np.int64),
+            sumsq_gd=np.zeros(n_teams, dtype=np.int64),
+            sumsq_gf=np.zeros(n_teams, dtype=np.int64),
+            position_counts=np.zeros((n_teams, 4), dtype=np.int64),
+            round_counts=np.zeros((n_teams, len(ROUND_LABELS)), dtype=np.int64),
+        )
+
+    @classmethod
+    def from_block(cls, out: dict) -> "TournamentCounts":
+        """
+        Counters for the output of simulate_group_block / simulate_tournament_block.
+        """
+        positions = out["positions"]
+        n_sim = len(positions)
+        round_sumsq = None
+        if "round_probs" in out:
+            # Each team fills at most one slot per simulation, so per-team
+            # sums and sums of squares are weighted bincounts over slots
+            slot_teams = out["qualifiers"].ravel()
+            probs = out["round_probs"].reshape(len(slot_teams), -1)
+            n_teams = positions.shape[1]
+            round_counts = np.zeros((n_teams, len(ROUND_LABELS)))
+            round_sumsq = np.zeros((n_teams, len(ROUND_LABELS)))
+            for code in range(ROUND_R32, len(ROUND_LABELS)):
+                round_counts[:, code] = np.bincount(slot_teams, probs[:, code], minlength=n_teams)
+                round_sumsq[:, code] = np.bincount(slot_teams, probs[:, code] ** 2, minlength=n_teams)
+            round_counts[:, ROUND_GROUP] = n_sim - np.bincount(slot_teams, minlength=n_teams)
+            round_sumsq[:, ROUND_GROUP] = round_counts[:, ROUND_GROUP]
+        elif "rounds" in out:
+            rounds = out["rounds"]
+            round_counts = np.stack(
+                [(rounds == code).sum(axis=0) for code in range(len(ROUND_LABELS))], axis=1
+            )
+        else:
+            round_counts = np.zeros((positions.shape[1], len(ROUND_LABELS)), dtype=np.int64)
+            round_counts[:, ROUND_GROUP] = n_sim
+
+        return cls(
+            n_sim=n_sim,
+            sum_points=out["points"].sum(axis=0),
+            sum_gd=out["gd"].sum(axis=0),
+            sum_gf=out["gf"].sum(axis=0),
+            sumsq_points=(out["points"] ** 2).sum(axis=0),
+            sumsq_gd=(out["gd"] ** 2).sum(axis=0),
+            sumsq_gf=(out["gf"] ** 2).sum(axis=0),
+            position_counts=np.stack([(positions == pos).sum(axis=0) for pos in range(1, 5)], axis=1),
+            round_counts=round_counts,
+            round_sumsq=round_sumsq,
+        )
+
+    def _round_sumsq(self) -> np.ndarray:
+        return self.round_counts if self.round_sumsq is None else self.round_sumsq
+
+    def __add__(self, other: "TournamentCounts") -> "TournamentCounts":
+        return TournamentCounts(
+            n_sim=self.n_sim + other.n_sim,
+            sum_points=self.sum_points + other.sum_points,
+            sum_gd=self.sum_gd + other.sum_gd,
+            sum_gf=self.sum_gf + other.sum_gf,
+            sumsq_points=self.sumsq_points + other.sumsq_points,
+            sumsq_gd=self.sumsq_gd + other.sumsq_gd,
+            sumsq_gf=self.sumsq_gf + other.sumsq_gf,
+            position_counts=self.position_counts + other.position_counts,
+            round_counts=self.round_counts + other.round_counts,
+            round_sumsq=(
+                None
+                if self.round_sumsq is None and other.round_sumsq is None
+                else self._round_sumsq() + other._round_sumsq()
+            ),
+        )
+
+    def _event_counts(self) -> dict:
+        """
+        Number of simulations in which each prob_* event happened, per team.
+        """
+        pos = self.position_counts
+        rounds = self.round_counts
+        return {
+            "prob_1st": pos[:, 0],
+            "prob_2nd": pos[:, 1],
+            "prob_3rd": pos[:, 2],
+            "prob_4th": pos[:, 3],
+            "prob_advance": pos[:, 0] + pos[:, 1],
+            "prob_qual": self.n_sim - rounds[:, ROUND_GROUP],
+            **{col: rounds[:, code] for col, code in ROUND_COLUMNS.items()},
+        }
+
+    def _expected_columns(self, prob_columns) -> list:
+        """
+        prob_* columns estimated as means of per-simulation probabilities
+        (exact-knockout rounds) rather than as event frequencies.
+        """
+        if self.round_sumsq is None:
+            return []
+        return [col for col in prob_columns if col in ROUND_COLUMNS]
+
+    def _moments(self) -> dict:
+        return {
+            "exp_points": (self.sum_points, self.sumsq_points),
+            "exp_gd": (self.sum_gd, self.sumsq_gd),
+            "exp_gf": (self.sum_gf, self.sumsq_gf),
+        }
+
+    def estimates(self, prob_columns=TOURNAMENT_PROB_COLUMNS) -> dict:
+        """
+        Point estimates for MEAN_COLUMNS and the requested prob_* columns.
+        """
+        n = float(self.n_sim)
+        events = self._event_counts()
+        columns = {col: total / n for col, (total, _) in self._moments().items()}
+        columns.update({col: events[col] / n for col in prob_columns})
+        return columns
+
+    def standard_errors(self, prob_columns=TOURNAMENT_PROB_COLUMNS) -> dict:
+        """
+        Monte Carlo standard errors of estimates().
+
+        Probabilities use the Agresti-Coull adjusted proportion, so an event
+        not seen yet still gets a non-zero error. Exact-knockout round
+        probabilities are sample means of values in [0, 1] and use their
+        sample variance instead.
+        """
+        n = float(self.n_sim)
+        errors = {}
+        for col, (total, sumsq) in self._moments().items():
+            variance = np.maximum(sumsq / n - (total / n) ** 2, 0.0)
+            errors[col] = np.sqrt(variance / n)
+
+        events = self._event_counts()
+        n_adj = n + Z_95**2
+        for col in prob_columns:
+            p_adj = (events[col] + Z_95**2 / 2) / n_adj
+            errors[col] = np.sqrt(p_adj * (1 - p_adj) / n_adj)
+
+        rounds_sumsq = self._round_sumsq()
+        for col in self._expected_columns(prob_columns):
+            code = ROUND_COLUMNS[col]
+            mean = self.round_counts[:, code] / n
+            variance = np.maximum(rounds_sumsq[:, code] / n - mean**2, 0.0)
+            errors[col] = np.sqrt(variance / n)
+        return errors
+
+    def interval_columns(self, prob_columns=TOURNAMENT_PROB_COLUMNS) -> dict:
+        """
+        95% confidence limits <col>_lo / <col>_hi: normal intervals for the
+        expectations (and exact-knockout round probabilities, clipped to
+        [0, 1]), Wilson score intervals for the other probabilities.
+        """
+        n = float(self.n_sim)
+        z2 = Z_95**2
+        estimates = self.estimates(prob_columns)
+        errors = self.standard_errors(prob_columns)
+
+        expected = self._expected_columns(prob_columns)
+
+        columns = {}
+        for col in MEAN_COLUMNS:
+            columns[f"{col}_lo"] = estimates[col] - Z_95 * errors[col]
+            columns[f"{col}_hi"] = estimates[col] + Z_95 * errors[col]
+        for col in prob_columns:
+            p = estimates[col]
+            if col in expected:
+                columns[f"{col}_lo"] = np.maximum(p - Z_95 * errors[col], 0.0)
+                columns[f"{col}_hi"] = np.minimum(p + Z_95 * errors[col], 1.0)
+                continue
+            center = (p + z2 / (2 * n)) / (1 + z2 / n)
+            half = Z_95 * np.sqrt(p * (1 - p) / n + z2 / (4 * n**2)) / (1 + z2 / n)
+            columns[f"{col}_lo"] = np.maximum(center - half, 0.0)
+            columns[f"{col}_hi"] = np.minimum(center + half, 1.0)
+        return columns
+
+    def summary_columns(self, compiled, prob_columns=TOURNAMENT_PROB_COLUMNS) -> dict:
+        """
+        Per-team summary columns (as in the simulation summary CSVs), followed
+        by their 95% confidence limits.
+        """
+        columns = {
+            "team": compiled.teams,
+            "group": [compiled.groups[g] for g in compiled.team_group],
+        }
+        columns.update(self.estimates(prob_columns))
+        columns.update(self.interval_columns(prob_columns))
+        return columns
+
+
+def simulate_chunk(
+    compiled,
+    lambda_matrix: np.ndarray,
+    n_sim: int,
+    seed_seq,
+    knockout: str = "sample",
+    store: str | None = None,
+    store_row: int = 0,
+    engine: str = "auto",
+) -> TournamentCounts:
+    """
+    Simulate one chunk of tournaments from its own SeedSequence child.
+
+    knockout is one of KNOCKOUT_MODES: "none" simulates group stages only,
+    "sample" plays every knockout match, "exact" replaces the knockout
+    draws by the exact round probabilities of each sampled bracket.
+
+    With store (an outcome store directory, see src.outcome_store) the
+    per-simulation outcomes are also written to rows store_row onwards.
+
+    engine (src.jit_kernel.ENGINES) picks the NumPy block kernels or the
+    Numba-compiled per-simulation loop; "auto" uses Numba if installed.
+    Both simulate the same model, from different random streams.
+    """
+    engine = resolve_engine(engine)
+    if knockout not in KNOCKOUT_MODES:
+        raise ValueError(f"knockout must be one of {KNOCKOUT_MODES}, got {knockout!r}")
+    if store is not None and knockout != "sample":
+        raise ValueError('Per-simulation outcomes can only be stored with knockout="sample"')
+    rng = np.random.default_rng(seed_seq)
+    win_matrix = None
+    if knockout == "exact":
+        with instrumentation.stage("knockout_win_matrix"):
+            win_matrix = condition_win_matrix(knockout_win_matrix(lambda_matrix), compiled.knockout_outcomes)
+
+    counts = TournamentCounts.zeros(compiled.n_teams)
+    for start in range(0, n_sim, BLOCK_SIZE):
+        block = min(BLOCK_SIZE, n_sim - start)
+        if engine == "numba":
+            with instrumentation.stage("jit_block"):
+                out = simulate_block_jit(compiled, lambda_matrix, block, rng, _JIT_STAGES[knockout])
+            if win_matrix is not None:
+                with instrumentation.stage("knockout_exact"):
+                    out["round_probs"] = knockout_round_probabilities(out["qualifiers"], win_matrix)
+        elif knockout == "none":
+            out = simulate_group_block(compiled, block, rng)
+        else:
+            out = simulate_tournament_block(compiled, lambda_matrix, block, rng, win_matrix)
+        if store is not None:
+            with instrumentation.stage("store_write"):
+                write_outcome_block(store, store_row + start, out)
+        with instrumentation.stage("aggregation"):
+            counts = counts + TournamentCounts.from_block(out)
+    instrumentation.count("simulations", n_sim)
+    return counts